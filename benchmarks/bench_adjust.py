@@ -0,0 +1,130 @@
+"""
+Cost of reading corporate-action-adjusted bars.
+
+    python benchmarks/bench_adjust.py [--symbols 2000] [--days 250] [--actions 500] [--repeat 5]
+
+Builds a compacted NumpySymbolStore and an actions table of --actions
+splits, bonuses and dividends spread over the universe, then times:
+
+    refresh_all     computing every symbol's factors from an empty cache
+    refresh_one     refreshing after one new action (one symbol recomputed)
+    load_panel      the trailing 64 bars of every symbol, raw and adjusted
+    load_symbol     every symbol one by one, raw and adjusted
+
+Adjusted reads are checked against the raw bars times the factors.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, os.pardir, 'src'))
+from stock_patterns.corporate_actions import AdjustedStore
+from stock_patterns.metrics import METRICS
+from stock_patterns.symbol_store import NumpySymbolStore
+from synthetic import make_universe
+
+
+def best_of(func, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def write_actions(path, symbols, dates, count, seed=0):
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(['split', 'bonus', 'dividend'], count)
+    pd.DataFrame({
+        'Symbol': rng.choice(symbols, count),
+        'ExDate': pd.to_datetime(rng.choice(dates[1:], count)).strftime('%Y-%m-%d'),
+        'Action': kind,
+        'Ratio': np.where(kind == 'split', 5.0, np.where(kind == 'bonus', 1.0, np.nan)),
+        'Amount': np.where(kind == 'dividend', 1.0, np.nan),
+    }).drop_duplicates(['Symbol', 'ExDate']).to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=250)
+    parser.add_argument('--actions', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    universe = make_universe(args.symbols, args.days)
+    symbols = sorted(universe['Symbol'].unique())
+    dates = np.sort(universe['Date'].unique())
+    workdir = tempfile.mkdtemp(prefix='bench_adjust_')
+    try:
+        store = NumpySymbolStore(os.path.join(workdir, 'store'))
+        store.append_batch(universe)
+        store.flush()
+        actions_path = os.path.join(workdir, 'actions.csv')
+        cache_path = os.path.join(workdir, 'adjustments.json')
+        write_actions(actions_path, symbols, dates, args.actions)
+
+        def clear():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+
+        def adjusted():
+            return AdjustedStore(store, actions_path, cache_path)
+
+        refresh_all = best_of(lambda: adjusted().refresh(), args.repeat, clear)
+        adjusted().refresh()
+        with open(actions_path, encoding='utf-8') as f:
+            table = f.read()
+
+        def add_action():
+            with open(actions_path, 'w', encoding='utf-8') as f:
+                f.write(table + f"{symbols[-1]},{pd.Timestamp(dates[-2]):%Y-%m-%d},split,2,\n")
+
+        def restore():
+            with open(actions_path, 'w', encoding='utf-8') as f:
+                f.write(table)
+            adjusted().refresh()
+            add_action()
+
+        METRICS.reset()
+        refresh_one = best_of(lambda: adjusted().refresh(), args.repeat, restore)
+        recomputed = METRICS.counters['adjust_symbols_recomputed'] // args.repeat
+
+        view = adjusted()
+        view.refresh()
+        raw_panel = store.load_panel(length=64)
+        panel = view.load_panel(length=64)
+        close = store.load_symbol(symbols[0])['Close'].to_numpy()
+        price, _ = view.factors.lookup(np.full(len(close), symbols[0]), store.load_symbol(symbols[0])['Date'].to_numpy())
+        assert np.allclose(view.load_symbol(symbols[0])['Close'].to_numpy(), close * price)
+        changed = np.count_nonzero(~np.isclose(panel['Close'], raw_panel['Close']) & ~np.isnan(raw_panel['Close']))
+
+        panel_times = [best_of(lambda: source.load_panel(length=64), args.repeat) for source in (store, view)]
+        symbol_times = [best_of(lambda: [source.load_symbol(symbol) for symbol in symbols], args.repeat)
+                        for source in (store, view)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.symbols} symbols x {len(dates)} sessions, {len(view.factors.symbols)} symbols with actions")
+    print(f"refresh_all: {refresh_all * 1000:8.2f} ms")
+    print(f"refresh_one: {refresh_one * 1000:8.2f} ms ({recomputed} symbol recomputed)")
+    print(f" load_panel: {panel_times[0] * 1000:8.2f} ms raw, {panel_times[1] * 1000:8.2f} adjusted "
+          f"({changed} of {raw_panel['Close'].size} closes adjusted)")
+    print(f"load_symbol: {symbol_times[0] * 1e6 / len(symbols):8.1f} us/symbol raw, "
+          f"{symbol_times[1] * 1e6 / len(symbols):8.1f} adjusted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
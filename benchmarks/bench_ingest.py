@@ -0,0 +1,93 @@
+"""
+Per-file cost of parsing one sec_bhavdata_full file: the original path
+(decode to str, StringIO, read every column, strip every object column,
+drop columns, strftime the dates) against bhav_reader.read_bhavcopy.
+
+    python benchmarks/bench_ingest.py [--rows 3000] [--repeat 20]
+
+run_benchmarks.py times the same two paths as part of the full suite.
+
+Time is the median over the repeats; memory is the tracemalloc peak of a
+single parse, which includes the NumPy buffers pandas allocates.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+from stock_patterns.bhav_reader import read_bhavcopy
+from synthetic import bhavcopy_bytes, make_universe
+
+
+def make_bhavcopy(rows=3000, seed=0):
+    """A synthetic archive-format file with `rows` EQ rows and a third as many other-series rows."""
+    return bhavcopy_bytes(make_universe(rows, 1, seed=seed), other_series=0.33, seed=seed)
+
+
+def original_ingest(content):
+    # StockDataDownloader's parse before the lean path (its former
+    # read_csv_to_dataframe and process_stock_data).
+    df = pd.read_csv(StringIO(content.decode('utf-8')))
+    df.columns = df.columns.str.strip()
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].str.strip()
+    df = df[df['SERIES'] == 'EQ']
+    df = df.drop(columns=['PREV_CLOSE', 'LAST_PRICE', 'AVG_PRICE', 'TURNOVER_LACS',
+                          'NO_OF_TRADES', 'DELIV_QTY', 'DELIV_PER'])
+    df = df.rename(columns={'SYMBOL': 'Symbol', 'SERIES': 'Series', 'DATE1': 'Date', 'OPEN_PRICE': 'Open',
+                            'HIGH_PRICE': 'High', 'LOW_PRICE': 'Low', 'CLOSE_PRICE': 'Close',
+                            'TTL_TRD_QNTY': 'Volume'})
+    df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%Y')
+    df['Date'] = df['Date'].dt.strftime('%d-%m-%Y')
+    return df
+
+
+def lean_ingest(content):
+    return read_bhavcopy(BytesIO(content))
+
+
+def measure(func, content, repeat):
+    func(content)  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3000, help="EQ rows per synthetic file")
+    parser.add_argument('--repeat', type=int, default=20, help="timed parses per path")
+    args = parser.parse_args(argv)
+
+    content = make_bhavcopy(args.rows)
+    old, new = original_ingest(content), lean_ingest(content)
+    assert old['Symbol'].tolist() == new['Symbol'].tolist()
+    assert np.array_equal(old['Close'].to_numpy(), new['Close'].to_numpy())
+
+    print(f"File: {args.rows} rows, {len(content) / 1024:.0f} KiB, {len(new)} EQ rows")
+    results = {name: measure(func, content, args.repeat)
+               for name, func in (('original', original_ingest), ('lean', lean_ingest))}
+    for name, (seconds, peak) in results.items():
+        print(f"{name:>9}: {seconds * 1000:7.2f} ms/file   peak {peak / 1024:8.0f} KiB")
+    (old_s, old_peak), (new_s, new_peak) = results['original'], results['lean']
+    print(f"    saved: {(old_s - new_s) * 1000:7.2f} ms/file ({old_s / new_s:.1f}x)   "
+          f"peak {(old_peak - new_peak) / 1024:8.0f} KiB ({old_peak / new_peak:.1f}x)")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput and bar-close alert latency of the live intraday detector.
+
+    python benchmarks/bench_intraday.py [--symbols 2000] [--bars 30] [--trades 10] [--interval 5min]
+
+Replays a synthetic session of random-walk trades (--trades per symbol
+per candle, interleaved across symbols in time order) through
+IntradayDetector and reports the records folded per second and the
+latency from each interval close to its alerts (p50/p95/max).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, os.pardir, 'src'))
+from stock_patterns.intraday import IntradayDetector
+
+# 09:15 IST, the NSE open.
+SESSION_START = '2024-01-01T03:45'
+
+
+def make_trades(n_symbols, n_bars, trades_per_bar, interval, seed=0):
+    """Time-ordered (timestamp_ns, symbol, price, volume) trades of a synthetic session."""
+    rng = np.random.default_rng(seed)
+    step = int(pd.Timedelta(interval).value) // trades_per_bar
+    n = n_bars * trades_per_bar
+    prices = np.round(rng.uniform(20, 2000, (n_symbols, 1))
+                      * np.exp(np.cumsum(0.002 * rng.standard_normal((n_symbols, n)), axis=1)), 2)
+    volumes = rng.integers(1, 1000, (n_symbols, n))
+    start = np.datetime64(SESSION_START, 'ns').astype(np.int64)
+    # Symbols trade one after another within each step.
+    stamps = start + np.arange(n)[None, :] * step + np.arange(n_symbols)[:, None] * (step // n_symbols)
+    symbols = [f"SYM{i:05d}" for i in range(n_symbols)]
+    return [(int(stamps[s, t]), symbols[s], float(prices[s, t]), int(volumes[s, t]))
+            for t in range(n) for s in range(n_symbols)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--bars', type=int, default=30, help="candles per symbol")
+    parser.add_argument('--trades', type=int, default=10, help="trades per symbol per candle")
+    parser.add_argument('--interval', default='5min')
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'talib'])
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    trades = make_trades(args.symbols, args.bars, args.trades, args.interval)
+    detector = IntradayDetector(args.interval, engine=args.engine, capacity=args.symbols)
+    latencies, alerts = [], 0
+
+    def on_alert(frame):
+        nonlocal alerts
+        latencies.append(frame.attrs['latency'])
+        alerts += len(frame)
+
+    start = time.perf_counter()
+    closes = detector.run(trades, on_alert)
+    elapsed = time.perf_counter() - start
+
+    latencies = np.sort(latencies)
+    result = {
+        'records': len(trades), 'closes': closes, 'alerts': alerts, 'seconds': elapsed,
+        'records_per_sec': len(trades) / elapsed,
+        'close_latency_ms': {'p50': 1000 * float(np.percentile(latencies, 50)),
+                             'p95': 1000 * float(np.percentile(latencies, 95)),
+                             'max': 1000 * float(latencies[-1])},
+    }
+    print(f"{len(trades)} records, {args.symbols} symbols, {closes} closes: "
+          f"{result['records_per_sec']:,.0f} records/sec, {alerts} alerts")
+    print("close -> alert latency: " + ", ".join(f"{name} {value:.2f} ms"
+                                                   for name, value in result['close_latency_ms'].items()))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'result': result}, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
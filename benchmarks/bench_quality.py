@@ -0,0 +1,130 @@
+"""
+Overhead of data-quality validation on the nightly pipeline.
+
+    python benchmarks/bench_quality.py [--symbols 2000] [--days 60] [--detect-symbols 200] [--repeat 5]
+
+Times, per daily batch of --symbols rows, the ingest of one session (parse
+the bhavcopy, append it to a NumpySymbolStore) with and without
+DataValidator.validate, and, per symbol, CandlePatternRecognizer on the
+per-symbol CSVs of the first --detect-symbols symbols with and without
+validate=True. Plain and validated runs alternate and the best of --repeat
+is kept, so drift on a busy machine hits both alike. The validation time
+itself is read from the METRICS 'validate' timer and reported as a share of
+the validated path.
+
+A copy of the universe with injected faults checks that the batch
+validator finds them all.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+from io import BytesIO, StringIO
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, os.pardir, 'src'))
+from stock_patterns.bhav_reader import read_bhavcopy
+from stock_patterns.data_quality import CHECKS, DataValidator, validate_bars
+from stock_patterns.metrics import METRICS
+from stock_patterns.pattern_recognizer import CandlePatternRecognizer
+from stock_patterns.symbol_store import NumpySymbolStore
+from stock_patterns.trading_calendar import TradingCalendar
+from synthetic import bhavcopy_bytes, make_universe, write_symbol_csvs
+
+
+def compare(plain, validated, repeat, setup=None):
+    """
+    Best-of-repeat seconds of plain() and validated(), run alternately, and
+    the seconds validated() spent in the 'validate' timer on its best run.
+    """
+    best = {'plain': None, 'validated': None}
+    inside = None
+    for _ in range(repeat):
+        for name, func in (('plain', plain), ('validated', validated)):
+            if setup is not None:
+                setup()
+            METRICS.reset()
+            with contextlib.redirect_stdout(StringIO()):
+                start = time.perf_counter()
+                func()
+                seconds = time.perf_counter() - start
+            if best[name] is None or seconds < best[name]:
+                best[name] = seconds
+                if name == 'validated':
+                    inside = METRICS.timer_summary('validate')['sum']
+    return best['plain'], best['validated'], inside
+
+
+def inject_faults(universe, per_check=20, seed=0):
+    """Copy of universe with per_check rows broken for each hard check; returns (frame, broken rows)."""
+    rng = np.random.default_rng(seed)
+    df = universe.copy()
+    rows = rng.choice(len(df), 4 * per_check, replace=False).reshape(4, per_check)
+    df.loc[rows[0], 'Low'] = 0.0
+    df.loc[rows[1], 'High'] = df.loc[rows[1], 'Low'] - 1
+    df.loc[rows[2], 'Close'] = df.loc[rows[2], 'High'] + 1
+    df.loc[rows[3], 'Volume'] = -1
+    return df, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--detect-symbols', type=int, default=200, help="symbols run through detection")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    universe = make_universe(args.symbols, args.days)
+    calendar = TradingCalendar()
+    dates = sorted(universe['Date'].unique())
+    contents = [bhavcopy_bytes(universe[universe['Date'] == date].reset_index(drop=True), seed=i)
+                for i, date in enumerate(dates)]
+
+    faulty, broken = inject_faults(universe)
+    flags = validate_bars(faulty, calendar)
+    found = {name: int(np.count_nonzero(flags & bit)) for name, bit in CHECKS.items()}
+    assert all(flags[broken.ravel()] != 0), "validator missed an injected fault"
+    print("Injected faults found: " + ", ".join(f"{name} {count}" for name, count in found.items() if count))
+
+    workdir = tempfile.mkdtemp(prefix='bench_quality_')
+    try:
+        store_dir = os.path.join(workdir, 'store')
+
+        def ingest(validator):
+            store = NumpySymbolStore(store_dir, compact_every=len(contents) + 1)
+            for content in contents:
+                df = read_bhavcopy(BytesIO(content))
+                store.append_batch(validator.validate(df) if validator is not None else df)
+
+        reset = lambda: shutil.rmtree(store_dir, ignore_errors=True)
+        ingest_times = compare(lambda: ingest(None), lambda: ingest(DataValidator(calendar)), args.repeat, reset)
+
+        paths = write_symbol_csvs(universe, os.path.join(workdir, 'symbols'))[:args.detect_symbols]
+        output_dir = os.path.join(workdir, 'patterns')
+
+        def detect(validate):
+            recognizer = CandlePatternRecognizer(None, output_dir, engine='numpy',
+                                                 calendar=calendar, validate=validate)
+            for path in paths:
+                recognizer.recognize_candle_patterns(path)
+
+        detect_times = compare(lambda: detect(False), lambda: detect(True), args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.symbols} symbols x {len(dates)} sessions")
+    for label, unit, items, (plain, validated, inside) in (('ingest', 'batch', len(contents), ingest_times),
+                                                            ('detect', 'symbol', len(paths), detect_times)):
+        print(f"{label:>7}: {plain * 1000 / items:8.3f} ms/{unit} plain, {validated * 1000 / items:8.3f} validated, "
+              f"{inside * 1000 / items:6.3f} of it validating ({inside / validated:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Cold-start cost of the stock-patterns CLI.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--output startup.json]
+
+Every measurement is a fresh interpreter (wall time, best of --repeat):
+
+    python              `python -c pass`, the floor
+    numpy+pandas        `import numpy, pandas`, what any real command pays
+    help                `python -m stock_patterns --help`
+    <command>           a real detect / scan run on a tiny synthetic universe,
+                        and an import of each command's modules for download / render
+
+The detect and scan runs also report which heavy modules ended up in
+sys.modules; the script exits with status 1 if either loaded matplotlib,
+mplfinance or requests.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, os.pardir, 'src')
+sys.path.append(SRC)
+from stock_patterns.symbol_store import NumpySymbolStore
+from synthetic import make_universe, write_symbol_csvs
+
+HEAVY = ['matplotlib', 'mplfinance', 'requests', 'talib', 'pandas', 'numpy']
+# Modules the CLI must not load for these commands.
+FORBIDDEN = {'detect': ['matplotlib', 'mplfinance', 'requests'],
+             'scan': ['matplotlib', 'mplfinance', 'requests']}
+
+# Runs cli.main(argv) and reports the heavy top-level modules left in sys.modules.
+RUN_CLI = """
+import sys, json, contextlib, io
+from stock_patterns.cli import main
+with contextlib.redirect_stdout(io.StringIO()):
+    main(sys.argv[1:])
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+IMPORTS = {
+    'download': 'import stock_patterns.cli, stock_patterns.data_scraper, stock_patterns.symbol_store, '
+                'stock_patterns.trading_calendar',
+    'render': 'import stock_patterns.cli, stock_patterns.pattern_drawer, stock_patterns.image_sink',
+}
+
+
+def timed(args, repeat):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get('PYTHONPATH')])))
+    runs, stdout = [], ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True)
+        runs.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr}")
+        stdout = proc.stdout
+    return min(runs), runs, stdout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the CLI's cold start per command.")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement; the best is reported")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='stock_startup_')
+    try:
+        universe = make_universe(20, 60)
+        symbols_dir = os.path.join(workdir, 'symbols')
+        write_symbol_csvs(universe, symbols_dir)
+        store_dir = os.path.join(workdir, 'store')
+        store = NumpySymbolStore(store_dir)
+        store.append_batch(universe)
+        store.flush()
+
+        measurements = [
+            ('python', ['-c', 'pass']),
+            ('numpy+pandas', ['-c', 'import numpy, pandas']),
+            ('help', ['-m', 'stock_patterns', '--help']),
+            ('download', ['-c', IMPORTS['download']]),
+            ('detect', ['-c', RUN_CLI.format(heavy=HEAVY), '--log-level', 'WARNING', 'detect', '--input',
+                        symbols_dir, '--output', os.path.join(workdir, 'patterns'), '--engine', 'numpy']),
+            ('render', ['-c', IMPORTS['render']]),
+            ('scan', ['-c', RUN_CLI.format(heavy=HEAVY), '--log-level', 'WARNING', 'scan', '--store', store_dir]),
+        ]
+        results, failed = [], []
+        for name, command in measurements:
+            best, runs, stdout = timed(command, args.repeat)
+            record = {'measurement': name, 'seconds': best, 'runs': runs}
+            if name in FORBIDDEN:
+                record['loaded'] = json.loads(stdout.strip().splitlines()[-1])
+                leaked = sorted(set(record['loaded']) & set(FORBIDDEN[name]))
+                if leaked:
+                    failed.append((name, leaked))
+            results.append(record)
+            loaded = f"  loaded: {', '.join(record['loaded'])}" if 'loaded' in record else ''
+            print(f"{name:<14} {best * 1000:9.1f} ms{loaded}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=1)
+        print(f"Results written to {args.output}")
+    for name, leaked in failed:
+        print(f"{name} loaded {', '.join(leaked)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Peak memory of a full-history run, in-memory against the streaming pipeline.
+
+    python benchmarks/bench_streaming.py [--symbols 1000] [--days 2500] [--memory-limit 64]
+
+Each mode runs in a fresh interpreter on the same synthetic store, so its
+peak RSS is its own:
+
+    in_memory   ingest with whole-store compactions, then score the
+                universe as one (symbols x days) panel
+    streaming   ingest with compact_chunk_rows compactions, then
+                StreamingPipeline.iter_patterns under --memory-limit
+
+Ingest replays pre-written daily partitions, compacting every 64 sessions.
+
+Both modes must find the same hits; the script prints each stage's wall
+time and peak RSS.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, os.pardir, 'src'))
+from stock_patterns.streaming import StreamingPipeline, compact_chunk_rows, PRICE_COLUMNS
+from stock_patterns.symbol_store import NumpySymbolStore
+from synthetic import make_universe
+
+
+def run_mode(mode, seed, root, memory_limit_mb, engine, compact_every=64):
+    """
+    Replay the daily partitions under seed into a store at root, compacting
+    every compact_every sessions as a daily ingest would, then detect every
+    pattern; returns the stage stats and a checksum of the hits.
+    """
+    streaming = mode == 'streaming'
+    store = NumpySymbolStore(root, compact_every=compact_every,
+                             compact_chunk_rows=compact_chunk_rows(memory_limit_mb * 2 ** 20) if streaming else None)
+    pipeline = StreamingPipeline(store, memory_limit_mb=memory_limit_mb, engine=engine, track_peak=True)
+    partitions = sorted(os.listdir(os.path.join(seed, 'partitions')))
+    os.makedirs(store.partition_dir, exist_ok=True)
+    with pipeline.stage('ingest') as stats:
+        for i in range(0, len(partitions), compact_every):
+            for name in partitions[i:i + compact_every]:
+                shutil.copy(os.path.join(seed, 'partitions', name), store.partition_dir)
+            store.compact()
+            stats.items += len(partitions[i:i + compact_every])
+
+    hits = 0
+    checksum = 0
+    if streaming:
+        for _, chunk in pipeline.iter_patterns():
+            hits += len(chunk)
+            checksum ^= int(np.bitwise_xor.reduce(chunk['PatternMask'].to_numpy() * 31 + chunk['BearishMask'].to_numpy(), initial=0))
+    else:
+        with pipeline.stage('detect') as stats:
+            panel = store.load_panel()
+            masks, bearish = pipeline.codec.encode(
+                pipeline.engine.compute_matrix(*(panel[column] for column in PRICE_COLUMNS)))
+            hit = masks != 0
+            hits = int(np.count_nonzero(hit))
+            checksum = int(np.bitwise_xor.reduce(masks[hit] * 31 + bearish[hit], initial=0))
+            stats.items = len(panel)
+    return {'stages': [stats.as_dict() for stats in pipeline.stages], 'hits': hits, 'checksum': checksum}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=1000, help="symbols in the synthetic universe")
+    parser.add_argument('--days', type=int, default=2500, help="sessions per symbol")
+    parser.add_argument('--memory-limit', type=int, default=64, help="streaming budget in MiB")
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'talib'])
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--run', nargs=3, metavar=('MODE', 'SEED', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_mode(*args.run, args.memory_limit, args.engine)))
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix='stock_stream_')
+    try:
+        print(f"Generating {args.symbols} symbols x {args.days} days in {workdir}")
+        universe = make_universe(args.symbols, args.days)
+        seed = os.path.join(workdir, 'seed')
+        # One partition per session, as daily ingest leaves them before compaction.
+        NumpySymbolStore(seed, compact_every=args.days + 1).append_batch(universe)
+        del universe
+
+        results = {}
+        for mode in ('in_memory', 'streaming'):
+            root = os.path.join(workdir, mode)
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', mode, seed, root,
+                                   '--memory-limit', str(args.memory_limit), '--engine', args.engine],
+                                  capture_output=True, text=True, check=True)
+            results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+            shutil.rmtree(root)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for mode, result in results.items():
+        for stats in result['stages']:
+            print(f"{mode:<10} {stats['stage']:<8} {stats['seconds']:8.2f}s  RSS {stats['start_rss'] / 2 ** 20:7.1f} MB "
+                  f"at start, peak {stats['peak_rss'] / 2 ** 20:7.1f} MB")
+    same = (results['in_memory']['hits'], results['in_memory']['checksum']) == \
+           (results['streaming']['hits'], results['streaming']['checksum'])
+    print(f"hits: {results['streaming']['hits']} ({'identical' if same else 'DIFFERENT'})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'results': results}, f, indent=1)
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Benchmark every pipeline stage on a deterministic synthetic universe.
+
+    python benchmarks/run_benchmarks.py [--symbols 500] [--days 250] [--output results.json]
+                                        [--compare baseline.json] [--tolerance 0.25]
+
+Stages (each timed on its own, best of --repeat runs):
+
+    parse_original      the original pandas parse (bench_ingest.original_ingest), per daily file
+    parse_lean          parse_bhavcopy (bhav_reader.read_bhavcopy), per daily file
+    split_data          StockDataDownloader.split_data into per-symbol CSVs, per daily batch
+    store_append        NumpySymbolStore.append_batch + flush, per daily batch
+    recognize           CandlePatternRecognizer.recognize_candle_patterns, per symbol file
+    compute_patterns    DrawPatternImage.compute_patterns, per symbol
+    scan                PatternScanner.scan over the whole store, per scan
+    render_charts       chart_renderer.render_charts into a MemorySink, per chart
+
+Pattern stages run once per available engine. Results are written as JSON
+(one record per stage and variant, plus the environment) so runs can be
+compared; with --compare the script exits with status 1 when a stage got
+slower than the baseline by more than --tolerance.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from io import BytesIO, StringIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, os.pardir, 'src'))
+from synthetic import make_universe, write_bhavcopies, write_symbol_csvs
+from bench_ingest import original_ingest
+
+STAGES = ['parse_original', 'parse_lean', 'split_data', 'store_append', 'recognize',
+          'compute_patterns', 'scan', 'render_charts']
+
+
+def available_engines():
+    from stock_patterns.pattern_engine import ENGINES
+    engines = []
+    for name in ENGINES:
+        try:
+            ENGINES[name]()
+            engines.append(name)
+        except ImportError:
+            pass
+    return engines
+
+
+class Suite:
+    def __init__(self, workdir, universe, bhav_paths, symbol_paths, repeat=3, charts=50):
+        self.workdir = workdir
+        self.universe = universe
+        self.bhav_paths = bhav_paths
+        self.symbol_paths = symbol_paths
+        self.repeat = repeat
+        self.charts = charts
+        self.results = []
+        self._downloader = None
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            from stock_patterns.data_scraper import StockDataDownloader
+            self._downloader = StockDataDownloader('01012020', '01012020', download_dir=None)
+        return self._downloader
+
+    def scratch(self, name):
+        path = os.path.join(self.workdir, 'scratch', name)
+        shutil.rmtree(path, ignore_errors=True)
+        return path
+
+    def time(self, stage, func, items, unit, variant=None, setup=None):
+        """
+        Best-of-repeat wall time of func(items); setup() runs untimed before each run.
+        """
+        runs = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            with contextlib.redirect_stdout(StringIO()):
+                start = time.perf_counter()
+                func(items)
+                runs.append(time.perf_counter() - start)
+        best = min(runs)
+        record = {
+            'stage': stage,
+            'variant': variant,
+            'items': len(items),
+            'unit': unit,
+            'seconds': best,
+            'ms_per_item': best * 1000 / len(items) if items else 0.0,
+            'items_per_sec': len(items) / best if best > 0 else 0.0,
+            'runs': runs,
+        }
+        self.results.append(record)
+        label = stage if variant is None else f"{stage}[{variant}]"
+        print(f"{label:<28} {record['ms_per_item']:10.3f} ms/{unit:<7} {record['items_per_sec']:12.1f} {unit}/s")
+        return record
+
+    # ---------- stages ----------
+
+    def parse_original(self):
+        contents = [open(path, 'rb').read() for path in self.bhav_paths]
+
+        self.time('parse_original', lambda items: [original_ingest(c) for c in items], contents, 'file')
+
+    def parse_lean(self):
+        contents = [open(path, 'rb').read() for path in self.bhav_paths]
+        self.time('parse_lean', lambda items: [self.downloader.parse_bhavcopy(BytesIO(c)) for c in items],
+                  contents, 'file')
+
+    def _daily_batches(self):
+        return [self.downloader.parse_bhavcopy(open(path, 'rb')) for path in self.bhav_paths]
+
+    def split_data(self):
+        batches = self._daily_batches()
+        output_dir = os.path.join(self.workdir, 'scratch', 'split')
+
+        def run(items):
+            for df in items:
+                self.downloader.split_data(df, output_dir)
+
+        self.time('split_data', run, batches, 'batch', setup=lambda: self.scratch('split'))
+
+    def store_append(self):
+        from stock_patterns.symbol_store import NumpySymbolStore
+        batches = self._daily_batches()
+        root = os.path.join(self.workdir, 'scratch', 'store')
+
+        def run(items):
+            store = NumpySymbolStore(root)
+            for df in items:
+                store.append_batch(df)
+            store.flush()
+
+        self.time('store_append', run, batches, 'batch', setup=lambda: self.scratch('store'))
+
+    def recognize(self):
+        from stock_patterns.pattern_recognizer import CandlePatternRecognizer
+        for engine in available_engines():
+            output_dir = os.path.join(self.workdir, 'scratch', 'recognize')
+
+            def run(items, engine=engine):
+                recognizer = CandlePatternRecognizer(os.path.dirname(items[0]), output_dir, engine=engine)
+                for path in items:
+                    recognizer.recognize_candle_patterns(path)
+
+            self.time('recognize', run, self.symbol_paths, 'file', variant=engine,
+                      setup=lambda: self.scratch('recognize'))
+
+    def compute_patterns(self):
+        from stock_patterns.pattern_detector import DrawPatternImage
+        frames = [frame.set_index('Date') for _, frame in self.universe.groupby('Symbol', sort=True)]
+        for engine in available_engines():
+            detector = DrawPatternImage(None, self.scratch('detector'), engine=engine)
+            self.time('compute_patterns', lambda items: [detector.compute_patterns(df) for df in items],
+                      frames, 'symbol', variant=engine)
+
+    def scan(self):
+        from stock_patterns.symbol_store import NumpySymbolStore
+        from stock_patterns.pattern_scanner import PatternScanner
+        store = NumpySymbolStore(self.scratch('scan_store'))
+        store.append_batch(self.universe)
+        store.flush()
+        for engine in available_engines():
+            scanner = PatternScanner(store, engine=engine)
+            self.time('scan', lambda items: [scanner.scan() for _ in items], [None] * 5, 'scan', variant=engine)
+
+    def render_charts(self):
+        from stock_patterns.chart_renderer import ChartJob, render_charts
+        from stock_patterns.image_sink import MemorySink
+        frames = [frame.set_index('Date') for _, frame in self.universe.groupby('Symbol', sort=True)]
+        jobs = []
+        for i in range(self.charts):
+            df = frames[i % len(frames)]
+            end = min(len(df), 30 + i % max(1, len(df) - 30))
+            jobs.append(ChartJob(df.iloc[max(0, end - 30):end], ['Doji'], f"chart_{i:05d}.png"))
+        self.time('render_charts', lambda items: render_charts(items, MemorySink()), jobs, 'chart')
+
+
+def environment(args):
+    def version(module):
+        try:
+            return __import__(module).__version__
+        except Exception:
+            return None
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': version('numpy'),
+        'pandas': version('pandas'),
+        'matplotlib': version('matplotlib'),
+        'talib': version('talib'),
+        'params': {'symbols': args.symbols, 'days': args.days, 'seed': args.seed,
+                   'repeat': args.repeat, 'charts': args.charts},
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Stages slower than the baseline by more than tolerance (a fraction of the baseline ms/item).
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['stage'], r['variant']): r for r in json.load(f)['results']}
+    regressions = []
+    for record in results:
+        before = baseline.get((record['stage'], record['variant']))
+        if before is None or before['ms_per_item'] <= 0:
+            continue
+        change = record['ms_per_item'] / before['ms_per_item'] - 1
+        label = record['stage'] if record['variant'] is None else f"{record['stage']}[{record['variant']}]"
+        print(f"{label:<28} {before['ms_per_item']:10.3f} -> {record['ms_per_item']:10.3f} ms ({change:+.1%})")
+        if change > tolerance:
+            regressions.append((label, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument('--symbols', type=int, default=500, help="symbols in the synthetic universe")
+    parser.add_argument('--days', type=int, default=250, help="sessions per symbol")
+    parser.add_argument('--seed', type=int, default=0, help="generator seed")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage; the best is reported")
+    parser.add_argument('--charts', type=int, default=50, help="charts rendered by render_charts")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="stages to run")
+    parser.add_argument('--workdir', help="directory for generated data (default: a temporary directory)")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline before a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='stock_bench_')
+    print(f"Generating {args.symbols} symbols x {args.days} days in {workdir}")
+    universe = make_universe(args.symbols, args.days, seed=args.seed)
+    bhav_paths = write_bhavcopies(universe, os.path.join(workdir, 'bhavcopy'), seed=args.seed)
+    symbol_paths = write_symbol_csvs(universe, os.path.join(workdir, 'symbols'))
+
+    suite = Suite(workdir, universe, bhav_paths, symbol_paths, repeat=args.repeat, charts=args.charts)
+    try:
+        for stage in args.stages:
+            getattr(suite, stage)()
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'environment': environment(args), 'results': suite.results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(suite.results, args.compare, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
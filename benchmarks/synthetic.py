@@ -0,0 +1,106 @@
+"""
+Deterministic synthetic market data for the benchmarks.
+
+make_universe() builds N symbols x M sessions of OHLCV bars as a random
+walk; the same seed always gives the same bars. The writers lay the bars
+out the way the pipeline sees them: daily sec_bhavdata_full files (the
+download input) and per-symbol CSVs (the split_data output).
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+from stock_patterns.symbol_store import CsvSymbolStore
+from stock_patterns.trading_calendar import ARCHIVE_DATE_FORMAT, TradingCalendar
+
+BHAV_HEADER = ("SYMBOL, SERIES, DATE1, PREV_CLOSE, OPEN_PRICE, HIGH_PRICE, LOW_PRICE, LAST_PRICE, CLOSE_PRICE, "
+               "AVG_PRICE, TTL_TRD_QNTY, TURNOVER_LACS, NO_OF_TRADES, DELIV_QTY, DELIV_PER")
+
+# Share of extra non-EQ rows per day (BE, SM, ...), which the ingest has to filter out.
+OTHER_SERIES = ['BE', 'BZ', 'SM', 'GB', 'N1']
+
+
+def make_universe(n_symbols=500, n_days=250, start='2020-01-01', seed=0):
+    """
+    N symbols x M sessions of daily bars.
+
+    :return: DataFrame with Symbol, Series, Date, Open, High, Low, Close, Volume,
+             sorted by (Symbol, Date), with 2-decimal prices.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    # Enough calendar days to hold n_days weekday sessions.
+    dates = TradingCalendar().sessions(start, start + pd.Timedelta(days=n_days * 7 // 5 + 7))[:n_days]
+
+    drift = rng.normal(0.0003, 0.0005, (n_symbols, 1))
+    volatility = rng.uniform(0.01, 0.03, (n_symbols, 1))
+    returns = drift + volatility * rng.standard_normal((n_symbols, n_days))
+    close = rng.uniform(20, 2000, (n_symbols, 1)) * np.exp(np.cumsum(returns, axis=1))
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    open_ = prev_close * (1 + 0.5 * volatility * rng.standard_normal((n_symbols, n_days)))
+    high = np.maximum(open_, close) * (1 + np.abs(0.5 * volatility * rng.standard_normal((n_symbols, n_days))))
+    low = np.minimum(open_, close) * (1 - np.abs(0.5 * volatility * rng.standard_normal((n_symbols, n_days))))
+    volume = rng.lognormal(11, 1.5, (n_symbols, n_days)).astype(np.int64) + 1
+
+    symbols = np.array([f"SYM{i:05d}" for i in range(n_symbols)])
+    return pd.DataFrame({
+        'Symbol': np.repeat(symbols, n_days),
+        'Series': 'EQ',
+        'Date': np.tile(dates.to_numpy(), n_symbols),
+        'Open': np.round(open_, 2).ravel(),
+        'High': np.round(high, 2).ravel(),
+        'Low': np.round(low, 2).ravel(),
+        'Close': np.round(close, 2).ravel(),
+        'Volume': volume.ravel(),
+    })
+
+
+def bhavcopy_bytes(day_bars, other_series=0.25, seed=0):
+    """
+    One day's bars in the sec_bhavdata_full layout (', ' separators, unused
+    columns filled in), plus roughly other_series * len(day_bars) non-EQ rows.
+    """
+    rng = np.random.default_rng(seed)
+    extra = day_bars.iloc[rng.choice(len(day_bars), int(len(day_bars) * other_series), replace=False)]
+    extra = extra.assign(Series=rng.choice(OTHER_SERIES, len(extra)))
+    rows = pd.concat([day_bars, extra]).sort_values('Symbol', kind='stable')
+    date = pd.Timestamp(day_bars['Date'].iloc[0]).strftime('%d-%b-%Y')
+
+    lines = [BHAV_HEADER]
+    for symbol, s, o, h, l, c, v in rows[['Symbol', 'Series', 'Open', 'High', 'Low', 'Close', 'Volume']].itertuples(
+            index=False):
+        deliv = (f"{v // 2}", "50.00") if s == 'EQ' else ("-", "-")
+        lines.append(f"{symbol}, {s}, {date}, {c:.2f}, {o:.2f}, {h:.2f}, {l:.2f}, {c:.2f}, {c:.2f}, "
+                     f"{(h + l) / 2:.2f}, {v}, {v * c / 1e5:.2f}, {v // 100 + 1}, {deliv[0]}, {deliv[1]}")
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def write_bhavcopies(universe, directory, seed=0):
+    """
+    Write one sec_bhavdata_full_<DDMMYYYY>.csv per session into directory.
+
+    :return: Sorted list of the written paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, (date, day_bars) in enumerate(universe.groupby('Date', sort=True)):
+        path = os.path.join(directory, f"sec_bhavdata_full_{pd.Timestamp(date).strftime(ARCHIVE_DATE_FORMAT)}.csv")
+        with open(path, 'wb') as f:
+            f.write(bhavcopy_bytes(day_bars.reset_index(drop=True), seed=seed + i))
+        paths.append(path)
+    return paths
+
+
+def write_symbol_csvs(universe, directory):
+    """
+    Write one <symbol>.csv per symbol in the split_data layout ('%d-%m-%Y' dates).
+
+    :return: Sorted list of the written paths.
+    """
+    store = CsvSymbolStore(directory)
+    store.append_batch(universe)
+    store.flush()
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory))
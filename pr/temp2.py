@@ -4,9 +4,15 @@ import mplfinance as mpf
 import numpy as np
 import json
 import os
+import hashlib
 from matplotlib.patches import Rectangle
 from datetime import datetime
 
+# Needs the stock_patterns package: run `pip install -e .` from the repository root first.
+from stock_patterns.image_sink import DirectorySink
+from stock_patterns.image_manifest import ImageManifest
+from stock_patterns.render_cache import RenderCache
+
 # ======================
 # STYLE CONFIGURATION
 # ======================
@@ -46,10 +52,27 @@ PATTERN_COLORS = {
 }
 
 
+# Bump when the chart layout below changes, so cached charts are redrawn.
+PRO_CHART_STYLE = 'pro-1'
+
+
+def pro_chart_key(symbol, subset, patterns):
+    # Content key of a chart (see stock_patterns.render_cache).
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{PRO_CHART_STYLE}\0{symbol}\0{json.dumps(list(patterns))}\0".encode('utf-8'))
+    digest.update(np.asarray(subset.index, dtype='datetime64[ns]').tobytes())
+    digest.update(np.ascontiguousarray(subset[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
 # ======================
 # CHART GENERATION
 # ======================
-def create_pro_chart(data, pattern_date, patterns, symbol, save_dir):
+def create_pro_chart(data, pattern_date, patterns, symbol, save_dir, sink=None, cache=None):
+    # save_dir is used when no ImageSink (see stock_patterns.image_sink) is given;
+    # with a RenderCache an identical chart rendered before is reused.
+    if sink is None:
+        sink = DirectorySink(save_dir)
     try:
         # Data preparation
         idx = data.index.get_loc(pattern_date)
@@ -57,6 +80,12 @@ def create_pro_chart(data, pattern_date, patterns, symbol, save_dir):
         end_idx = min(len(data), idx + 5)
         subset = data.iloc[start_idx:end_idx].copy()  # Avoid SettingWithCopyWarning
 
+        key = pro_chart_key(symbol, subset, patterns) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
         # Create figure
         fig = plt.figure(figsize=(12, 8), dpi=150, facecolor=PRO_STYLE['facecolor'])
         gs = fig.add_gridspec(6, 1)
@@ -115,8 +144,8 @@ def create_pro_chart(data, pattern_date, patterns, symbol, save_dir):
         # Volume bars
         ax_vol.bar(subset.index, subset['Volume'],
                    color=np.where(subset['Close'] >= subset['Open'],
-                                  PRO_STYLE['marketcolors']['up'],
-                                  PRO_STYLE['marketcolors']['down']),
+                                  PRO_STYLE['marketcolors']['candle']['up'],
+                                  PRO_STYLE['marketcolors']['candle']['down']),
                    alpha=0.7)
 
         # Info panel
@@ -133,10 +162,13 @@ def create_pro_chart(data, pattern_date, patterns, symbol, save_dir):
 
         # Save image
         filename = f"{symbol}_{pattern_date.strftime('%Y%m%d')}_{'_'.join(patterns)}.png"
-        filepath = os.path.join(save_dir, filename)
-        plt.savefig(filepath, bbox_inches='tight', pad_inches=0.5)
-        plt.close()
+        try:
+            filepath = sink.save_figure(fig, filename, bbox_inches='tight', pad_inches=0.5)
+        finally:
+            plt.close(fig)
 
+        if key is not None:
+            cache.put(key, filepath)
         return filepath
 
     except Exception as e:
@@ -164,8 +196,12 @@ def validate_patterns(pattern_entry):
 
 def annotate_patterns_in_charts(input_directory=r"D:\image",
                                 output_csv=r"D:\database_final\output_with_images.csv",
-                                image_save_directory=r"D:\pattern_images"):
-    os.makedirs(image_save_directory, exist_ok=True)
+                                image_save_directory=r"D:\pattern_images", sink=None):
+    if sink is None:
+        sink = DirectorySink(image_save_directory)
+    cache = RenderCache(os.path.join(image_save_directory, 'render_cache.json'))
+    # Hit -> image rows, committed once per file; hits already in it are skipped on a rerun.
+    manifest = ImageManifest(output_csv)
     all_files = list_files_in_directory(input_directory)
 
     for file_path in all_files:
@@ -173,9 +209,6 @@ def annotate_patterns_in_charts(input_directory=r"D:\image",
             df = pd.read_csv(file_path, parse_dates=['Date'], index_col=['Date'])
             df['Patterns'] = df['Patterns'].apply(validate_patterns)
 
-            if 'Pattern_Image' not in df.columns:
-                df['Pattern_Image'] = np.nan
-
             pattern_dates = df[df['Patterns'].apply(len) > 0].index
 
             for date in pattern_dates:
@@ -187,16 +220,25 @@ def annotate_patterns_in_charts(input_directory=r"D:\image",
                         continue
 
                     symbol = df.loc[date, 'Symbol'] if 'Symbol' in df.columns else 'UNKNOWN'
-                    img_path = create_pro_chart(df, date, patterns, symbol, image_save_directory)
+                    hit = (symbol, date.strftime('%Y-%m-%d'), json.dumps(patterns))
+                    if manifest.done(*hit):
+                        continue
+                    img_path = create_pro_chart(df, date, patterns, symbol, image_save_directory, sink, cache)
 
                     if img_path:
-                        df.at[date, 'Pattern_Image'] = img_path
+                        manifest.add(*hit, img_path)
 
                 except Exception as e:
                     print(f"Error processing {date}: {str(e)}")
 
+            # Images first: the manifest and cache must never point at an unflushed shard.
+            sink.flush()
+            manifest.commit()
+            cache.save()
         except Exception as e:
             print(f"Error processing file {file_path}: {str(e)}")
+    manifest.finalize()
+    sink.close()
 
 
 if __name__ == "__main__":
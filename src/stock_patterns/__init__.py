@@ -0,0 +1,61 @@
+"""
+NSE bhavcopy download, candlestick pattern detection, scanning and charting.
+
+Importing the package is cheap: the public classes below are resolved on
+first access, so `from stock_patterns import PatternScanner` loads the
+scanner's modules only, and nothing imports matplotlib, mplfinance,
+requests or TA-Lib until a code path that needs them runs.
+"""
+import importlib
+
+__version__ = '0.2.0'
+
+# Public name -> defining submodule.
+_EXPORTS = {
+    'StockDataDownloader': 'data_scraper',
+    'BhavcopyCache': 'bhav_cache',
+    'read_bhavcopy': 'bhav_reader',
+    'TradingCalendar': 'trading_calendar',
+    'CsvSymbolStore': 'symbol_store',
+    'IngestLedger': 'ingest_ledger',
+    'DataValidator': 'data_quality',
+    'validate_bars': 'data_quality',
+    'NumpySymbolStore': 'symbol_store',
+    'get_engine': 'pattern_engine',
+    'PatternCodec': 'pattern_codec',
+    'CandlePatternRecognizer': 'pattern_recognizer',
+    'PatternScanner': 'pattern_scanner',
+    'PatternIndex': 'pattern_index',
+    'PatternBacktester': 'pattern_backtest',
+    'DrawPatternImage': 'pattern_detector',
+    'annotate_patterns_in_charts': 'pattern_drawer',
+    'DirectorySink': 'image_sink',
+    'TarShardSink': 'image_sink',
+    'MemorySink': 'image_sink',
+    'RenderCache': 'render_cache',
+    'ImageManifest': 'image_manifest',
+    'run_batch': 'batch_runner',
+    'StreamingPipeline': 'streaming',
+    'IntradayDetector': 'intraday',
+    'ResampledStore': 'resampler',
+    'AdjustedStore': 'corporate_actions',
+    'AdjustmentFactors': 'corporate_actions',
+    'resample_bars': 'resampler',
+    'METRICS': 'metrics',
+    'MetricsRegistry': 'metrics',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
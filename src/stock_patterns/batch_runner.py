@@ -0,0 +1,93 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from .metrics import METRICS
+
+
+class BatchSummary:
+    def __init__(self, items, outcomes, elapsed, workers):
+        """
+        Outcome of a batch run, in the order the items were submitted.
+
+        :param items: Submitted items (file paths or symbols).
+        :param outcomes: One (ok, result_or_traceback) tuple per item.
+        :param elapsed: Wall-clock seconds for the whole batch.
+        :param workers: Number of worker processes used.
+        """
+        self.items = items
+        self.outcomes = outcomes
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def results(self):
+        return [(item, result) for item, (ok, result) in zip(self.items, self.outcomes) if ok]
+
+    @property
+    def failures(self):
+        return [(item, error) for item, (ok, error) in zip(self.items, self.outcomes) if not ok]
+
+    def report(self):
+        failures = self.failures
+        lines = [f"Processed {len(self.items)} items with {self.workers} worker(s) in {self.elapsed:.2f}s: "
+                 f"{len(self.items) - len(failures)} succeeded, {len(failures)} failed"]
+        for item, error in failures:
+            last_line = error.strip().splitlines()[-1] if error.strip() else error
+            lines.append(f"  FAILED {item}: {last_line}")
+        return "\n".join(lines)
+
+
+def _run_chunk(func, chunk):
+    outcomes = []
+    for item in chunk:
+        try:
+            outcomes.append((True, func(item)))
+        except Exception:
+            outcomes.append((False, traceback.format_exc()))
+    return outcomes
+
+
+def _run_chunk_in_worker(func, chunk):
+    # The worker's registry is a copy of the parent's (fork) or a fresh one
+    # (spawn): start every chunk empty and send what it recorded back.
+    METRICS.reset()
+    outcomes = _run_chunk(func, chunk)
+    return outcomes, METRICS.state()
+
+
+def run_batch(func, items, workers=1, chunksize=None):
+    """
+    Apply func to every item, isolating failures per item.
+
+    With workers > 1 the items are split into contiguous chunks and fanned
+    out to a process pool; each worker handles a whole chunk per task to keep
+    scheduling overhead low. Outcomes are always returned in item order, so
+    the summary does not depend on the worker count. func must be picklable
+    (a module-level function or a bound method of a picklable object).
+    Metrics that func records in a worker (see metrics.METRICS) are merged
+    into this process's registry.
+
+    :param func: Callable taking one item.
+    :param items: Iterable of items, e.g. file paths or symbols.
+    :param workers: Number of processes; None uses every CPU, 1 runs in-process.
+    :param chunksize: Items per task; defaults to about four tasks per worker.
+    :return: BatchSummary.
+    """
+    items = list(items)
+    workers = (os.cpu_count() or 1) if workers is None else max(1, int(workers))
+    start = time.perf_counter()
+
+    if workers == 1 or len(items) <= 1:
+        outcomes = _run_chunk(func, items)
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(items) // (workers * 4))
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        outcomes = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_outcomes, metrics in executor.map(_run_chunk_in_worker, [func] * len(chunks), chunks):
+                outcomes.extend(chunk_outcomes)
+                METRICS.merge(metrics)
+
+    return BatchSummary(items, outcomes, time.perf_counter() - start, workers)
@@ -0,0 +1,145 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+
+class BhavcopyCache:
+    def __init__(self, cache_dir, compress=True, settle_days=3):
+        """
+        Content-addressed on-disk cache of raw daily bhavcopy files.
+
+        Layout under cache_dir:
+            manifest.json                    date -> status, sha256, size, checked_at
+            objects/<sha[:2]>/<sha>.csv[.gz] raw file bytes, named by their SHA-256
+
+        Historical bhavcopies never change, so a cached 200 is served forever.
+        Non-200 statuses (404 on holidays) are recorded too; they are treated as
+        final only when they were observed at least settle_days after the date,
+        since the current day's file is published late and may 404 for a while.
+
+        :param cache_dir: Directory holding the manifest and objects.
+        :param compress: Store objects gzip-compressed.
+        :param settle_days: Days after which a missing file is assumed to stay missing.
+        """
+        self.cache_dir = cache_dir
+        self.compress = compress
+        self.settle_days = settle_days
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _object_path(self, sha256, compressed):
+        suffix = '.csv.gz' if compressed else '.csv'
+        return os.path.join(self.cache_dir, 'objects', sha256[:2], sha256 + suffix)
+
+    def lookup(self, date_str):
+        """
+        Return the manifest entry for a date, or None if it was never fetched.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        """
+        return self._manifest.get(date_str)
+
+    def get(self, date_str):
+        """
+        Return the cached raw bytes for a date, or None on a cache miss.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        """
+        entry = self.lookup(date_str)
+        if not entry or entry.get('status') != 200:
+            return None
+        path = self._object_path(entry['sha256'], entry.get('compressed', False))
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        return gzip.decompress(data) if entry.get('compressed', False) else data
+
+    def open(self, date_str):
+        """
+        Open the cached file for a date as a binary stream, or return None on a cache miss.
+
+        Compressed objects are decompressed while they are read, so the whole
+        file never has to sit in memory.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        """
+        entry = self.lookup(date_str)
+        if not entry or entry.get('status') != 200:
+            return None
+        path = self._object_path(entry['sha256'], entry.get('compressed', False))
+        if not os.path.exists(path):
+            return None
+        return gzip.open(path, 'rb') if entry.get('compressed', False) else open(path, 'rb')
+
+    def put(self, date_str, content):
+        """
+        Store the raw bytes downloaded for a date.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        :param content: Raw file bytes.
+        :return: SHA-256 hex digest of the content.
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._object_path(sha256, self.compress)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(content) if self.compress else content)
+            os.replace(tmp_path, path)
+
+        self._update(date_str, {
+            'status': 200,
+            'sha256': sha256,
+            'size': len(content),
+            'compressed': self.compress,
+        })
+        return sha256
+
+    def record_status(self, date_str, status_code):
+        """
+        Record a non-200 response so the date can be skipped on later runs.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        :param status_code: HTTP status code returned by the archive.
+        """
+        self._update(date_str, {'status': status_code})
+
+    def _update(self, date_str, entry):
+        entry['checked_at'] = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+        with self._lock:
+            self._manifest[date_str] = entry
+            self._save_manifest()
+
+    def is_known_missing(self, date_str):
+        """
+        Check whether a date is known to have no bhavcopy (holiday, 404).
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        :return: True if a non-200 status was recorded after the date settled.
+        """
+        entry = self.lookup(date_str)
+        if not entry or entry.get('status') == 200:
+            return False
+        checked_at = datetime.strptime(entry['checked_at'], '%Y-%m-%dT%H:%M:%S')
+        settled_at = datetime.strptime(date_str, '%d%m%Y') + timedelta(days=self.settle_days)
+        return checked_at >= settled_at
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Raw bhavcopy column -> store column, for the columns the pipeline keeps.
+BHAV_COLUMNS = {
+    'SYMBOL': 'Symbol',
+    'SERIES': 'Series',
+    'DATE1': 'Date',
+    'OPEN_PRICE': 'Open',
+    'HIGH_PRICE': 'High',
+    'LOW_PRICE': 'Low',
+    'CLOSE_PRICE': 'Close',
+    'TTL_TRD_QNTY': 'Volume',
+}
+
+# Explicit parser dtypes. SERIES and DATE1 take a handful of distinct values
+# per file, so as categories they are stripped and parsed once per value
+# instead of once per row.
+BHAV_DTYPES = {
+    'SYMBOL': object,
+    'SERIES': 'category',
+    'DATE1': 'category',
+    'OPEN_PRICE': 'float64',
+    'HIGH_PRICE': 'float64',
+    'LOW_PRICE': 'float64',
+    'CLOSE_PRICE': 'float64',
+    'TTL_TRD_QNTY': 'int64',
+}
+
+BHAV_DATE_FORMAT = '%d-%b-%Y'
+
+
+def read_bhavcopy(source, series='EQ'):
+    """
+    Parse a sec_bhavdata_full file into the store's batch layout.
+
+    The bytes are handed to the C parser as they are: no decode to str, no
+    StringIO copy. Only the eight kept columns are materialised, with fixed
+    dtypes, and the padding after each comma is skipped by the parser
+    instead of stripping every object column afterwards.
+
+    :param source: Path, or binary file object (BytesIO, gzip file, HTTP response stream).
+    :param series: Series to keep; None keeps all.
+    :return: DataFrame with Symbol, Series, Date (datetime64), Open, High, Low, Close, Volume.
+    """
+    df = pd.read_csv(source, usecols=list(BHAV_COLUMNS), dtype=BHAV_DTYPES,
+                     skipinitialspace=True, engine='c')
+
+    series_codes = df['SERIES'].cat.codes.to_numpy()
+    series_values = df['SERIES'].cat.categories.str.strip()
+    if series is not None:
+        keep = np.flatnonzero(series_values == series)
+        rows = np.isin(series_codes, keep)
+        df = df[rows]
+        series_codes = series_codes[rows]
+
+    dates = pd.to_datetime(df['DATE1'].cat.categories.str.strip(), format=BHAV_DATE_FORMAT)
+    date_codes = df['DATE1'].cat.codes.to_numpy()
+
+    return pd.DataFrame({
+        'Symbol': df['SYMBOL'].str.strip().to_numpy(),
+        'Series': np.asarray(series_values, dtype=object)[series_codes],
+        'Date': dates.to_numpy()[date_codes],
+        'Open': df['OPEN_PRICE'].to_numpy(),
+        'High': df['HIGH_PRICE'].to_numpy(),
+        'Low': df['LOW_PRICE'].to_numpy(),
+        'Close': df['CLOSE_PRICE'].to_numpy(),
+        'Volume': df['TTL_TRD_QNTY'].to_numpy(),
+    }, columns=list(BHAV_COLUMNS.values()))
@@ -0,0 +1,203 @@
+import io
+import json
+import hashlib
+import logging
+import matplotlib
+import numpy as np
+from functools import partial
+
+# Charts are only ever written to files; never start a GUI backend, even when
+# a display is available.
+matplotlib.use('Agg', force=True)
+
+import mplfinance as mpf
+from matplotlib.patches import Ellipse
+from .batch_runner import run_batch
+from .image_sink import DirectorySink
+from .metrics import METRICS
+
+PATTERN_COLORS = {
+    'Engulfing': 'blue',
+    'Hammer': 'lightgreen',
+    'InvertedHammer': 'lightcoral',
+    'ShootingStar': 'darkred',
+    'Doji': 'green',
+    'DragonflyDoji': 'cyan',
+    'GravestoneDoji': 'orange',
+    'PiercingLine': 'lime',
+    'DarkCloudCover': 'darkorange',
+    'SpinningTop': 'red',
+    'Marubozu': 'purple',
+    'AbandonedBaby': 'pink',
+    'CounterAttack': 'brown',
+    'HangingMan': 'gray',
+}
+
+
+# Identifies how draw() lays out a chart. Change it whenever draw() or the
+# default style changes, so charts cached under the old look are redrawn.
+CHART_STYLE = 'snapshot-1'
+
+
+class ChartJob:
+    def __init__(self, ohlc, patterns, name, marks=None):
+        """
+        One pattern snapshot to render.
+
+        :param ohlc: DataFrame with a DatetimeIndex and Open/High/Low/Close columns;
+                     the last row is the candle the patterns fired on.
+        :param patterns: Pattern names detected on the last candle.
+        :param name: Image name within the sink, e.g. 'RELIANCE_2024-01-05_Doji.png'.
+        :param marks: For a chart covering several hits, (row position, pattern names)
+                      of every candle to annotate; defaults to the last candle and patterns.
+        """
+        self.ohlc = ohlc
+        self.patterns = patterns
+        self.name = name
+        self.marks = marks if marks is not None else [(len(ohlc) - 1, list(patterns))]
+
+    def content_key(self, style=CHART_STYLE):
+        """
+        Hash of everything the image depends on: name (which carries the
+        symbol), candle dates and prices, annotated candles and style.
+        Equal keys mean byte-identical charts (see render_cache.RenderCache).
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{style}\0{self.name}\0".encode('utf-8'))
+        digest.update(np.asarray(self.ohlc.index, dtype='datetime64[ns]').tobytes())
+        digest.update(np.ascontiguousarray(self.ohlc[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)).tobytes())
+        digest.update(json.dumps([[int(position), list(patterns)] for position, patterns in self.marks]).encode('utf-8'))
+        return digest.hexdigest()
+
+
+class PatternChartRenderer:
+    def __init__(self, style=None, figsize=(8, 5.75)):
+        """
+        Renders pattern snapshots onto a single reused figure.
+
+        Creating an mplfinance figure per chart is a large part of the cost
+        of a render, so the figure and axes are created once and cleared
+        between charts instead.
+
+        :param style: mplfinance style; defaults to green/red candles.
+        :param figsize: Figure size in inches.
+        """
+        if style is None:
+            market_colors = mpf.make_marketcolors(up='green', down='red', wick='inherit', edge='inherit')
+            style = mpf.make_mpf_style(marketcolors=market_colors)
+        self.fig = mpf.figure(style=style, figsize=figsize)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+
+    def draw(self, job):
+        ax = self.ax
+        ax.clear()
+
+        mpf.plot(job.ohlc, type='candle', ax=ax)
+        if len(job.marks) == 1:
+            pattern_date = job.ohlc.index[job.marks[0][0]]
+            ax.set_title(f"Patterns: {', '.join(job.marks[0][1])} on {pattern_date.date()}")
+        else:
+            first, last = job.ohlc.index[job.marks[0][0]], job.ohlc.index[job.marks[-1][0]]
+            ax.set_title(f"Patterns on {len(job.marks)} candles, {first.date()} to {last.date()}")
+
+        for curr_x, patterns in job.marks:
+            curr_candle = job.ohlc.iloc[curr_x]
+            curr_high = curr_candle['High']
+            curr_low = curr_candle['Low']
+            y_center = (curr_high + curr_low) / 2
+
+            for i, pattern in enumerate(patterns):
+                adjusted_y = y_center + i * 0.3 * (curr_high - curr_low)
+                color = PATTERN_COLORS.get(pattern, 'black')
+
+                oval = Ellipse((curr_x, adjusted_y), width=0.5, height=(curr_high - curr_low) * 0.5,
+                               color=color, fill=False, lw=2)
+                ax.add_patch(oval)
+
+                ax.annotate(pattern, xy=(curr_x, adjusted_y),
+                            xytext=(curr_x + 0.9, adjusted_y + 0.3 * (curr_high - curr_low)),
+                            arrowprops=dict(arrowstyle='->', color='black'),
+                            fontsize=10, color='black', ha='left', va='center')
+
+        # Price box and markers for the last annotated candle.
+        curr_x = job.marks[-1][0]
+        curr_candle = job.ohlc.iloc[curr_x]
+        curr_high = curr_candle['High']
+
+        textstr = f'Open: {curr_candle["Open"]:.2f}\nLow: {curr_candle["Low"]:.2f}\nClose: {curr_candle["Close"]:.2f}'
+        props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
+        ax.text(curr_x + 0.1, curr_high + 2, textstr, fontsize=10,
+                verticalalignment='top', bbox=props, ha='right', va='bottom')
+
+        ax.plot(curr_x, curr_candle['Open'], 'go', markersize=6)
+        ax.plot(curr_x, curr_candle['Low'], 'bo', markersize=6)
+        ax.plot(curr_x, curr_candle['Close'], 'ro', markersize=6)
+
+    def render(self, job, sink):
+        """
+        Draw one job straight into an ImageSink; returns the image location.
+        """
+        self.draw(job)
+        return sink.save_figure(self.fig, job.name)
+
+    def render_png(self, job):
+        """
+        Draw one job and return the PNG bytes (for sinks owned by another process).
+        """
+        self.draw(job)
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format='png')
+        return buf.getvalue()
+
+
+# One renderer per process, created on first use so pool workers reuse it across chunks.
+_renderer = None
+
+
+def _get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = PatternChartRenderer()
+    return _renderer
+
+
+@METRICS.timed('render')
+def render_job(job, sink):
+    return _get_renderer().render(job, sink)
+
+
+@METRICS.timed('render')
+def render_job_png(job):
+    return _get_renderer().render_png(job)
+
+
+def render_charts(jobs, sink=None, workers=1, chunksize=None):
+    """
+    Render many chart jobs, fanning them out to a process pool.
+
+    Workers write directly to shareable sinks (a directory). For other sinks
+    (tar shards, memory) workers return the PNG bytes and this process
+    writes them, so each image is still encoded exactly once.
+
+    :param jobs: List of ChartJob.
+    :param sink: ImageSink receiving the images; a path is taken as a DirectorySink.
+    :param workers: Worker processes; None uses every CPU.
+    :param chunksize: Jobs per task handed to a worker.
+    :return: BatchSummary whose results are image locations, with the
+             charts/sec throughput as charts_per_sec.
+    """
+    if sink is None or isinstance(sink, str):
+        sink = DirectorySink(sink or '.')
+
+    with METRICS.stage('render'):
+        if sink.shareable or workers == 1:
+            summary = run_batch(partial(render_job, sink=sink), jobs, workers, chunksize)
+        else:
+            summary = run_batch(render_job_png, jobs, workers, chunksize)
+            summary.outcomes = [(True, sink.write_bytes(job.name, result)) if ok else (ok, result)
+                                for job, (ok, result) in zip(jobs, summary.outcomes)]
+    rendered = len(summary.results)
+    METRICS.incr('charts_written', rendered)
+    summary.charts_per_sec = rendered / summary.elapsed if summary.elapsed > 0 else 0.0
+    logging.info(f"🖼️ Rendered {rendered} charts at {summary.charts_per_sec:.1f} charts/sec")
+    return summary
@@ -0,0 +1,382 @@
+"""
+Command line entry point: `stock-patterns <command>` or `python -m stock_patterns <command>`.
+
+    download  fetch daily bhavcopies into per-symbol CSVs or a NumpySymbolStore,
+              committing each session once (resumable, shardable by date)
+    detect    write per-symbol pattern CSVs (optionally incremental, indexed,
+              on daily, weekly or monthly bars, adjusted for corporate actions)
+    render    draw a snapshot chart for every detected pattern
+    scan      list the patterns printed on one session across the universe
+    stream    ingest and detect a full-history universe under a memory cap
+    live      alert on patterns as intraday candles close, from a socket or a replay file
+
+Each command imports only the modules it needs, so e.g. `detect` never loads
+matplotlib and `scan` never loads requests.
+
+Any command can write its counters, per-item latencies and stage timings
+with --metrics run.json (or run.prom for Prometheus text), and profile its
+stages with --profile cprofile|pyinstrument.
+"""
+import os
+import sys
+import logging
+import argparse
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(log_file=None, level='INFO'):
+    """Send log records to log_file (or stderr); called by the CLI, never at import time."""
+    logging.basicConfig(filename=log_file, level=getattr(logging, level.upper()), format=LOG_FORMAT)
+
+
+def _workers(value):
+    # 0 means one worker per CPU (run_batch's workers=None).
+    return None if value == 0 else value
+
+
+def _calendar(holidays):
+    from .trading_calendar import TradingCalendar
+    return TradingCalendar.from_file(holidays) if holidays else TradingCalendar()
+
+
+def _store(path, **kwargs):
+    from .symbol_store import NumpySymbolStore
+    return NumpySymbolStore(path, **kwargs)
+
+
+def _ledger(args, target):
+    # Sessions committed by earlier runs; kept next to (or in) the data they describe.
+    if args.no_ledger:
+        return None
+    from .ingest_ledger import IngestLedger
+    return IngestLedger(args.ledger or target)
+
+
+def _adjusted(args, store):
+    # Split/bonus/dividend-adjusted view of the raw store; the factor cache lives in the store.
+    from .corporate_actions import AdjustedStore
+    return AdjustedStore(store, args.actions, args.adjust_cache or os.path.join(args.store, 'adjustments.json'))
+
+
+def _timeframe_store(args):
+    # Daily bars straight from the store (adjusted with --actions), or their
+    # cached weekly/monthly resample. Derived outputs compare the store's
+    # fingerprints with their own to pick up new adjustment factors.
+    store = _store(args.store)
+    if args.actions:
+        store = _adjusted(args, store)
+        # Once here, before the store is handed to worker processes.
+        store.refresh()
+    if args.timeframe == 'D':
+        return store
+    from .resampler import ResampledStore
+    default = os.path.join(args.store, 'resampled', args.timeframe + ('-adjusted' if args.actions else ''))
+    return ResampledStore(store, args.timeframe, args.resample_dir or default)
+
+
+def cmd_download(args):
+    from .data_scraper import StockDataDownloader
+
+    if not args.output_dir and not args.store:
+        raise SystemExit("download: give --output-dir (per-symbol CSVs) or --store (NumpySymbolStore)")
+    store = None
+    if args.store:
+        store = _store(args.store, compact_every=None) if args.stage_only else _store(args.store)
+    if args.store:
+        ledger_dir, quarantine_dir = os.path.join(args.store, 'ledger'), os.path.join(args.store, 'quarantine')
+    else:
+        ledger_dir, quarantine_dir = (os.path.normpath(args.output_dir) + suffix for suffix in ('.ledger', '.quarantine'))
+    downloader = StockDataDownloader(
+        args.start, args.end, download_dir=args.cache_dir, max_workers=args.workers,
+        use_cache=args.cache_dir is not None, store=store,
+        calendar=_calendar(args.holidays), ledger=_ledger(args, ledger_dir),
+        validator=_validator(args, quarantine_dir, store))
+    downloader.process_dates(args.output_dir, flush=not args.stage_only)
+    _print_quality_report(args)
+    return 0
+
+
+def cmd_detect(args):
+    from .pattern_recognizer import CandlePatternRecognizer
+
+    index = None
+    if args.index:
+        from .pattern_index import PatternIndex
+        index = PatternIndex(args.index)
+    if args.timeframe != 'D' and not args.store:
+        raise SystemExit("detect: --timeframe W/M resamples a store; give --store")
+    if args.actions and not args.store:
+        raise SystemExit("detect: --actions adjusts the bars of a store; give --store")
+    recognizer = CandlePatternRecognizer(
+        args.input, args.output, store=_timeframe_store(args) if args.store else None,
+        incremental=args.incremental, pattern_format=args.format, engine=args.engine,
+        calendar=_calendar(args.holidays) if args.holidays or args.validate else None, index=index,
+        validate=args.validate)
+    summary = recognizer.process_all_files(workers=_workers(args.workers))
+    print(summary.report())
+    _print_quality_report(args)
+    return 1 if summary.failures else 0
+
+
+def cmd_render(args):
+    from .pattern_drawer import annotate_patterns_in_charts
+    from .image_sink import DirectorySink, TarShardSink
+
+    sink = TarShardSink(args.images) if args.sink == 'tar' else DirectorySink(args.images)
+    summary = annotate_patterns_in_charts(args.input, image_save_directory=args.images,
+                                          output_csv=args.manifest or os.path.join(args.images, 'pattern_images.csv'),
+                                          workers=_workers(args.workers), sink=sink,
+                                          embed_base64=args.embed_base64, cache=not args.no_cache,
+                                          max_chart_bars=args.max_chart_bars or None)
+    print(f"Reused {summary.cached} cached charts, skipped {summary.resumed} charts already in the manifest")
+    print(summary.report())
+    return 1 if summary.failures else 0
+
+
+def cmd_scan(args):
+    from .pattern_scanner import PatternScanner
+
+    as_of = args.as_of
+    if as_of and args.timeframe != 'D':
+        import pandas as pd
+        from .resampler import period_starts
+        # Resampled bars are dated by the start of their period.
+        as_of = period_starts([pd.Timestamp(as_of).to_datetime64()], args.timeframe)[0]
+    scanner = PatternScanner(_timeframe_store(args), engine=args.engine)
+    hits = scanner.scan(as_of=as_of, symbols=args.symbols)
+    as_of = hits.attrs['as_of']
+    print(f"{len(hits)} hits across {hits.attrs['symbols_scanned']} symbols"
+          f"{f' on {as_of:%Y-%m-%d}' if as_of is not None else ''} in {hits.attrs['elapsed']:.3f}s")
+    if args.output:
+        hits.to_csv(args.output, index=False)
+    else:
+        print(hits.to_string(index=False))
+    return 0
+
+
+def cmd_stream(args):
+    from .streaming import StreamingPipeline, compact_chunk_rows
+    from .symbol_store import NumpySymbolStore
+
+    store = NumpySymbolStore(args.store, compact_chunk_rows=compact_chunk_rows(args.memory_limit * 2 ** 20))
+    # Ingest checks the raw bars; detection reads them adjusted, with factors refreshed after the ingest.
+    pipeline = StreamingPipeline(_adjusted(args, store) if args.actions else store,
+                                 memory_limit_mb=args.memory_limit, engine=args.engine, track_peak=args.track_peak)
+    if args.download:
+        from .data_scraper import StockDataDownloader
+        downloader = StockDataDownloader(
+            *args.download, download_dir=args.cache_dir, max_workers=args.workers,
+            use_cache=args.cache_dir is not None, calendar=_calendar(args.holidays),
+            ledger=_ledger(args, os.path.join(args.store, 'ledger')),
+            validator=_validator(args, os.path.join(args.store, 'quarantine'), store))
+        for _ in pipeline.ingest(downloader):
+            pass
+        _print_quality_report(args)
+
+    if args.index:
+        from .pattern_index import PatternIndex
+        hits = pipeline.index_patterns(PatternIndex(args.index), args.symbols, args.start, args.end)
+    else:
+        hits = 0
+        for _, chunk in pipeline.iter_patterns(args.symbols, args.start, args.end):
+            if args.output:
+                chunk.to_csv(args.output, mode='a' if hits else 'w', header=not hits, index=False)
+            hits += len(chunk)
+    print(f"{hits} hits")
+    print(pipeline.report())
+    if args.stats:
+        import json
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump([stats.as_dict() for stats in pipeline.stages], f, indent=1)
+    return 0
+
+
+def _add_timeframe_arguments(parser):
+    parser.add_argument('--timeframe', default='D', choices=['D', 'W', 'M'],
+                        help="bar timeframe: daily, or weekly/monthly resampled from --store")
+    parser.add_argument('--resample-dir', help="weekly/monthly bar cache "
+                                               "(default: <store>/resampled/<timeframe>, -adjusted with --actions)")
+
+
+def _add_adjust_arguments(parser):
+    parser.add_argument('--actions', help="corporate actions CSV (see corporate_actions.py): "
+                                          "read split-, bonus- and dividend-adjusted bars")
+    parser.add_argument('--adjust-cache', help="adjustment factor cache (default: <store>/adjustments.json)")
+
+
+def _validator(args, target, store=None):
+    # Checks every ingested batch; quarantined rows go next to (or in) the data.
+    if not args.validate:
+        return None
+    from .data_quality import DataValidator
+    validator = DataValidator(_calendar(args.holidays), quarantine_dir=args.quarantine_dir or target)
+    if store is not None:
+        validator.seed(store)
+    return validator
+
+
+def _add_validate_arguments(parser, default):
+    parser.add_argument('--validate', action='store_true',
+                        help="check every batch; impossible prices and repeated dates are quarantined")
+    parser.add_argument('--quarantine-dir', help=f"directory for the quarantined rows (default: {default})")
+
+
+def _print_quality_report(args):
+    if args.validate:
+        from .data_quality import quality_report
+        print(quality_report())
+
+
+def _add_ledger_arguments(parser, default):
+    parser.add_argument('--ledger', help=f"ledger of committed sessions, skipped on reruns (default: {default})")
+    parser.add_argument('--no-ledger', action='store_true', help="ingest every session, recording none")
+
+
+def cmd_live(args):
+    from .intraday import IntradayDetector, replay_file, socket_feed
+
+    if args.connect:
+        host, _, port = args.connect.rpartition(':')
+        feed = socket_feed(host or 'localhost', int(port), heartbeat=args.heartbeat)
+    else:
+        feed = replay_file(args.replay)
+    written = 0
+
+    def on_alert(alerts):
+        nonlocal written
+        logging.info(f"🔔 {len(alerts)} alerts on {alerts.attrs['symbols']} bars closed at "
+                     f"{alerts.attrs['bar_start']} in {alerts.attrs['latency'] * 1000:.1f} ms")
+        if args.output:
+            alerts.to_csv(args.output, mode='a' if written else 'w', header=not written, index=False)
+        elif len(alerts):
+            print(alerts.to_string(index=False), flush=True)
+        written += len(alerts)
+
+    detector = IntradayDetector(args.interval, engine=args.engine)
+    closes = detector.run(feed, on_alert)
+    print(f"{written} alerts over {closes} closed intervals")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='stock-patterns', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--log-file', help="write log records to this file instead of stderr")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--metrics', help="write run metrics to this file (.prom/.txt: Prometheus text, else JSON)")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help="profile every pipeline stage")
+    parser.add_argument('--profile-dir', default='profiles', help="directory for the --profile output")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', help="fetch daily bhavcopies")
+    download.add_argument('--start', required=True, help="first date, DDMMYYYY")
+    download.add_argument('--end', required=True, help="end date (exclusive), DDMMYYYY")
+    download.add_argument('--output-dir', help="directory for per-symbol CSVs")
+    download.add_argument('--store', help="NumpySymbolStore directory, instead of per-symbol CSVs")
+    download.add_argument('--cache-dir', help="raw bhavcopy cache directory (no cache when omitted)")
+    download.add_argument('--holidays', help="exchange holiday file (see TradingCalendar.from_file)")
+    download.add_argument('--workers', type=int, default=8, help="concurrent downloads")
+    _add_ledger_arguments(download, "<store>/ledger, or <output-dir>.ledger")
+    _add_validate_arguments(download, "<store>/quarantine, or <output-dir>.quarantine")
+    download.add_argument('--stage-only', action='store_true',
+                          help="commit the sessions without merging them into the store, for date shards "
+                               "run in parallel; a later run over the whole range without it merges them")
+    download.set_defaults(func=cmd_download)
+
+    detect = commands.add_parser('detect', help="detect candlestick patterns")
+    source = detect.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="directory of per-symbol CSVs")
+    source.add_argument('--store', help="NumpySymbolStore directory")
+    detect.add_argument('--output', required=True, help="directory for the per-symbol pattern CSVs")
+    detect.add_argument('--incremental', action='store_true', help="only append bars after each output's last date")
+    detect.add_argument('--format', default='json', choices=['json', 'mask', 'both'], help="pattern columns to write")
+    detect.add_argument('--engine', default='auto', choices=['auto', 'numpy', 'talib'])
+    detect.add_argument('--holidays', help="exchange holiday file, used to size incremental reads")
+    detect.add_argument('--index', help="PatternIndex directory to add the hits to")
+    detect.add_argument('--validate', action='store_true',
+                        help="leave bars with impossible prices or repeated dates out of detection")
+    _add_timeframe_arguments(detect)
+    _add_adjust_arguments(detect)
+    detect.add_argument('--workers', type=int, default=1, help="worker processes; 0 uses every CPU")
+    detect.set_defaults(func=cmd_detect)
+
+    render = commands.add_parser('render', help="draw a chart for every detected pattern")
+    render.add_argument('--input', required=True, help="directory of pattern CSVs written by detect")
+    render.add_argument('--images', required=True, help="directory for the images or tar shards")
+    render.add_argument('--sink', default='dir', choices=['dir', 'tar'], help="one PNG per chart, or tar shards")
+    render.add_argument('--embed-base64', action='store_true', help="also fill a Pattern_Image_Base64 column")
+    render.add_argument('--max-chart-bars', type=int, default=60,
+                        help="most candles in one chart covering overlapping hits; 0 draws one chart per hit")
+    render.add_argument('--no-cache', action='store_true', help="redraw charts already in the render cache")
+    render.add_argument('--manifest', help="hit -> image manifest CSV, also used to resume an interrupted run "
+                                           "(default: <images>/pattern_images.csv)")
+    render.add_argument('--workers', type=int, default=1, help="worker processes; 0 uses every CPU")
+    render.set_defaults(func=cmd_render)
+
+    scan = commands.add_parser('scan', help="patterns on one session across the universe")
+    scan.add_argument('--store', required=True, help="NumpySymbolStore directory")
+    scan.add_argument('--as-of', help="session date (default: latest in the store)")
+    scan.add_argument('--symbols', nargs='+', help="restrict to these symbols")
+    scan.add_argument('--engine', default='numpy', choices=['auto', 'numpy', 'talib'])
+    scan.add_argument('--output', help="write the hits to this CSV instead of printing them")
+    _add_timeframe_arguments(scan)
+    _add_adjust_arguments(scan)
+    scan.set_defaults(func=cmd_scan)
+
+    stream = commands.add_parser('stream', help="memory-bounded full-history ingest and detection")
+    stream.add_argument('--store', required=True, help="NumpySymbolStore directory")
+    stream.add_argument('--memory-limit', type=int, default=512, help="working-memory budget in MiB")
+    stream.add_argument('--download', nargs=2, metavar=('START', 'END'),
+                        help="first ingest the sessions in [START, END), DDMMYYYY")
+    stream.add_argument('--cache-dir', help="raw bhavcopy cache directory for --download")
+    stream.add_argument('--holidays', help="exchange holiday file for --download")
+    stream.add_argument('--workers', type=int, default=8, help="concurrent downloads")
+    _add_ledger_arguments(stream, "<store>/ledger")
+    _add_validate_arguments(stream, "<store>/quarantine")
+    stream.add_argument('--engine', default='numpy', choices=['auto', 'numpy', 'talib'])
+    _add_adjust_arguments(stream)
+    stream.add_argument('--symbols', nargs='+', help="restrict detection to these symbols")
+    stream.add_argument('--start', help="first hit date to keep (bars before it are still scored as history)")
+    stream.add_argument('--end', help="last bar date to score")
+    target = stream.add_mutually_exclusive_group()
+    target.add_argument('--index', help="PatternIndex directory receiving the hits")
+    target.add_argument('--output', help="CSV receiving the hits (Symbol, Date, PatternMask, BearishMask)")
+    stream.add_argument('--stats', help="write the per-stage time and peak RSS as JSON to this file")
+    stream.add_argument('--track-peak', action='store_true',
+                        help="reset the peak RSS at every stage (Linux) so each stage reports its own peak")
+    stream.set_defaults(func=cmd_stream)
+
+    live = commands.add_parser('live', help="intraday bar-close pattern alerts")
+    feed = live.add_mutually_exclusive_group(required=True)
+    feed.add_argument('--connect', metavar='HOST:PORT', help="read CSV feed lines from a TCP socket")
+    feed.add_argument('--replay', help="replay a recorded feed file")
+    live.add_argument('--interval', default='5min', help="candle length, e.g. 5min or 15min")
+    live.add_argument('--engine', default='numpy', choices=['auto', 'numpy', 'talib'])
+    live.add_argument('--heartbeat', type=float, default=1.0, help="seconds of socket silence before checking the clock")
+    live.add_argument('--output', help="append the alerts to this CSV instead of printing them")
+    live.set_defaults(func=cmd_live)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_file, args.log_level)
+    if not (args.metrics or args.profile):
+        return args.func(args)
+
+    from .metrics import METRICS
+    if args.profile:
+        try:
+            METRICS.set_profiler(args.profile, args.profile_dir)
+        except ImportError:
+            raise SystemExit(f"--profile {args.profile}: install the {args.profile} package first")
+    try:
+        return args.func(args)
+    finally:
+        logging.info(f"📊 Run metrics:\n{METRICS.report()}")
+        if args.metrics:
+            METRICS.write(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""
+Split, bonus and dividend adjustment of stored bars.
+
+The store keeps the prices exactly as the exchange printed them, so a 1:5
+split shows up as an 80% overnight gap that the candle detectors and the
+forward returns of the backtester take at face value. AdjustmentFactors
+turns a local table of corporate actions into cumulative factors per symbol
+and caches them; AdjustedStore wraps a SymbolStore and multiplies the
+factors into the bars as they are read, so no history is ever rewritten.
+When the table changes, only the symbols whose actions changed get their
+factors recomputed.
+
+Actions table (CSV), one row per action:
+
+    Symbol,ExDate,Action,Ratio,Amount
+    INFY,2018-09-04,bonus,1,
+    TCS,2018-05-31,bonus,1,
+    IDEA,2016-06-15,split,5,
+    ITC,2023-05-30,dividend,,6.75
+
+ExDate is YYYY-MM-DD; bars dated before it are adjusted. Ratio is the new
+shares per old share of a split (face value 10 -> 2 is 5) or the bonus
+shares per share held (1:2 is 0.5); Amount is the dividend per share.
+"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+from .symbol_store import COLUMN_DTYPES, SymbolStore
+
+ACTIONS = ('split', 'bonus', 'dividend')
+
+ACTION_COLUMNS = ['Symbol', 'ExDate', 'Action', 'Ratio', 'Amount']
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+# Day numbers are shifted into 32 bits so (symbol code, day) packs into one int64 key.
+_DAY_OFFSET = 1 << 31
+_NS_PER_DAY = 86_400_000_000_000
+
+
+def read_actions(path):
+    """
+    Load and check an actions table (see the module docstring).
+
+    :return: DataFrame with the ACTION_COLUMNS, ExDate as datetime64, sorted by (Symbol, ExDate).
+    """
+    df = pd.read_csv(path, dtype={'Symbol': str, 'Action': str})
+    missing = set(ACTION_COLUMNS) - set(df.columns) - {'Ratio', 'Amount'}
+    if missing:
+        raise ValueError(f"{path}: missing columns {sorted(missing)}")
+    for column in ('Ratio', 'Amount'):
+        df[column] = pd.to_numeric(df[column], errors='coerce') if column in df else np.nan
+    df['Symbol'] = df['Symbol'].str.strip().str.upper()
+    df['Action'] = df['Action'].str.strip().str.lower()
+    df['ExDate'] = pd.to_datetime(df['ExDate'], format='%Y-%m-%d')
+    unknown = ~df['Action'].isin(ACTIONS)
+    if unknown.any():
+        raise ValueError(f"{path}: unknown actions {sorted(df.loc[unknown, 'Action'].unique())}, expected {ACTIONS}")
+    value = np.where(df['Action'] == 'dividend', df['Amount'], df['Ratio'])
+    if not (value > 0).all():
+        raise ValueError(f"{path}: every split/bonus needs a positive Ratio and every dividend a positive Amount")
+    return df[ACTION_COLUMNS].sort_values(['Symbol', 'ExDate'], kind='stable').reset_index(drop=True)
+
+
+def _fingerprints(actions):
+    """Hash of each symbol's action rows, as a Series indexed by Symbol."""
+    rows = (actions['ExDate'].dt.strftime('%Y-%m-%d') + ',' + actions['Action'] + ','
+            + actions['Ratio'].astype(str) + ',' + actions['Amount'].astype(str))
+    joined = rows.groupby(actions['Symbol'], sort=True).agg('|'.join)
+    return joined.map(lambda text: hashlib.sha1(text.encode('utf-8')).hexdigest())
+
+
+def symbol_factors(actions, bars=None):
+    """
+    Cumulative factors of one symbol's actions.
+
+    A split or bonus scales prices by the old share count over the new one
+    and volumes by its inverse; a dividend scales prices by
+    1 - Amount / the close before the ex-date. A bar dated before several
+    ex-dates gets the product of their factors.
+
+    :param actions: The symbol's rows of an actions table, sorted by ExDate.
+    :param bars: The symbol's raw bars (Date, Close); only read for dividends.
+    :return: (ex_dates, price, volume, complete): price[j] and volume[j] apply to
+             the bars from ex_dates[j - 1] up to the day before ex_dates[j];
+             complete is False when a dividend has no close before its ex-date yet.
+    """
+    ex_dates = actions['ExDate'].to_numpy(dtype='datetime64[ns]')
+    kind = actions['Action'].to_numpy()
+    ratio = actions['Ratio'].to_numpy(dtype=float)
+    shares = np.ones(len(actions))
+    shares[kind == 'split'] = 1 / ratio[kind == 'split']
+    shares[kind == 'bonus'] = 1 / (1 + ratio[kind == 'bonus'])
+    price = shares.copy()
+
+    complete = True
+    dividends = np.flatnonzero(kind == 'dividend')
+    if len(dividends):
+        dates = bars['Date'].to_numpy(dtype='datetime64[ns]') if bars is not None else np.array([], 'datetime64[ns]')
+        closes = bars['Close'].to_numpy(dtype=float) if bars is not None else np.array([])
+        before = np.searchsorted(dates, ex_dates[dividends], side='left') - 1
+        # Without a later bar the close before the ex-date may not be in the store yet.
+        complete = len(dates) > 0 and bool((ex_dates[dividends] <= dates[-1]).all())
+        amount = actions['Amount'].to_numpy(dtype=float)[dividends]
+        known = before >= 0
+        factor = np.ones(len(dividends))
+        factor[known] = 1 - amount[known] / closes[before[known]]
+        bad = ~(factor > 0)
+        if bad.any():
+            logging.warning(f"⚠️ {actions['Symbol'].iloc[0]}: dividend of {amount[bad][0]} "
+                            f"is not below the previous close; left unadjusted")
+            factor[bad] = 1.0
+        price[dividends] = factor
+
+    # Suffix products: a bar is adjusted by every action whose ex-date is after it.
+    price = np.cumprod(price[::-1])[::-1]
+    volume = np.cumprod(shares[::-1])[::-1]
+    return ex_dates, price, volume, complete
+
+
+class AdjustmentFactors:
+    def __init__(self, path):
+        """
+        Cached cumulative factors of the symbols that have corporate actions.
+
+        The cache maps each symbol to the fingerprint of its actions and its
+        factors (see symbol_factors). refresh() recomputes the symbols whose
+        actions were added, edited or removed since the cached fingerprint,
+        and symbols with a dividend whose previous close was not stored yet;
+        every other symbol keeps its cached factors untouched.
+
+        :param path: JSON cache file; created on the first refresh().
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self._index()
+
+    def _index(self):
+        # One sorted key array over all symbols: code << 32 | day, factors aligned with it.
+        self.symbols = pd.Index(sorted(self.entries), name='Symbol')
+        keys, price, volume = [], [], []
+        for code, symbol in enumerate(self.symbols):
+            entry = self.entries[symbol]
+            days = np.asarray(entry['ex_dates'], dtype='datetime64[D]').astype(np.int64) + _DAY_OFFSET
+            keys.append((code << 32) | days)
+            price.append(entry['price'])
+            volume.append(entry['volume'])
+        self._keys = np.concatenate(keys) if keys else np.array([], dtype=np.int64)
+        self._price = np.concatenate(price) if price else np.array([])
+        self._volume = np.concatenate(volume) if volume else np.array([])
+
+    def refresh(self, actions, store):
+        """
+        Bring the cache in line with an actions table.
+
+        :param actions: DataFrame from read_actions.
+        :param store: SymbolStore of raw bars, read for the symbols with dividends to recompute.
+        :return: Sorted list of the symbols whose factors changed.
+        """
+        changed, recomputed = [], 0
+        with METRICS.timer('adjust_refresh'):
+            keys = _fingerprints(actions)
+            for symbol in sorted(set(self.entries) - set(keys.index)):
+                del self.entries[symbol]
+                changed.append(symbol)
+            stale = [symbol for symbol, key in keys.items()
+                     if symbol not in self.entries or self.entries[symbol]['key'] != key]
+            # Only the stale symbols' rows are sliced out of the table.
+            stale_rows = actions[actions['Symbol'].isin(stale)]
+            for symbol, group in stale_rows.groupby('Symbol', sort=True):
+                key, entry = keys[symbol], self.entries.get(symbol)
+                recomputed += 1
+                bars = None
+                if (group['Action'] == 'dividend').any():
+                    try:
+                        bars = store.load_symbol(symbol)
+                    except (KeyError, FileNotFoundError):
+                        pass
+                ex_dates, price, volume, complete = symbol_factors(group, bars)
+                new = {
+                    # Incomplete entries keep no fingerprint, so the next refresh retries them.
+                    'key': key if complete else None,
+                    'ex_dates': [f"{date:%Y-%m-%d}" for date in pd.to_datetime(ex_dates)],
+                    'price': price.tolist(),
+                    'volume': volume.tolist(),
+                }
+                if entry is None or any(entry[name] != new[name] for name in ('ex_dates', 'price', 'volume')):
+                    changed.append(symbol)
+                self.entries[symbol] = new
+        METRICS.incr('adjust_symbols_recomputed', recomputed)
+        if recomputed or changed:
+            self._index()
+            self.save()
+            logging.info(f"🪙 Recomputed the adjustment factors of {recomputed} symbols, {len(changed)} changed "
+                         f"({len(self.entries)} with actions) in {self.path}")
+        return sorted(changed)
+
+    def fingerprint(self, symbol):
+        """
+        Version of a symbol's factors: the fingerprint of its actions, or of
+        its provisional factors while a dividend still waits for its close
+        (so outputs built on them are rebuilt once it arrives); '' without actions.
+        """
+        entry = self.entries.get(symbol)
+        if entry is None:
+            return ''
+        if entry['key'] is not None:
+            return entry['key']
+        factors = json.dumps([entry['ex_dates'], entry['price'], entry['volume']])
+        return 'pending:' + hashlib.sha1(factors.encode('utf-8')).hexdigest()
+
+    def save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _affected(self, symbols, dates):
+        """
+        Rows of the symbols with actions, with their (price, volume) factors.
+
+        :return: (rows, price, volume); price and volume have the shape of dates[rows].
+        """
+        codes = self.symbols.get_indexer(np.asarray(symbols))
+        rows = np.flatnonzero(codes >= 0)
+        dates = np.asarray(dates, dtype='datetime64[ns]')[rows]
+        code = codes[rows].astype(np.int64)
+        if dates.ndim > code.ndim:
+            # One symbol per panel row.
+            code = code[:, None]
+        days = dates.view(np.int64) // _NS_PER_DAY + _DAY_OFFSET
+        # First ex-date after the bar within the same symbol.
+        at = np.searchsorted(self._keys, (code << 32) | days, side='right')
+        hit = (at < len(self._keys)) & ~np.isnat(dates)
+        hit[hit] = (self._keys[at[hit]] >> 32) == np.broadcast_to(code, dates.shape)[hit]
+        price, volume = np.ones(dates.shape), np.ones(dates.shape)
+        price[hit] = self._price[at[hit]]
+        volume[hit] = self._volume[at[hit]]
+        return rows, price, volume
+
+    def _symbol_factors(self, symbol, dates):
+        # lookup() for the bars of one symbol: a search among its own ex-dates only.
+        code = np.int64(self.symbols.get_loc(symbol))
+        lo, hi = np.searchsorted(self._keys, [code << 32, (code + 1) << 32])
+        ex_days = (self._keys[lo:hi] & 0xFFFFFFFF) - _DAY_OFFSET
+        at = np.searchsorted(ex_days, np.asarray(dates, dtype='datetime64[ns]').view(np.int64) // _NS_PER_DAY,
+                             side='right')
+        # NaT sorts first, so it picks up the oldest factor; its prices are NaN anyway.
+        return np.append(self._price[lo:hi], 1.0)[at], np.append(self._volume[lo:hi], 1.0)[at]
+
+    def lookup(self, symbols, dates):
+        """
+        Price and volume factors of bars.
+
+        :param symbols: Symbol of each bar, or of each row of a 2-D dates array.
+        :param dates: datetime64 date of each bar, aligned with symbols; NaT gets factor 1.
+        :return: (price, volume) float arrays shaped like dates, 1.0 where nothing applies.
+        """
+        price, volume = np.ones(np.shape(dates)), np.ones(np.shape(dates))
+        if len(self._keys):
+            rows, affected_price, affected_volume = self._affected(symbols, dates)
+            price[rows], volume[rows] = affected_price, affected_volume
+        return price, volume
+
+    def apply(self, df, symbol=None):
+        """
+        Adjust a bars DataFrame (Symbol, Date, prices, Volume) in place and return it.
+
+        :param symbol: The symbol of every row, when df holds one symbol only.
+        """
+        if not len(df) or not len(self._keys):
+            return df
+        if symbol is not None:
+            # Most symbols never had an action: skip them on a dict lookup.
+            if symbol not in self.entries:
+                return df
+            price, volume = self._symbol_factors(symbol, df['Date'].to_numpy())
+        else:
+            price, volume = self.lookup(df['Symbol'].to_numpy(), df['Date'].to_numpy())
+        for column in PRICE_COLUMNS:
+            if column in df:
+                df[column] = df[column].to_numpy(dtype=float) * price
+        if 'Volume' in df:
+            df['Volume'] = np.rint(df['Volume'].to_numpy(dtype=float) / volume).astype(COLUMN_DTYPES['Volume'])
+        return df
+
+    def apply_panel(self, panel):
+        """Adjust the rows of a BarPanel's columns whose symbol has actions, in place, and return it."""
+        if not len(self._keys):
+            return panel
+        rows, price, volume = self._affected(panel.symbols, panel.dates)
+        for column, values in panel.columns.items():
+            if column in PRICE_COLUMNS:
+                values[rows] *= price
+            elif column == 'Volume':
+                values[rows] = np.rint(values[rows] / volume)
+        return panel
+
+
+class AdjustedStore(SymbolStore):
+    def __init__(self, raw, actions_path, cache_path, auto_refresh=True):
+        """
+        Split-, bonus- and dividend-adjusted view of a SymbolStore.
+
+        Reads go to raw and the factors are multiplied in on the way out:
+        prices by the price factor, volumes divided by the share factor.
+        Refresh (or let the first read refresh) before handing the store to
+        worker processes. Outputs derived from adjusted bars (incremental
+        pattern CSVs, resampled caches, the pattern index) record
+        fingerprint(symbol) and rebuild a symbol when it no longer matches.
+
+        :param raw: SymbolStore of the bars as traded.
+        :param actions_path: Actions table (see the module docstring).
+        :param cache_path: Factor cache (see AdjustmentFactors).
+        :param auto_refresh: Refresh on the first read instead of waiting for refresh().
+        """
+        self.raw = raw
+        self.actions_path = actions_path
+        self.factors = AdjustmentFactors(cache_path)
+        self.auto_refresh = auto_refresh
+        self._refreshed = False
+
+    @property
+    def open_last_bar(self):
+        return self.raw.open_last_bar
+
+    def refresh(self):
+        """
+        Recompute the factors of the symbols whose actions changed.
+
+        :return: Sorted list of those symbols.
+        """
+        changed = self.factors.refresh(read_actions(self.actions_path), self.raw)
+        self._refreshed = True
+        return changed
+
+    def _fresh(self):
+        if self.auto_refresh and not self._refreshed:
+            self.refresh()
+        return self.factors
+
+    # ---------- writing ----------
+
+    def append_batch(self, df):
+        self.raw.append_batch(df)
+
+    def flush(self):
+        self.raw.flush()
+
+    # ---------- reading ----------
+
+    def release(self):
+        self.raw.release()
+
+    def symbols(self):
+        return self.raw.symbols()
+
+    def fingerprint(self, symbol):
+        return self._fresh().fingerprint(symbol)
+
+    def bar_counts(self, symbols=None):
+        return self.raw.bar_counts(symbols)
+
+    def load_symbol(self, symbol, start=None, end=None, lookback=0):
+        factors = self._fresh()
+        return factors.apply(self.raw.load_symbol(symbol, start, end, lookback), symbol)
+
+    def load_universe(self, start=None, end=None):
+        factors = self._fresh()
+        return factors.apply(self.raw.load_universe(start, end))
+
+    def load_panel(self, end=None, length=None, symbols=None, columns=PRICE_COLUMNS):
+        factors = self._fresh()
+        return factors.apply_panel(self.raw.load_panel(end, length, symbols, columns))
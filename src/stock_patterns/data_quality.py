@@ -0,0 +1,263 @@
+import os
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+from .symbol_store import DATE_FORMAT, _to_datetime
+
+# Check name -> flag bit.
+CHECKS = {
+    'non_positive_price': 1 << 0,   # an Open/High/Low/Close that is zero, negative or missing
+    'high_below_low': 1 << 1,
+    'open_outside_range': 1 << 2,   # Open outside [Low, High]
+    'close_outside_range': 1 << 3,  # Close outside [Low, High]
+    'negative_volume': 1 << 4,
+    'duplicate_date': 1 << 5,       # a later row has the same (Symbol, Date); the last one is kept
+    'price_gap': 1 << 6,            # Open more than gap_threshold away from the previous close
+    'missing_sessions': 1 << 7,     # calendar sessions between this bar and the symbol's previous one
+    'non_session': 1 << 8,          # dated on a day the calendar has no session
+}
+
+# Rows failing these are kept out of the store and the engines; the other
+# checks only flag (a price gap is usually a split, a missing session a suspension).
+QUARANTINE_CHECKS = ('non_positive_price', 'high_below_low', 'open_outside_range',
+                     'close_outside_range', 'negative_volume', 'duplicate_date')
+QUARANTINE_MASK = sum(CHECKS[name] for name in QUARANTINE_CHECKS)
+
+# A move this large between sessions is rare enough to be worth a look (see price_gap).
+GAP_THRESHOLD = 0.3
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+
+def validate_bars(df, calendar=None, previous=None, gap_threshold=GAP_THRESHOLD):
+    """
+    Flag the rows of df that fail a check (see CHECKS).
+
+    :param df: Bars with Symbol, Date, Open, High, Low, Close and optionally Volume, in any order.
+    :param calendar: TradingCalendar for missing_sessions and non_session; None skips both.
+    :param previous: DataFrame indexed by Symbol with the Date and Close of each symbol's
+                     last bar before df, so a symbol's first row in df is checked
+                     against it (price_gap, missing_sessions); a bar not older
+                     than that row (a backfill) is ignored.
+    :param gap_threshold: |Open / previous Close - 1| above which a bar is a price_gap.
+    :return: int64 array of flag words aligned with the rows of df; 0 is a clean row.
+    """
+    codes, symbols = pd.factorize(df['Symbol'].to_numpy())
+    last_dates = np.full(len(symbols), np.datetime64('NaT'), dtype='datetime64[ns]')
+    last_close = np.full(len(symbols), np.nan)
+    if previous is not None and len(previous):
+        rows = previous.index.get_indexer(symbols)
+        known = rows >= 0
+        last_dates[known] = previous['Date'].to_numpy(dtype='datetime64[ns]')[rows[known]]
+        last_close[known] = previous['Close'].to_numpy(dtype=float)[rows[known]]
+    return _flag_rows(df, _to_datetime(df['Date']).to_numpy(), codes, last_dates, last_close,
+                      calendar, gap_threshold)
+
+
+def _flag_rows(df, dates, codes, last_dates, last_close, calendar, gap_threshold):
+    """
+    validate_bars on integer symbol codes: last_dates[code] and last_close[code]
+    describe the symbol's bar before df (NaT and NaN when there is none).
+    """
+    n = len(df)
+    flags = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return flags
+    open_, high, low, close = (df[column].to_numpy(dtype=float) for column in PRICE_COLUMNS)
+
+    def flag(name, rows):
+        flags[rows] |= CHECKS[name]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # NaN compares False, so a missing price fails too.
+        flag('non_positive_price', ~(np.minimum(np.minimum(open_, high), np.minimum(low, close)) > 0))
+        flag('high_below_low', high < low)
+        flag('open_outside_range', (open_ < low) | (open_ > high))
+        flag('close_outside_range', (close < low) | (close > high))
+        if 'Volume' in df:
+            flag('negative_volume', df['Volume'].to_numpy(dtype=float) < 0)
+
+        # Checks against the previous bar work on the rows in (Symbol, Date) order.
+        order = np.lexsort((dates, codes))
+        sorted_codes, sorted_dates = codes[order], dates[order]
+        first = np.ones(n, dtype=bool)
+        first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+        prev_dates = np.empty(n, dtype='datetime64[ns]')
+        prev_dates[1:] = sorted_dates[:-1]
+        prev_dates[first] = last_dates[sorted_codes[first]]
+        prev_close = np.empty(n)
+        prev_close[1:] = close[order][:-1]
+        prev_close[first] = last_close[sorted_codes[first]]
+        # A carried bar that is not older than the row (a backfill) is no previous bar.
+        stale = first & ~(prev_dates < sorted_dates)
+        prev_dates[stale] = np.datetime64('NaT')
+        prev_close[stale] = np.nan
+
+        repeated = np.flatnonzero(~first & (sorted_dates == prev_dates))
+        flag('duplicate_date', order[repeated - 1])
+        flag('price_gap', order[(prev_close > 0) & (np.abs(open_[order] / prev_close - 1) > gap_threshold)])
+
+    if calendar is not None:
+        flag('non_session', ~calendar.is_session(dates))
+        after = np.flatnonzero(prev_dates < sorted_dates)  # NaT compares False
+        missing = calendar.session_count(prev_dates[after] + np.timedelta64(1, 'D'), sorted_dates[after]) > 0
+        flag('missing_sessions', order[after[missing]])
+    return flags
+
+
+def flag_names(flags):
+    """Names of the checks set in one flag word, in CHECKS order."""
+    return [name for name, bit in CHECKS.items() if int(flags) & bit]
+
+
+def count_flags(flags):
+    """Add a validate_bars result to the quality_* counters in METRICS."""
+    METRICS.incr('quality_rows', len(flags))
+    if not flags.any():
+        return
+    for name, bit in CHECKS.items():
+        count = int(np.count_nonzero(flags & bit))
+        if count:
+            METRICS.incr(f'quality_{name}', count)
+    METRICS.incr('quality_flagged', int(np.count_nonzero(flags & ~QUARANTINE_MASK)))
+    METRICS.incr('quality_quarantined', int(np.count_nonzero(flags & QUARANTINE_MASK)))
+
+
+def screen_bars(df, calendar=None, gap_threshold=GAP_THRESHOLD, since=None):
+    """
+    Drop the quarantined rows of one symbol's bars before they are scored.
+
+    :param df: One symbol's bars (see validate_bars).
+    :param since: Only count and log the rows dated after this (e.g. an
+                  incremental watermark), so lookback rows are not counted twice.
+    :return: df without the quarantined rows (df itself when there are none).
+    """
+    with METRICS.timer('validate'):
+        flags = validate_bars(df, calendar, gap_threshold=gap_threshold)
+        counted = flags if since is None else flags[(_to_datetime(df['Date']) > since).to_numpy()]
+        count_flags(counted)
+        quarantined = (flags & QUARANTINE_MASK) != 0
+        if not quarantined.any():
+            return df
+    reported = counted & QUARANTINE_MASK
+    if reported.any():
+        names = sorted({name for word in np.unique(reported[reported != 0]) for name in flag_names(word)})
+        logging.warning(f"⚠️ {df['Symbol'].iloc[0]}: quarantined {int(np.count_nonzero(reported))} "
+                        f"bars ({', '.join(names)})")
+    return df[~quarantined].reset_index(drop=True)
+
+
+class DataValidator:
+    def __init__(self, calendar=None, gap_threshold=GAP_THRESHOLD, quarantine_dir=None):
+        """
+        Check daily batches on their way into a SymbolStore.
+
+        Each batch is validated in one validate_bars() call. Quarantined rows
+        are left out of the batch and, with quarantine_dir, written to
+        <quarantine_dir>/<YYYYMMDD>.csv with a Violations column. The last bar
+        of every symbol is carried from batch to batch, so a day is checked
+        against the day before it; seed() carries it over from a store.
+
+        :param calendar: TradingCalendar for the session checks (see validate_bars).
+        :param gap_threshold: See validate_bars.
+        :param quarantine_dir: Directory for the quarantined rows; None only counts them.
+        """
+        self.calendar = calendar
+        self.gap_threshold = gap_threshold
+        self.quarantine_dir = quarantine_dir
+        self.missing = []
+        # Last bar per symbol, updated in place; the index only grows when new symbols list.
+        self._symbols = pd.Index([], dtype=object, name='Symbol')
+        self._dates = np.empty(0, dtype='datetime64[ns]')
+        self._close = np.empty(0)
+
+    @property
+    def previous(self):
+        """Date and Close of every symbol's last bar seen so far, indexed by Symbol (see validate_bars)."""
+        return pd.DataFrame({'Date': self._dates, 'Close': self._close}, index=self._symbols)
+
+    def seed(self, store):
+        """Carry over the last bar of every symbol in store, e.g. before a nightly update."""
+        panel = store.load_panel(length=1, columns=('Close',))
+        known = ~np.isnat(panel.dates[:, -1])
+        self._symbols = pd.Index(panel.symbols[known].astype(object), name='Symbol')
+        self._dates = panel.dates[known, -1].astype('datetime64[ns]')
+        self._close = panel['Close'][known, -1].astype(float)
+
+    def _codes(self, symbols):
+        """Row of each symbol in the carried arrays, adding rows for symbols not seen before."""
+        codes = self._symbols.get_indexer(symbols)
+        new = codes < 0
+        if new.any():
+            added = pd.unique(symbols[new])
+            self._symbols = self._symbols.append(pd.Index(added, name='Symbol'))
+            self._dates = np.concatenate([self._dates, np.full(len(added), np.datetime64('NaT'), dtype='datetime64[ns]')])
+            self._close = np.concatenate([self._close, np.full(len(added), np.nan)])
+            codes = self._symbols.get_indexer(symbols)
+        return codes
+
+    def validate(self, df):
+        """
+        Check one batch and take out its quarantined rows.
+
+        :param df: Processed batch (see StockDataDownloader.parse_bhavcopy).
+        :return: The batch without the quarantined rows.
+        """
+        with METRICS.timer('validate'):
+            # The carried rows double as symbol codes: one hash lookup per batch.
+            codes = self._codes(df['Symbol'].to_numpy())
+            dates = _to_datetime(df['Date']).to_numpy()
+            flags = _flag_rows(df, dates, codes, self._dates, self._close, self.calendar, self.gap_threshold)
+            count_flags(flags)
+            kept = (flags & QUARANTINE_MASK) == 0
+            if not kept.all():
+                self._quarantine(df[~kept], flags[~kept])
+                df, codes, dates = df[kept], codes[kept], dates[kept]
+            # Only bars newer than the carried one advance it (NaT compares False, so
+            # a first bar always does); in date order a symbol's latest bar is written last.
+            order = np.argsort(dates, kind='stable')
+            order = order[~(self._dates[codes[order]] >= dates[order])]
+            self._dates[codes[order]] = dates[order]
+            self._close[codes[order]] = df['Close'].to_numpy(dtype=float)[order]
+        return df
+
+    def _quarantine(self, rows, flags):
+        names = {word: '|'.join(flag_names(word)) for word in np.unique(flags)}
+        rows = rows.assign(Violations=[names[word] for word in flags])
+        logging.warning(f"🚧 Quarantined {len(rows)} rows: "
+                        + ", ".join(f"{violation} {count}" for violation, count
+                                    in rows['Violations'].value_counts().items()))
+        if self.quarantine_dir is None:
+            return
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        for date, group in rows.groupby(_to_datetime(rows['Date']).values):
+            fd, tmp_path = tempfile.mkstemp(dir=self.quarantine_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                group.to_csv(f, index=False, date_format=DATE_FORMAT)
+            os.replace(tmp_path, os.path.join(self.quarantine_dir, f"{pd.Timestamp(date):%Y%m%d}.csv"))
+
+    def record_missing(self, date):
+        """
+        Note a calendar session that produced no batch (not published, 404, unparseable).
+
+        :param date: Date in 'DDMMYYYY' format.
+        """
+        self.missing.append(date)
+        METRICS.incr('quality_missing_days')
+        logging.warning(f"📭 No data for session {date}")
+
+
+def quality_report(metrics=METRICS):
+    """One-line summary of the quality_* counters, e.g. for the end of a run."""
+    counters = metrics.state()['counters']
+    rows = counters.get('quality_rows', 0)
+    line = (f"Data quality: {rows} rows checked, {counters.get('quality_quarantined', 0)} quarantined, "
+            f"{counters.get('quality_flagged', 0)} flagged")
+    found = [f"{name} {counters[f'quality_{name}']}" for name in CHECKS if counters.get(f'quality_{name}')]
+    if found:
+        line += f" ({', '.join(found)})"
+    if counters.get('quality_missing_days'):
+        line += f"; {counters['quality_missing_days']} sessions without data"
+    return line
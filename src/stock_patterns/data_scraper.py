@@ -0,0 +1,280 @@
+import time
+import requests
+import pandas as pd
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from .bhav_cache import BhavcopyCache
+from .bhav_reader import read_bhavcopy
+from .metrics import METRICS
+from .symbol_store import CsvSymbolStore
+from .trading_calendar import ARCHIVE_DATE_FORMAT, TradingCalendar
+import logging
+
+NSE_ARCHIVE_URL = "https://nsearchives.nseindia.com/products/content"
+
+# Status codes worth retrying; anything else (e.g. 404 on a holiday) is final.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class StockDataDownloader:
+    def __init__(self, start_date, end_date, download_dir="D:\\stock_data_csv",
+                 max_workers=1, max_retries=3, backoff_factor=0.5, timeout=30,
+                 base_url=NSE_ARCHIVE_URL, use_cache=True, compress_cache=True, store=None,
+                 calendar=None, ledger=None, validator=None):
+        """
+        Initialize the StockDataDownloader class.
+
+        :param start_date: Start date in 'DDMMYYYY' format.
+        :param end_date: End date in 'DDMMYYYY' format.
+        :param download_dir: Directory caching the raw downloaded files; None disables the cache.
+        :param max_workers: Number of concurrent downloads; 1 downloads serially.
+        :param max_retries: Retries per date on connection errors and 429/5xx responses.
+        :param backoff_factor: Base delay in seconds, doubled after every failed attempt.
+        :param timeout: Per-request timeout in seconds.
+        :param base_url: Archive URL serving the sec_bhavdata_full_<DDMMYYYY>.csv files.
+        :param use_cache: Serve previously downloaded dates from download_dir.
+        :param compress_cache: Store cached files gzip-compressed.
+        :param store: SymbolStore receiving the daily batches (e.g. NumpySymbolStore);
+                      defaults to per-symbol CSV files in the output_dir given to process_dates.
+        :param calendar: TradingCalendar deciding which dates are requested; defaults to
+                         weekdays only. Load the NSE holiday list with
+                         TradingCalendar.from_file to skip holidays without a request.
+        :param ledger: IngestLedger of the sessions already committed to the store; they are
+                       skipped, and every session committed is recorded in it.
+        :param validator: DataValidator checking every batch before it is committed; its
+                          quarantined rows are left out of the store.
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.download_dir = download_dir
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+        self.session = self._create_session()
+        self.cache = None
+        if use_cache and download_dir:
+            self.cache = BhavcopyCache(download_dir, compress=compress_cache)
+        self.store = store
+        self.calendar = calendar if calendar is not None else TradingCalendar()
+        self.ledger = ledger
+        self.validator = validator
+
+    def _create_session(self):
+        """
+        Create a keep-alive session shared by all download threads.
+
+        The connection pool is sized to the worker count so concurrent
+        requests reuse connections instead of opening a new one per date.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive',
+        })
+        return session
+
+    @METRICS.timed('download')
+    def download_csv_for_date(self, curr_date):
+        """
+        Download CSV content for a specific date.
+
+        Dates already in the cache are served from disk, and dates recorded
+        as missing (holidays, 404) are skipped without a request.
+
+        :param curr_date: Date in 'DDMMYYYY' format.
+        :return: Binary file object with the raw CSV bytes (a BytesIO over the
+                 response body, or a stream over the cached file), or None if
+                 the download fails.
+        """
+        if self.cache is not None:
+            cached = self.cache.open(curr_date)
+            if cached is not None:
+                METRICS.incr('download_cache_hits')
+                logging.info(f"📦 Loaded cached CSV for {curr_date}")
+                return cached
+            if self.cache.is_known_missing(curr_date):
+                METRICS.incr('download_missing')
+                logging.info(f"⏭️ Skipping {curr_date}, known missing "
+                             f"(status {self.cache.lookup(curr_date)['status']})")
+                return None
+
+        url = f'{self.base_url}/sec_bhavdata_full_{curr_date}.csv'
+        for attempt in range(self.max_retries + 1):
+            try:
+                METRICS.incr('download_requests')
+                response = self.session.get(url, stream=True, timeout=self.timeout)
+                if response.status_code == 200:
+                    content = response.content
+                    METRICS.incr('download_bytes', len(content))
+                    if self.cache is not None:
+                        self.cache.put(curr_date, content)
+                    logging.info(f"✅ Downloaded CSV for {curr_date}")
+                    # BytesIO shares the body's buffer; nothing is decoded or copied.
+                    return BytesIO(content)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    METRICS.incr('download_missing')
+                    if self.cache is not None:
+                        self.cache.record_status(curr_date, response.status_code)
+                    logging.warning(f"❌ Failed to download for {curr_date}. Status: {response.status_code}")
+                    return None
+                logging.warning(f"🔁 Status {response.status_code} for {curr_date} "
+                                f"(attempt {attempt + 1}/{self.max_retries + 1})")
+            except requests.RequestException as e:
+                logging.warning(f"🔁 Error downloading for {curr_date} "
+                                f"(attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+            except Exception as e:
+                METRICS.incr('download_failures')
+                logging.error(f"⚠️ Error downloading for {curr_date}: {e}")
+                return None
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_factor * (2 ** attempt))
+
+        METRICS.incr('download_failures')
+        logging.error(f"⚠️ Giving up on {curr_date} after {self.max_retries + 1} attempts")
+        return None
+
+    @METRICS.timed('parse')
+    def parse_bhavcopy(self, csv_file_like):
+        """
+        Parse a downloaded file straight into a processed EQ batch (see bhav_reader.read_bhavcopy).
+
+        :param csv_file_like: Binary file object from download_csv_for_date.
+        :return: Processed DataFrame, or None if parsing fails.
+        """
+        try:
+            with csv_file_like:
+                df = read_bhavcopy(csv_file_like)
+            METRICS.incr('parse_rows', len(df))
+            logging.info(f"✅ Parsed {len(df)} EQ rows")
+            return df
+        except Exception as e:
+            logging.error(f"⚠️ Error reading CSV: {e}")
+            return None
+
+    def dates_to_process(self):
+        """
+        List the trading sessions in the range [start_date, end_date).
+
+        Weekends and the calendar's holidays are skipped. An end_date on or
+        before start_date gives an empty list.
+
+        :return: List of dates in 'DDMMYYYY' format, in chronological order.
+        """
+        start = pd.to_datetime(self.start_date, format=ARCHIVE_DATE_FORMAT)
+        end = pd.to_datetime(self.end_date, format=ARCHIVE_DATE_FORMAT)
+        sessions = self.calendar.sessions(start, end, inclusive='left')
+        skipped = max((end - start).days, 0) - len(sessions)
+        if skipped:
+            logging.info(f"⏭️ Skipping {skipped} non-trading days between {self.start_date} and {self.end_date}")
+        return list(sessions.strftime(ARCHIVE_DATE_FORMAT))
+
+    def pending_dates(self):
+        """
+        The sessions of dates_to_process() that the ledger has not recorded yet (all of them without a ledger).
+        """
+        dates = self.dates_to_process()
+        if self.ledger is None:
+            return dates
+        pending = self.ledger.pending(dates)
+        METRICS.incr('ingest_skipped', len(dates) - len(pending))
+        return pending
+
+    def commit_batch(self, store, date, df):
+        """
+        Append one session's batch to the store and record the session in the ledger.
+
+        The store commits the day atomically before the ledger records it,
+        so a crash in between only means the day is ingested again.
+
+        :param store: SymbolStore receiving the batch.
+        :param date: Session date in 'DDMMYYYY' format.
+        :param df: Processed batch from parse_bhavcopy.
+        """
+        if self.validator is not None:
+            df = self.validator.validate(df)
+        with METRICS.timer('split'):
+            store.append_batch(df)
+        METRICS.incr('split_rows', len(df))
+        if self.ledger is not None:
+            self.ledger.record(date, len(df))
+
+    def iter_downloads(self, dates):
+        """
+        Download the given dates and yield the results in the order of `dates`.
+
+        With max_workers > 1 the downloads run on a thread pool sharing one
+        session. At most 2 * max_workers downloads are in flight or buffered,
+        so a slow consumer never holds more than a handful of files in memory.
+
+        :param dates: Dates in 'DDMMYYYY' format.
+        :return: Generator of (date, binary file object or None) tuples.
+        """
+        if self.max_workers == 1:
+            for curr_date in dates:
+                yield curr_date, self.download_csv_for_date(curr_date)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for curr_date in dates:
+                pending.append((curr_date, executor.submit(self.download_csv_for_date, curr_date)))
+                if len(pending) >= 2 * self.max_workers:
+                    done_date, future = pending.popleft()
+                    yield done_date, future.result()
+            while pending:
+                done_date, future = pending.popleft()
+                yield done_date, future.result()
+
+    def process_dates(self, output_dir=None, flush=True):
+        """
+        Process all dates in the range [start_date, end_date).
+        Skips weekends, calendar holidays (see dates_to_process) and the
+        sessions the ledger has recorded (see pending_dates).
+
+        Downloads may run concurrently (see max_workers), but parsing and
+        writing always happen in date order so the per-symbol files stay
+        chronological.
+
+        A backfill can be split into date shards ingested in parallel, each
+        with flush=False into the same store and ledger, as long as the store
+        does not flush on its own (compact_every or apply_every None); one
+        flush() afterwards, e.g. a run over the whole range, merges them.
+
+        :param output_dir: Directory for the per-symbol CSVs; not needed when a store is configured.
+        :param flush: Merge the committed days into the store at the end (see SymbolStore.flush).
+        """
+        store = self.store
+        if store is None:
+            store = CsvSymbolStore(output_dir) if flush else CsvSymbolStore(output_dir, apply_every=None)
+        with METRICS.stage('ingest'):
+            for current_date, csv_file_like in self.iter_downloads(self.pending_dates()):
+                df = self.parse_bhavcopy(csv_file_like) if csv_file_like is not None else None
+                if df is not None:
+                    self.commit_batch(store, current_date, df)
+                elif self.validator is not None:
+                    self.validator.record_missing(current_date)
+
+            if flush:
+                store.flush()
+
+    def split_data(self, df, output_dir):
+        """
+        Split and save data symbol-wise.
+
+        :param df: Processed stock DataFrame.
+        :param output_dir: Directory to save the split CSVs.
+        """
+        store = CsvSymbolStore(output_dir)
+        store.append_batch(df)
+        store.flush()
+        logging.info("✅ Data saved symbol-wise")
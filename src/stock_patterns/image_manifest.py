@@ -0,0 +1,90 @@
+import os
+import glob
+import logging
+import tempfile
+import pandas as pd
+from .render_cache import location_exists
+
+MANIFEST_COLUMNS = ['Symbol', 'Date', 'Patterns', 'Pattern_Image']
+
+
+def _write_csv_atomic(df, path):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False)
+    os.replace(tmp_path, path)
+
+
+class ImageManifest:
+    def __init__(self, path, embed_base64=False):
+        """
+        Hit -> image manifest with the columns Symbol, Date (YYYY-MM-DD),
+        Patterns (JSON list) and Pattern_Image (sink location), plus
+        Pattern_Image_Base64 when embed_base64 is set.
+
+        commit() writes each batch as one segment file, atomically, so an
+        interrupted run keeps every batch it finished; finalize() folds the
+        segments into the CSV and done() tells a rerun what is already drawn.
+
+        :param path: Manifest CSV; committed segments live in <path>.parts/ until finalize().
+        :param embed_base64: Keep a Pattern_Image_Base64 column.
+        """
+        self.path = path
+        self.parts_dir = f"{path}.parts"
+        self.columns = MANIFEST_COLUMNS + (['Pattern_Image_Base64'] if embed_base64 else [])
+        self.entries = {}
+        self.pending = []
+        for source in ([path] if os.path.exists(path) else []) + self._parts():
+            self._load(source)
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.parts_dir, 'part-*.csv')))
+
+    def _load(self, source):
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+        base64_values = df['Pattern_Image_Base64'] if 'Pattern_Image_Base64' in df else [''] * len(df)
+        for symbol, date, patterns, location, image_base64 in zip(
+                df['Symbol'], df['Date'], df['Patterns'], df['Pattern_Image'], base64_values):
+            self.entries[(symbol, date)] = (patterns, location, image_base64)
+
+    def done(self, symbol, date, patterns):
+        """
+        Entry of a hit already rendered with these patterns whose image still exists, else None.
+
+        :return: (patterns, location, base64 text or '') tuple.
+        """
+        entry = self.entries.get((symbol, date))
+        if entry is None or entry[0] != patterns or not location_exists(entry[1]):
+            return None
+        return entry
+
+    def add(self, symbol, date, patterns, location, image_base64=''):
+        """Record a hit's image; it is written with the next commit()."""
+        self.pending.append((symbol, date, patterns, location, image_base64 or ''))
+
+    def commit(self):
+        """Write the rows added since the last commit as one new segment."""
+        if not self.pending:
+            return
+        segment = pd.DataFrame(self.pending, columns=MANIFEST_COLUMNS + ['Pattern_Image_Base64'])
+        parts = self._parts()
+        number = int(os.path.basename(parts[-1])[len('part-'):-len('.csv')]) + 1 if parts else 0
+        _write_csv_atomic(segment[self.columns], os.path.join(self.parts_dir, f"part-{number:06d}.csv"))
+        for symbol, date, patterns, location, image_base64 in self.pending:
+            self.entries[(symbol, date)] = (patterns, location, image_base64)
+        self.pending = []
+
+    def finalize(self):
+        """Commit, then rewrite the manifest CSV from every entry and drop the segments."""
+        self.commit()
+        rows = [(symbol, date, patterns, location, image_base64)
+                for (symbol, date), (patterns, location, image_base64) in sorted(self.entries.items())]
+        df = pd.DataFrame(rows, columns=MANIFEST_COLUMNS + ['Pattern_Image_Base64'])
+        _write_csv_atomic(df[self.columns], self.path)
+        for part in self._parts():
+            os.remove(part)
+        if os.path.isdir(self.parts_dir):
+            os.rmdir(self.parts_dir)
+        logging.info(f"🗂️ Wrote {len(df)} hit images to {self.path}")
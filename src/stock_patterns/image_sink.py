@@ -0,0 +1,152 @@
+import io
+import os
+import base64
+import tarfile
+import time
+
+
+class ImageSink:
+    """
+    Destination for rendered chart images.
+
+    save_figure() writes a Matplotlib figure as PNG and returns a location
+    string for the image; write_bytes() stores already-encoded PNG bytes
+    (used when a pool worker rendered the image). Sinks with shareable=True
+    can be written to from worker processes directly; the others are only
+    written by the parent, which receives the PNG bytes from the workers.
+    """
+    shareable = False
+
+    def save_figure(self, fig, name, **savefig_kwargs):
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', **savefig_kwargs)
+        return self.write_bytes(name, buf.getbuffer())
+
+    def write_bytes(self, name, data):
+        raise NotImplementedError
+
+    def read_bytes(self, name):
+        raise NotImplementedError
+
+    def as_base64(self, name):
+        """Base64 text of a stored image, computed only when asked for."""
+        return base64.b64encode(self.read_bytes(name)).decode('utf-8')
+
+    def flush(self):
+        """
+        Make every image written so far complete on disk, before anything
+        that refers to it (a manifest, a render cache) is saved.
+        """
+
+    def close(self):
+        pass
+
+
+class DirectorySink(ImageSink):
+    shareable = True
+
+    def __init__(self, directory):
+        """
+        One PNG file per chart under directory; figures are saved straight to
+        the file with no intermediate buffer.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def save_figure(self, fig, name, **savefig_kwargs):
+        path = self.path(name)
+        fig.savefig(path, format='png', **savefig_kwargs)
+        return path
+
+    def write_bytes(self, name, data):
+        path = self.path(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read_bytes(self, name):
+        with open(self.path(name), 'rb') as f:
+            return f.read()
+
+
+class TarShardSink(ImageSink):
+    def __init__(self, directory, prefix='charts', shard_size=10000):
+        """
+        Packs charts into uncompressed tar shards (PNG is already compressed),
+        which avoids creating tens of thousands of small files per run.
+
+        :param directory: Directory for the shards.
+        :param prefix: Shard file prefix; shards are named <prefix>-00000.tar, ...
+        :param shard_size: Images per shard before a new shard is started.
+
+        Shards from earlier runs are kept: numbering continues after the
+        last existing shard, so their images stay where they were. flush()
+        closes the open shard and syncs it to disk; the next image reopens
+        it for appending until it holds shard_size images.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.index = {}
+        os.makedirs(directory, exist_ok=True)
+        existing = [name[len(prefix) + 1:-len('.tar')] for name in os.listdir(directory)
+                    if name.startswith(f"{prefix}-") and name.endswith('.tar')]
+        self._shard_number = max((int(number) for number in existing if number.isdigit()), default=-1)
+        self._shard = None
+        self._shard_path = None
+        self._members = 0
+
+    def _next_shard(self):
+        self.close()
+        self._shard_number += 1
+        self._shard_path = os.path.join(self.directory, f"{self.prefix}-{self._shard_number:05d}.tar")
+        self._shard = tarfile.open(self._shard_path, 'w')
+        self._members = 0
+
+    def write_bytes(self, name, data):
+        if self._members >= self.shard_size or self._shard_path is None:
+            self._next_shard()
+        elif self._shard is None:
+            # Flushed: append to the shard where the last image went.
+            self._shard = tarfile.open(self._shard_path, 'a')
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._shard.addfile(info, io.BytesIO(data))
+        self._members += 1
+        self.index[name] = self._shard_path
+        return f"{self._shard_path}::{name}"
+
+    def read_bytes(self, name):
+        shard_path = self.index[name]
+        if shard_path == self._shard_path and self._shard is not None:
+            self._shard.fileobj.flush()
+        with tarfile.open(shard_path, 'r') as tar:
+            return tar.extractfile(name).read()
+
+    def flush(self):
+        if self._shard is not None:
+            # Closing writes the end-of-archive blocks, so the shard parses as a whole.
+            self._shard.close()
+            self._shard = None
+            with open(self._shard_path, 'rb+') as f:
+                os.fsync(f.fileno())
+
+    def close(self):
+        self.flush()
+
+
+class MemorySink(ImageSink):
+    def __init__(self):
+        """Keeps PNG bytes in a dict keyed by name; meant for tests and previews."""
+        self.images = {}
+
+    def write_bytes(self, name, data):
+        self.images[name] = bytes(data)
+        return name
+
+    def read_bytes(self, name):
+        return self.images[name]
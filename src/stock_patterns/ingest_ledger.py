@@ -0,0 +1,76 @@
+import os
+import json
+import logging
+import tempfile
+from datetime import datetime
+from .trading_calendar import ARCHIVE_DATE_FORMAT
+
+
+class IngestLedger:
+    def __init__(self, root):
+        """
+        Trading sessions an ingest has committed to its SymbolStore; recorded
+        sessions are skipped on later runs.
+
+        Layout under root:
+            <YYYYMMDD>.json   one marker per committed session: date, rows, committed_at
+                              (one file each, so parallel date shards can share a ledger)
+
+        Delete the ledger together with the store it describes; deleting one
+        marker makes the next run ingest that session again.
+
+        :param root: Ledger directory; created on the first record().
+        """
+        self.root = root
+        self._done = set()
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                stem, ext = os.path.splitext(name)
+                if ext == '.json':
+                    self._done.add(stem)
+
+    @staticmethod
+    def _key(date_str):
+        return datetime.strptime(date_str, ARCHIVE_DATE_FORMAT).strftime('%Y%m%d')
+
+    def done(self, date_str):
+        """
+        Whether a session was committed by an earlier (or this) run.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        """
+        return self._key(date_str) in self._done
+
+    def record(self, date_str, rows):
+        """
+        Mark a session committed; call only after its batch is durable in the store.
+
+        :param date_str: Date in 'DDMMYYYY' format.
+        :param rows: Rows the session's batch held.
+        """
+        key = self._key(date_str)
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'date': date_str, 'rows': int(rows),
+                       'committed_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}, f)
+        os.replace(tmp_path, os.path.join(self.root, f"{key}.json"))
+        self._done.add(key)
+
+    def dates(self):
+        """Committed sessions in 'DDMMYYYY' format, oldest first."""
+        return [datetime.strptime(key, '%Y%m%d').strftime(ARCHIVE_DATE_FORMAT) for key in sorted(self._done)]
+
+    def __len__(self):
+        return len(self._done)
+
+    def pending(self, dates):
+        """
+        The dates not committed yet, in their original order.
+
+        :param dates: Dates in 'DDMMYYYY' format.
+        """
+        pending = [date for date in dates if not self.done(date)]
+        if len(pending) < len(dates):
+            logging.info(f"⏭️ Skipping {len(dates) - len(pending)} sessions already in {self.root}")
+        return pending
@@ -0,0 +1,312 @@
+"""
+Live pattern detection on intraday candles.
+
+IntradayDetector folds a tick or bar feed into fixed-interval candles
+(e.g. 5 or 15 minutes) per symbol. A record costs O(1): it touches one
+symbol's forming candle. When the interval rolls over, every candle formed
+in it closes at once and is pushed into its symbol's ring buffer of the
+last lookback + 1 bars. The patterns are then scored on the closing bar of
+all those symbols in one vectorized pass, so alerts come out once per
+close and never for a forming candle.
+
+Feeds are iterables of records:
+
+    (timestamp_ns, symbol, price, volume)                  a trade
+    (timestamp_ns, symbol, open, high, low, close, volume) a sub-interval bar, e.g. 1 minute
+    None                                                   a heartbeat: no data, check the clock
+
+replay_file() and socket_feed() read such records from CSV lines, so a
+recorded session can be replayed through the same code path as a live
+socket.
+"""
+import time
+import socket
+import logging
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+from .pattern_engine import get_engine
+
+ALERT_COLUMNS = ['Symbol', 'BarStart', 'Pattern', 'Direction', 'Signal']
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+
+class BarRing:
+    def __init__(self, depth, capacity=1024):
+        """
+        Last `depth` closed bars per symbol row, as (rows x depth) arrays written round-robin.
+
+        :param depth: Bars kept per symbol.
+        :param capacity: Initial number of symbol rows; grows by doubling.
+        """
+        self.depth = depth
+        self.columns = {column: np.full((capacity, depth), np.nan) for column in PRICE_COLUMNS}
+        self.position = np.zeros(capacity, dtype=np.int64)  # next slot to write
+        self.count = np.zeros(capacity, dtype=np.int64)     # bars held, at most depth
+
+    def grow(self, capacity):
+        old = len(self.position)
+        for column, values in self.columns.items():
+            self.columns[column] = np.concatenate([values, np.full((capacity - old, self.depth), np.nan)])
+        self.position = np.concatenate([self.position, np.zeros(capacity - old, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(capacity - old, dtype=np.int64)])
+
+    def push(self, rows, bars):
+        """Append one bar to each of rows; bars maps column name to an array aligned with rows."""
+        slots = self.position[rows]
+        for column, values in bars.items():
+            self.columns[column][rows, slots] = values
+        self.position[rows] = (slots + 1) % self.depth
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.depth)
+
+    def windows(self, rows):
+        """
+        Bars of rows oldest first, as (len(rows) x depth) arrays left-padded
+        with NaN where a symbol has fewer than depth bars (see BarPanel).
+        """
+        slots = (self.position[rows, None] + np.arange(self.depth)) % self.depth
+        valid = np.arange(self.depth) >= self.depth - self.count[rows, None]
+        return {column: np.where(valid, values[rows[:, None], slots], np.nan)
+                for column, values in self.columns.items()}
+
+
+class IntradayDetector:
+    def __init__(self, interval='5min', engine='numpy', capacity=2048):
+        """
+        Streaming candle aggregation and bar-close pattern alerts.
+
+        Intervals are aligned to the Unix epoch, which puts NSE's 09:15 IST
+        open on a 5- and 15-minute boundary. Time is taken from the records
+        (event time); a trade for an interval that already closed is
+        dropped and counted as late.
+
+        :param interval: Candle length, anything pandas.Timedelta accepts ('5min', '15min').
+        :param engine: Pattern engine (see pattern_engine.get_engine).
+        :param capacity: Symbol rows allocated up front; more are added as symbols appear.
+        """
+        self.interval = int(pd.Timedelta(interval).value)
+        self.engine = get_engine(engine)
+        self.single_candle_patterns = self.engine.patterns
+        self.pattern_names = np.asarray(list(self.single_candle_patterns), dtype=object)
+        # Bars needed to score the last bar (see CandlePatternRecognizer.pattern_lookback).
+        self.ring = BarRing(self.engine.lookback + 1, capacity)
+
+        self.rows = {}
+        self.symbols = []
+        self.bar_start = None  # start of the interval being formed, ns since the epoch
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.forming = np.zeros(capacity, dtype=bool)
+        self.updates = 0
+        self.late = 0
+
+    def _add_symbol(self, symbol):
+        row = self.rows[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+        if row == len(self.forming):
+            capacity = max(2 * row, 1)
+            self.ring.grow(capacity)
+            for name in ('open', 'high', 'low', 'close', 'volume', 'forming'):
+                values = getattr(self, name)
+                setattr(self, name, np.concatenate([values, np.zeros(capacity - row, dtype=values.dtype)]))
+        return row
+
+    # ---------- feed ----------
+
+    def trade(self, timestamp, symbol, price, volume=0):
+        """Fold one trade into the symbol's forming candle (see bar)."""
+        return self.bar(timestamp, symbol, price, price, price, price, volume)
+
+    def bar(self, timestamp, symbol, open_, high, low, close, volume=0):
+        """
+        Fold one sub-interval bar (or a trade, as open = high = low = close)
+        into the symbol's forming candle.
+
+        :param timestamp: Event time in ns since the epoch.
+        :return: Alerts DataFrame when this record closed an interval (see close_bar), else None.
+        """
+        bar_start = timestamp - timestamp % self.interval
+        alerts = None
+        if self.bar_start is None:
+            self.bar_start = bar_start
+        elif bar_start > self.bar_start:
+            alerts = self.close_bar()
+            self.bar_start = bar_start
+        elif bar_start < self.bar_start:
+            self.late += 1
+            return None
+
+        row = self.rows.get(symbol)
+        if row is None:
+            row = self._add_symbol(symbol)
+        if self.forming[row]:
+            if high > self.high[row]:
+                self.high[row] = high
+            if low < self.low[row]:
+                self.low[row] = low
+            self.close[row] = close
+            self.volume[row] += volume
+        else:
+            self.forming[row] = True
+            self.open[row], self.high[row], self.low[row], self.close[row] = open_, high, low, close
+            self.volume[row] = volume
+        self.updates += 1
+        return alerts
+
+    def update(self, record):
+        """Fold one feed record (see the module docstring) in; returns what trade() or bar() returns."""
+        if record is None:
+            return None
+        if len(record) == 4:
+            return self.trade(*record)
+        return self.bar(*record)
+
+    def advance(self, now):
+        """
+        Close the forming interval once the clock has passed its end, for
+        feeds that go quiet at a boundary.
+
+        :param now: Current time in ns since the epoch.
+        :return: Alerts DataFrame if an interval closed, else None.
+        """
+        if self.bar_start is None or now < self.bar_start + self.interval:
+            return None
+        alerts = self.close_bar()
+        self.bar_start = now - now % self.interval
+        return alerts
+
+    def close_bar(self):
+        """
+        Close the forming interval: push every candle formed in it into the
+        ring buffers and score the patterns on those closing bars.
+
+        Symbols without a trade in the interval get no bar, as a symbol
+        without a trade on a day has no daily bar.
+
+        :return: DataFrame with Symbol, BarStart, Pattern, Direction and Signal;
+                 attrs hold bar_start, symbols (bars closed) and latency, the
+                 seconds from the close to the alerts being ready.
+        """
+        start = time.perf_counter()
+        rows = np.flatnonzero(self.forming)
+        self.ring.push(rows, {'Open': self.open[rows], 'High': self.high[rows],
+                              'Low': self.low[rows], 'Close': self.close[rows]})
+        self.forming[rows] = False
+
+        if len(rows):
+            windows = self.ring.windows(rows)
+            signals = self.engine.compute_matrix(*(windows[column] for column in PRICE_COLUMNS))[:, -1, :]
+        else:
+            signals = np.zeros((0, len(self.pattern_names)), dtype=np.int32)
+        hit_rows, hit_patterns = np.nonzero(signals)
+        hit_signals = signals[hit_rows, hit_patterns]
+        bar_start = pd.Timestamp(self.bar_start) if self.bar_start is not None else None
+        alerts = pd.DataFrame({
+            'Symbol': np.asarray(self.symbols, dtype=object)[rows[hit_rows]],
+            'BarStart': bar_start,
+            'Pattern': self.pattern_names[hit_patterns],
+            'Direction': np.where(hit_signals > 0, 'bullish', 'bearish'),
+            'Signal': hit_signals.astype(int),
+        }, columns=ALERT_COLUMNS)
+        latency = time.perf_counter() - start
+
+        alerts.attrs.update(bar_start=bar_start, symbols=len(rows), latency=latency)
+        METRICS.observe('alert', latency)
+        METRICS.incr('intraday_updates', self.updates)
+        METRICS.incr('intraday_late_updates', self.late)
+        METRICS.incr('intraday_bars', len(rows))
+        METRICS.incr('pattern_hits', len(alerts))
+        self.updates = self.late = 0
+        return alerts
+
+    def run(self, feed, on_alert, clock=time.time_ns):
+        """
+        Consume a feed until it ends, calling on_alert(alerts) at every interval close.
+
+        Heartbeats (None records) check clock() so a quiet feed still closes
+        its intervals on time; the interval still forming when the feed ends
+        is closed as well.
+
+        :param feed: Iterable of records (see the module docstring).
+        :param on_alert: Callable receiving each close_bar() DataFrame.
+        :param clock: Wall clock in ns since the epoch, for heartbeats.
+        :return: Number of intervals closed.
+        """
+        closed = 0
+        for record in feed:
+            alerts = self.advance(clock()) if record is None else self.update(record)
+            if alerts is not None:
+                closed += 1
+                on_alert(alerts)
+        if self.forming.any():
+            closed += 1
+            on_alert(self.close_bar())
+        return closed
+
+
+# ---------- feeds ----------
+
+def parse_record(line):
+    """
+    One feed record from a CSV line: timestamp,symbol,price,volume or
+    timestamp,symbol,open,high,low,close,volume. The timestamp is ns since
+    the epoch or an ISO 8601 string. Returns None for a header line.
+    """
+    fields = line.strip().split(',')
+    stamp = fields[0]
+    if stamp.isdigit():
+        timestamp = int(stamp)
+    else:
+        try:
+            timestamp = int(np.datetime64(stamp, 'ns').astype(np.int64))
+        except ValueError:
+            return None
+    if len(fields) == 4:
+        return timestamp, fields[1], float(fields[2]), int(float(fields[3]))
+    return (timestamp, fields[1], float(fields[2]), float(fields[3]), float(fields[4]), float(fields[5]),
+            int(float(fields[6])))
+
+
+def replay_file(path):
+    """Records of a recorded feed file (see parse_record), skipping blank and header lines."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = parse_record(line)
+                if record is not None:
+                    yield record
+
+
+def socket_feed(host, port, heartbeat=1.0):
+    """
+    Records of newline-delimited CSV lines read from a TCP socket (see
+    parse_record), with a None heartbeat after every `heartbeat` seconds
+    of silence. Ends when the peer closes the connection.
+    """
+    with socket.create_connection((host, port)) as conn:
+        conn.settimeout(heartbeat)
+        buffer = b''
+        while True:
+            try:
+                data = conn.recv(1 << 16)
+            except socket.timeout:
+                yield None
+                continue
+            if not data:
+                break
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    record = parse_record(line.decode('utf-8'))
+                    if record is not None:
+                        yield record
+        if buffer.strip():
+            record = parse_record(buffer.decode('utf-8'))
+            if record is not None:
+                yield record
+    logging.info(f"🔌 Feed {host}:{port} closed")
@@ -0,0 +1,298 @@
+"""
+Counters, latency timers and stage timings for the download -> parse ->
+split -> detect -> render pipeline.
+
+Code paths record into the module-level METRICS registry:
+
+    METRICS.incr('download_bytes', len(content))
+    with METRICS.timer('parse'):      # latency of one item
+        ...
+    @METRICS.timed('render')          # latency of every call
+    def render_job(...):
+    with METRICS.stage('detect'):     # wall time of a whole stage, optionally profiled
+        ...
+
+Work done in run_batch worker processes is recorded in the worker's copy of
+the registry and merged back into the caller's with each chunk's outcomes.
+The registry exports as JSON (to_json) or Prometheus text (to_prometheus).
+"""
+import os
+import json
+import math
+import time
+import bisect
+import threading
+import functools
+import contextlib
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+# Upper bounds (seconds) of the latency histogram buckets: 20 per decade from
+# 1 us to 1000 s, so a quantile read off the buckets is within 12% of the
+# sample. The last bucket catches anything slower.
+BUCKET_BOUNDS = tuple(10 ** (k / 20) for k in range(-120, 61))
+# Every 10th bound (1 and 3.16 per decade) is exported to Prometheus.
+EXPORT_BOUNDS = BUCKET_BOUNDS[::10]
+
+
+def _new_histogram():
+    return {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(BUCKET_BOUNDS) + 1)}
+
+
+def _quantile(histogram, q):
+    # Nearest-rank quantile, as the upper bound of the bucket holding that rank.
+    if not histogram['count']:
+        return 0.0
+    rank = max(1, math.ceil(q * histogram['count']))
+    seen = 0
+    for index, count in enumerate(histogram['buckets']):
+        seen += count
+        if seen >= rank:
+            break
+    bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else math.inf
+    return min(bound, histogram['max'])
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Thread-safe store of named counters, per-item latency histograms and stage timings.
+
+        Counters are plain running totals (bytes fetched, rows parsed,
+        pattern hits, charts written). Timers count latencies into the fixed
+        BUCKET_BOUNDS histogram, so memory stays constant however many items
+        run; count, sum and max are exact, p50/p95 are bucket bounds. Stages
+        accumulate wall time and call counts, and can run under a profiler
+        (see set_profiler).
+        """
+        self._lock = threading.Lock()
+        self._profiling = False
+        self.profiler = None
+        self.profile_dir = '.'
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.stages = {}
+
+    # ---------- recording ----------
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = _new_histogram()
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['max'] = max(histogram['max'], seconds)
+            histogram['buckets'][bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Record the latency of the enclosed block as one sample of `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator recording every call of the function as one sample of `name`."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Accumulate the wall time of a pipeline stage, profiling it when a profiler is set.
+
+        Only the outermost active stage is profiled, and only in the calling
+        process: with worker processes the profile shows the scheduling, so
+        profile with one worker to see the work itself.
+        """
+        start = time.perf_counter()
+        try:
+            with self._profile(name):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                entry['seconds'] += elapsed
+                entry['calls'] += 1
+
+    # ---------- profiling ----------
+
+    def set_profiler(self, profiler, directory='.'):
+        """
+        Profile every stage from now on.
+
+        :param profiler: 'cprofile' (writes <stage>.prof, for pstats/snakeviz),
+                         'pyinstrument' (writes <stage>.html; needs pyinstrument), or None.
+        :param directory: Directory the profiles are written to.
+        """
+        if profiler not in PROFILERS + (None,):
+            raise ValueError(f"profiler must be one of {PROFILERS} or None")
+        if profiler == 'pyinstrument':
+            import pyinstrument  # noqa: F401  (fail now rather than at the first stage)
+        self.profiler = profiler
+        self.profile_dir = directory
+
+    @contextlib.contextmanager
+    def _profile(self, name):
+        # Stages may run on several threads; only one of them is profiled at a time.
+        with self._lock:
+            busy = self.profiler is None or self._profiling
+            if not busy:
+                self._profiling = True
+        if busy:
+            yield
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        try:
+            if self.profiler == 'cprofile':
+                import cProfile
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    profile.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            else:
+                from pyinstrument import Profiler
+                profile = Profiler()
+                profile.start()
+                try:
+                    yield
+                finally:
+                    profile.stop()
+                    with open(os.path.join(self.profile_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+                        f.write(profile.output_html())
+        finally:
+            with self._lock:
+                self._profiling = False
+
+    # ---------- worker processes ----------
+
+    def state(self):
+        """Picklable copy of everything recorded so far."""
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'histograms': {name: dict(histogram, buckets=list(histogram['buckets']))
+                                   for name, histogram in self.histograms.items()},
+                    'stages': {name: dict(entry) for name, entry in self.stages.items()}}
+
+    def merge(self, state):
+        """Add a state() taken in another process to this registry."""
+        with self._lock:
+            for name, value in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, theirs in state['histograms'].items():
+                mine = self.histograms.setdefault(name, _new_histogram())
+                mine['count'] += theirs['count']
+                mine['sum'] += theirs['sum']
+                mine['max'] = max(mine['max'], theirs['max'])
+                mine['buckets'] = [a + b for a, b in zip(mine['buckets'], theirs['buckets'])]
+            for name, entry in state['stages'].items():
+                mine = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                mine['seconds'] += entry['seconds']
+                mine['calls'] += entry['calls']
+
+    # ---------- export ----------
+
+    def timer_summary(self, name):
+        """count, sum, p50, p95 and max (seconds) of a timer."""
+        with self._lock:
+            histogram = self.histograms.get(name) or _new_histogram()
+            histogram = dict(histogram, buckets=list(histogram['buckets']))
+        return {'count': histogram['count'], 'sum': histogram['sum'], 'p50': _quantile(histogram, 0.5),
+                'p95': _quantile(histogram, 0.95), 'max': histogram['max']}
+
+    def timer_buckets(self, name, bounds=EXPORT_BOUNDS):
+        """Cumulative (upper bound, count) pairs of a timer at bounds taken from BUCKET_BOUNDS."""
+        with self._lock:
+            buckets = list((self.histograms.get(name) or _new_histogram())['buckets'])
+        cumulative, seen, index = [], 0, 0
+        for bound in bounds:
+            while index < len(BUCKET_BOUNDS) and BUCKET_BOUNDS[index] <= bound:
+                seen += buckets[index]
+                index += 1
+            cumulative.append((bound, seen))
+        return cumulative
+
+    def to_dict(self):
+        with self._lock:
+            counters = dict(self.counters)
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+            timers = list(self.histograms)
+        return {'counters': counters, 'timers': {name: self.timer_summary(name) for name in timers},
+                'stages': stages}
+
+    def to_json(self, indent=1):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    def to_prometheus(self, prefix='stock_patterns'):
+        """
+        Prometheus text exposition: one <prefix>_<name>_total counter per
+        counter, <prefix>_item_seconds histogram buckets (EXPORT_BOUNDS) per
+        timer and <prefix>_stage_seconds_total / <prefix>_stage_calls_total
+        per stage.
+        """
+        data = self.to_dict()
+        lines = []
+        for name, value in sorted(data['counters'].items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        if data['timers']:
+            lines.append(f"# TYPE {prefix}_item_seconds histogram")
+            for name, summary in sorted(data['timers'].items()):
+                lines += [f'{prefix}_item_seconds_bucket{{stage="{name}",le="{bound:.6g}"}} {count}'
+                          for bound, count in self.timer_buckets(name)]
+                lines += [f'{prefix}_item_seconds_bucket{{stage="{name}",le="+Inf"}} {summary["count"]}',
+                          f'{prefix}_item_seconds_sum{{stage="{name}"}} {summary["sum"]:.6g}',
+                          f'{prefix}_item_seconds_count{{stage="{name}"}} {summary["count"]}']
+        if data['stages']:
+            lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+            lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {entry["seconds"]:.6g}'
+                      for name, entry in sorted(data['stages'].items())]
+            lines.append(f"# TYPE {prefix}_stage_calls_total counter")
+            lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {entry["calls"]}'
+                      for name, entry in sorted(data['stages'].items())]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, format=None):
+        """
+        Write the metrics to path as 'json' or 'prometheus'; by default
+        Prometheus for .prom/.txt files and JSON otherwise.
+        """
+        if format is None:
+            format = 'prometheus' if path.endswith(('.prom', '.txt')) else 'json'
+        text = self.to_prometheus() if format == 'prometheus' else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def report(self):
+        """Human-readable summary: stage wall times, per-item latencies and counters."""
+        data = self.to_dict()
+        lines = [f"stage {name:<12} {entry['seconds']:9.2f}s in {entry['calls']} call(s)"
+                 for name, entry in sorted(data['stages'].items())]
+        lines += [f"item  {name:<12} n={summary['count']:<7} p50 {summary['p50'] * 1000:9.2f} ms  "
+                  f"p95 {summary['p95'] * 1000:9.2f} ms"
+                  for name, summary in sorted(data['timers'].items())]
+        lines += [f"count {name:<20} {value}" for name, value in sorted(data['counters'].items())]
+        return "\n".join(lines)
+
+
+# Registry shared by every module of the package.
+METRICS = MetricsRegistry()
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+import pandas as pd
 
 def increment_date(date_str):
     """
@@ -26,14 +27,7 @@ def generate_date_range(start_date, end_date):
     Returns:
     list: List of dates between start_date and end_date in DDMMYYYY format.
     """
-    dates = []
-    current_date = start_date
-
-    # Convert end_date to a datetime object for comparison
-    end_date_obj = datetime.strptime(end_date, "%d%m%Y")
-
-    while datetime.strptime(current_date, "%d%m%Y") <= end_date_obj:
-        dates.append(current_date)
-        current_date = increment_date(current_date)
-
-    return dates
+    # Parse both ends once and format the whole range in one call; for
+    # trading sessions only, use trading_calendar.TradingCalendar.sessions.
+    dates = pd.date_range(datetime.strptime(start_date, "%d%m%Y"), datetime.strptime(end_date, "%d%m%Y"), freq='D')
+    return list(dates.strftime("%d%m%Y"))
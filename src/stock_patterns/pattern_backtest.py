@@ -0,0 +1,142 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from .batch_runner import run_batch
+from .pattern_engine import get_engine
+
+# Per-group sums returned by each chunk; they add up across chunks.
+SUM_COLUMNS = ['Events', 'ReturnSum', 'Hits', 'DrawdownSum']
+
+STAT_COLUMNS = ['Events', 'AvgReturn', 'HitRate', 'AvgDrawdown', 'MaxDrawdown']
+
+
+def _window_extreme(values, horizon, func):
+    """func (np.min / np.max) over bars i+1 .. i+horizon at position i; NaN where the window runs past the end."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] > horizon:
+        out[..., :-horizon] = func(sliding_window_view(values[..., 1:], horizon, axis=-1), axis=-1)
+    return out
+
+
+class PatternBacktester:
+    def __init__(self, store, horizons=(1, 5, 10, 20), engine='numpy', symbols_per_task=200):
+        """
+        Forward-return statistics of every detected pattern.
+
+        For each pattern hit the trade is entered at the close of the signal
+        bar, long on a bullish signal and short on a bearish one, and held for
+        each horizon. Per pattern, direction and horizon (and optionally per
+        symbol) it reports the number of events, the mean signed return, the
+        hit rate (share of events with a positive signed return) and the
+        drawdown: the worst close-to-low (long) or close-to-high (short) move
+        against the trade while it is held, never above zero.
+
+        The pattern matrix is the same one CandlePatternRecognizer writes;
+        signals, returns and drawdowns are computed on (symbols x bars)
+        panels, and chunks of symbols run in parallel.
+
+        :param store: SymbolStore to read bars from.
+        :param horizons: Holding periods in bars.
+        :param engine: Pattern engine (see pattern_engine.get_engine).
+        :param symbols_per_task: Symbols loaded and evaluated together in one panel.
+        """
+        self.store = store
+        self.horizons = tuple(int(h) for h in horizons)
+        if not self.horizons or min(self.horizons) < 1:
+            raise ValueError("horizons must be positive bar counts")
+        self.engine = get_engine(engine)
+        self.single_candle_patterns = self.engine.patterns
+        self.symbols_per_task = symbols_per_task
+
+    def _backtest_chunk(self, task):
+        """
+        Event sums per (symbol, pattern, direction, horizon) for one chunk of symbols.
+        """
+        symbols, start, end = task
+        panel = self.store.load_panel(symbols=symbols, columns=('Open', 'High', 'Low', 'Close'))
+        close, high, low = panel['Close'], panel['High'], panel['Low']
+        signals = self.engine.compute_matrix(panel['Open'], high, low, close)
+
+        in_range = ~np.isnat(panel.dates)
+        if start is not None:
+            in_range &= panel.dates >= np.datetime64(pd.Timestamp(start), 'ns')
+        if end is not None:
+            in_range &= panel.dates <= np.datetime64(pd.Timestamp(end), 'ns')
+        rows, bars, patterns = np.nonzero((signals != 0) & in_range[..., None])
+        sign = np.sign(signals[rows, bars, patterns]).astype(np.int8)
+        entry = close[rows, bars]
+
+        frames = []
+        for horizon in self.horizons:
+            exit_close = np.full(close.shape, np.nan)
+            exit_close[:, :-horizon] = close[:, horizon:]
+            signed_return = (exit_close[rows, bars] / entry - 1) * sign
+            worst_low = _window_extreme(low, horizon, np.min)[rows, bars]
+            worst_high = _window_extreme(high, horizon, np.max)[rows, bars]
+            drawdown = np.minimum(np.where(sign > 0, worst_low / entry - 1, 1 - worst_high / entry), 0)
+
+            complete = np.isfinite(signed_return)
+            frames.append(pd.DataFrame({
+                'Row': rows[complete],
+                'PatternId': patterns[complete],
+                'Sign': sign[complete],
+                'Horizon': horizon,
+                'Return': signed_return[complete],
+                'Hit': signed_return[complete] > 0,
+                'Drawdown': drawdown[complete],
+            }))
+
+        events = pd.concat(frames, ignore_index=True)
+        grouped = events.groupby(['Row', 'PatternId', 'Sign', 'Horizon'], sort=False)
+        sums = grouped.agg(Events=('Return', 'size'), ReturnSum=('Return', 'sum'), Hits=('Hit', 'sum'),
+                           DrawdownSum=('Drawdown', 'sum'), MaxDrawdown=('Drawdown', 'min')).reset_index()
+        sums.insert(0, 'Symbol', panel.symbols[sums.pop('Row').to_numpy()])
+        return sums
+
+    def run(self, symbols=None, start=None, end=None, by_symbol=False, workers=1, chunksize=None):
+        """
+        Evaluate every pattern hit between start and end.
+
+        Bars after end are still used as exit bars, so the last hits inside
+        the range get complete forward returns whenever the store has them;
+        hits whose horizon runs past the latest bar are left out.
+
+        :param symbols: Symbols to include; None uses the whole store.
+        :param start: First signal date (inclusive).
+        :param end: Last signal date (inclusive).
+        :param by_symbol: Also break the statistics down by symbol.
+        :param workers: Worker processes; None uses every CPU (see batch_runner.run_batch).
+        :param chunksize: Symbol chunks per task handed to a worker.
+        :return: DataFrame with Pattern, Direction, Horizon, [Symbol], Events,
+                 AvgReturn, HitRate, AvgDrawdown and MaxDrawdown.
+                 attrs holds the batch summary and the elapsed time.
+        """
+        started = time.perf_counter()
+        symbols = self.store.symbols() if symbols is None else list(symbols)
+        tasks = [(symbols[i:i + self.symbols_per_task], start, end)
+                 for i in range(0, len(symbols), self.symbols_per_task)]
+        summary = run_batch(self._backtest_chunk, tasks, workers, chunksize)
+        if summary.failures:
+            logging.warning(f"⚠️ Some backtest chunks failed:\n{summary.report()}")
+
+        keys = ['Pattern', 'Direction', 'Horizon'] + (['Symbol'] if by_symbol else [])
+        parts = [result for _, result in summary.results]
+        if not parts or not sum(len(part) for part in parts):
+            result = pd.DataFrame(columns=keys + STAT_COLUMNS)
+        else:
+            sums = pd.concat(parts, ignore_index=True)
+            sums['Pattern'] = np.asarray(list(self.single_candle_patterns), dtype=object)[sums['PatternId'].to_numpy()]
+            sums['Direction'] = np.where(sums['Sign'] > 0, 'bullish', 'bearish')
+            result = sums.groupby(keys, sort=True).agg(
+                **{column: (column, 'sum') for column in SUM_COLUMNS}, MaxDrawdown=('MaxDrawdown', 'min'))
+            result = result.reset_index()
+            result['AvgReturn'] = result.pop('ReturnSum') / result['Events']
+            result['HitRate'] = result.pop('Hits') / result['Events']
+            result['AvgDrawdown'] = result.pop('DrawdownSum') / result['Events']
+            result = result[keys + STAT_COLUMNS]
+
+        result.attrs['batch'] = summary
+        result.attrs['elapsed'] = time.perf_counter() - started
+        return result
@@ -0,0 +1,63 @@
+import json
+import numpy as np
+
+
+class PatternCodec:
+    def __init__(self, pattern_names):
+        """
+        Compact integer encoding of the patterns detected on each bar.
+
+        Bit i of a pattern mask is set when pattern_names[i] fired on the bar;
+        the same bit in the bearish mask is set when its signal was negative.
+        Masks are computed with one matrix product over the stacked CDL*
+        outputs, and names are only materialised when someone asks for them.
+
+        :param pattern_names: Ordered pattern names; at most 63 fit an int64 mask.
+        """
+        self.pattern_names = tuple(pattern_names)
+        if len(self.pattern_names) > 63:
+            raise ValueError("At most 63 patterns fit in an int64 mask")
+        self.bits = np.left_shift(np.int64(1), np.arange(len(self.pattern_names), dtype=np.int64))
+        self._names_cache = {}
+
+    def encode(self, pattern_matrix):
+        """
+        Encode a (bars x patterns) matrix of CDL* outputs.
+
+        :param pattern_matrix: Integer array, one column per pattern in pattern_names order.
+        :return: (pattern_mask, bearish_mask) int64 arrays, one entry per bar.
+        """
+        values = np.asarray(pattern_matrix)
+        return (values != 0) @ self.bits, (values < 0) @ self.bits
+
+    def names(self, mask):
+        """
+        Pattern names set in a single mask, in pattern_names order.
+        """
+        mask = int(mask)
+        names = self._names_cache.get(mask)
+        if names is None:
+            names = [name for name, bit in zip(self.pattern_names, self.bits.tolist()) if mask & bit]
+            self._names_cache[mask] = names
+        return names
+
+    def directions(self, mask, bearish_mask):
+        """
+        (name, 'bullish' | 'bearish') pairs for a single bar.
+        """
+        bearish = set(self.names(bearish_mask))
+        return [(name, 'bearish' if name in bearish else 'bullish') for name in self.names(mask)]
+
+    def to_json(self, masks):
+        """
+        JSON list export of the pattern names, e.g. '["Doji", "SpinningTop"]'.
+
+        Each distinct mask is decoded once, so the cost is bounded by the
+        number of distinct pattern combinations rather than the number of bars.
+
+        :param masks: Array of pattern masks.
+        :return: Object array of JSON strings aligned with masks.
+        """
+        uniques, inverse = np.unique(np.asarray(masks, dtype=np.int64), return_inverse=True)
+        encoded = np.array([json.dumps(self.names(mask)) for mask in uniques], dtype=object)
+        return encoded[inverse.reshape(-1)]
@@ -0,0 +1,116 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from .batch_runner import run_batch
+from .image_sink import DirectorySink
+from .pattern_engine import get_engine
+
+
+class DrawPatternImage:
+
+    def __init__(self, input_directory, output_directory, store=None, engine='auto', sink=None):
+        """
+        :param input_directory: Directory of per-symbol CSV files.
+        :param output_directory: Directory the chart images are written to.
+        :param store: Optional SymbolStore (see symbol_store.py) to read bars from
+                      instead of parsing the CSVs in input_directory.
+        :param engine: Pattern engine: 'talib', 'numpy' or 'auto' (see pattern_engine.get_engine).
+        :param sink: Optional ImageSink (see image_sink.py); defaults to a
+                     DirectorySink on output_directory.
+        """
+        self.input_directory = input_directory
+        self.output_directory = output_directory
+        self.store = store
+        self.sink = sink if sink is not None else DirectorySink(output_directory)
+
+        self.engine = get_engine(engine)
+        self.single_candle_patterns = self.engine.patterns
+
+    def list_files_in_directory(self):
+        return sorted(os.path.join(dirpath, filename)
+                      for dirpath, _, filenames in os.walk(self.input_directory)
+                      for filename in filenames)
+
+    def compute_patterns(self, df):
+        pattern_values = self.engine.compute(
+            df['Open'].values, df['High'].values,
+            df['Low'].values, df['Close'].values
+        )
+        return pd.DataFrame(pattern_values, index=df.index)
+
+    def _generate_candle_plot(self, df, base_name, pattern_df):
+        # Plotting libraries are only loaded by runs that draw charts.
+        import matplotlib
+        matplotlib.use('Agg', force=True)
+        import matplotlib.pyplot as plt
+        import mplfinance as mpf
+
+        image_name = f"{os.path.splitext(base_name)[0]}.png"
+        apds = []
+
+        for pattern in self.single_candle_patterns:
+            if pattern not in pattern_df.columns:
+                continue  # Skip if column doesn't exist
+
+            series = pattern_df[pattern]
+            bullish = series > 0
+            bearish = series < 0
+
+            # Bullish markers (addplot data must span every bar; NaN means no marker)
+            if bullish.any():
+                y_bull = df['High'].where(bullish, np.nan) * 1.005
+                apds.append(mpf.make_addplot(y_bull, type='scatter', markersize=100,
+                                            marker='^', color='lime'))
+
+            # Bearish markers
+            if bearish.any():
+                y_bear = df['Low'].where(bearish, np.nan) * 0.995
+                apds.append(mpf.make_addplot(y_bear, type='scatter', markersize=100,
+                                            marker='v', color='red'))
+
+        if apds:
+            fig, _ = mpf.plot(df, type='candle', addplot=apds, style='yahoo',
+                              title=base_name, figsize=(16, 8), volume=False, returnfig=True)
+            try:
+                image_path = self.sink.save_figure(fig, image_name, dpi=100)
+            finally:
+                plt.close(fig)
+            logging.debug(f"Chart saved to {image_path}")
+            return image_path
+
+        logging.debug(f"No patterns detected for {base_name}, skipping plot.")
+        return None
+
+    def process_symbol(self, symbol):
+        df = self.store.load_symbol(symbol).set_index('Date')
+        pattern_df = self.compute_patterns(df)
+        return self._generate_candle_plot(df, f"{symbol}.csv".lower(), pattern_df)
+
+    def process_file(self, file_path):
+        # Read CSV file
+        df = pd.read_csv(file_path, parse_dates=True, index_col=0)
+        # Compute patterns
+        pattern_df = self.compute_patterns(df)
+        # Generate base name from file path
+        base_name = os.path.basename(file_path)
+        # Generate plot
+        return self._generate_candle_plot(df, base_name, pattern_df)
+
+    def process_all_files(self, workers=1, chunksize=None):
+        """
+        Chart every input file (or every store symbol).
+
+        :param workers: Worker processes; None uses every CPU (see batch_runner.run_batch).
+        :param chunksize: Files per task handed to a worker.
+        :return: BatchSummary with per-file failures.
+        """
+        if workers != 1 and not self.sink.shareable:
+            raise ValueError(f"{type(self.sink).__name__} can only be written from one process; use workers=1")
+        if self.store is not None:
+            summary = run_batch(self.process_symbol, self.store.symbols(), workers, chunksize)
+        else:
+            summary = run_batch(self.process_file, self.list_files_in_directory(), workers, chunksize)
+        self.sink.close()
+        logging.info(f"🖼️ Charts:\n{summary.report()}")
+        return summary
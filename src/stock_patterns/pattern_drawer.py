@@ -0,0 +1,218 @@
+import pandas as pd
+import base64
+import json
+import os
+from .batch_runner import BatchSummary
+from .chart_renderer import ChartJob, render_charts
+from .image_sink import DirectorySink
+from .image_manifest import ImageManifest
+from .metrics import METRICS
+from .pattern_codec import PatternCodec
+from .pattern_engine import PATTERN_FUNCTIONS
+from .render_cache import RenderCache, read_location
+
+# Function to list files in a directory
+def list_files_in_directory(directory):
+    full_paths = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            full_paths.append(full_path)
+    return full_paths
+
+# Columns of the pattern CSVs the charts need; the others are never read.
+# Files written with `detect --format mask` have PatternMask instead of Patterns.
+CHART_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Patterns', 'PatternMask']
+
+# Candles drawn before a hit.
+WINDOW_BARS = 20
+
+# Render cache manifest kept next to the images (see render_cache.RenderCache).
+RENDER_CACHE_FILE = 'render_cache.json'
+
+
+# Function to safely load JSON from the 'Patterns' column
+def safe_json_loads(pattern):
+    try:
+        return json.loads(pattern)
+    except (json.JSONDecodeError, TypeError):
+        return []  # Return an empty list for invalid JSON
+
+
+def read_hit_patterns(df, source):
+    """
+    Pattern names of the rows of a pattern CSV that have any, by row position.
+
+    Reads the Patterns JSON column, or decodes PatternMask (see PatternCodec,
+    bits in PATTERN_FUNCTIONS order) for files written with only the masks.
+    """
+    if 'Patterns' in df.columns:
+        raw = df['Patterns']
+        candidates = (raw.notna() & (raw != '[]')).to_numpy().nonzero()[0]
+        return {pos: safe_json_loads(raw.iat[pos]) for pos in candidates}
+    if 'PatternMask' in df.columns:
+        codec = PatternCodec(PATTERN_FUNCTIONS)
+        masks = df['PatternMask'].fillna(0).to_numpy(dtype='int64')
+        return {pos: codec.names(masks[pos]) for pos in masks.nonzero()[0]}
+    raise ValueError(f"{source}: neither a Patterns nor a PatternMask column; is it a detect output?")
+
+
+def cluster_hits(positions, window=WINDOW_BARS, max_chart_bars=None):
+    """
+    Group hit row positions (ascending) whose chart windows overlap.
+
+    A hit's window is the `window` candles before it plus the hit itself, so
+    two hits overlap when they are at most `window` rows apart. A group is
+    closed once its chart would exceed max_chart_bars candles; None never
+    merges, giving one group per hit.
+
+    :return: List of lists of positions.
+    """
+    groups = []
+    for pos in positions:
+        if groups and max_chart_bars is not None:
+            group = groups[-1]
+            if pos - window <= group[-1] and pos - max(0, group[0] - window) + 1 <= max_chart_bars:
+                group.append(pos)
+                continue
+        groups.append([pos])
+    return groups
+
+
+# Main function to annotate patterns in charts
+def annotate_patterns_in_charts(input_directory=r"D:\image", output_csv=r"D:\database_final\output_with_images.csv",
+                                image_save_directory=r"D:\pattern_images", workers=1, sink=None, embed_base64=False,
+                                batch_size=2000, cache=True, max_chart_bars=3 * WINDOW_BARS):
+    """
+    Render a snapshot for every pattern hit in the pattern CSVs.
+
+    Images go to `sink` (see image_sink.py), by default a DirectorySink on
+    image_save_directory. Which image shows each hit is recorded in the
+    output_csv manifest (see image_manifest.ImageManifest): Symbol, Date,
+    Patterns and Pattern_Image, plus Pattern_Image_Base64 with
+    embed_base64=True.
+
+    Files are read one at a time, only the columns the charts need are
+    parsed, and only rows that have patterns get their JSON (or, for
+    `detect --format mask` output, their PatternMask) decoded. Charts are
+    rendered whenever batch_size snapshots are queued, so memory is
+    bounded by the batch rather than by the number of files. The manifest
+    rows of every rendered batch are committed at once, so an interrupted
+    run resumes where it stopped: hits already in the manifest with their
+    image in place are skipped.
+
+    Hits of a symbol whose windows overlap share one chart annotating all
+    of them (see cluster_hits), and charts already rendered with the same
+    content (see ChartJob.content_key) are reused from the render cache
+    instead of being drawn again, so a rerun only draws the charts of new hits.
+
+    :param output_csv: Hit -> image manifest; None keeps no manifest.
+    :param cache: Render cache manifest path; True keeps it in image_save_directory
+                  as RENDER_CACHE_FILE, False renders every chart.
+    :param max_chart_bars: Most candles in a chart covering several hits; None draws one chart per hit.
+    :return: BatchSummary of the charts, with the cached (reused from the render
+             cache) and resumed (skipped as already in the manifest) counts.
+    """
+    all_files = list_files_in_directory(input_directory)
+
+    if sink is None:
+        sink = DirectorySink(image_save_directory)  # Creates the directory if it does not exist
+    if cache is True:
+        cache = os.path.join(image_save_directory, RENDER_CACHE_FILE)
+    render_cache = RenderCache(cache) if cache else None
+    manifest = ImageManifest(output_csv, embed_base64) if output_csv else None
+
+    names, outcomes, elapsed, resumed = [], [], 0.0, 0
+    jobs, job_hits, job_keys, queued = [], [], [], {}
+
+    def record(hits, location, image_base64=None):
+        if manifest is not None:
+            if embed_base64 and not image_base64:
+                image_base64 = base64.b64encode(read_location(location)).decode('utf-8')
+            for symbol, date, patterns in hits:
+                manifest.add(symbol, date, patterns, location, image_base64)
+
+    def flush():
+        # Render the queued snapshots on a pool of Agg renderers, then record the images in one commit.
+        nonlocal elapsed
+        if jobs:
+            batch = render_charts(jobs, sink, workers=workers)
+            # The images must be complete on disk before the cache or manifest points at them.
+            sink.flush()
+            names.extend(job.name for job in jobs)
+            outcomes.extend(batch.outcomes)
+            elapsed += batch.elapsed
+            for job, hits, key, (ok, result) in zip(jobs, job_hits, job_keys, batch.outcomes):
+                if ok:
+                    record(hits, result, sink.as_base64(job.name) if embed_base64 else None)
+                    if render_cache is not None:
+                        render_cache.put(key, result)
+            if render_cache is not None:
+                render_cache.save()
+        if manifest is not None:
+            manifest.commit()
+        jobs.clear()
+        job_hits.clear()
+        job_keys.clear()
+        queued.clear()
+
+    for input_csv in all_files:
+        df = pd.read_csv(input_csv, usecols=lambda column: column in CHART_COLUMNS)
+
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+        df.sort_values(by='Date', inplace=True)
+        df.set_index('Date', inplace=True)
+
+        patterns = read_hit_patterns(df, input_csv)
+        company_name = df['Symbol'].iat[0] if 'Symbol' in df.columns and len(df) else 'Unknown'
+
+        hits = [pos for pos, pattern_list in patterns.items() if pattern_list]
+        for group in cluster_hits(hits, WINDOW_BARS, max_chart_bars):
+            group_hits = [(company_name, f"{df.index[pos]:%Y-%m-%d}", json.dumps(patterns[pos])) for pos in group]
+            if manifest is not None:
+                done = [manifest.done(*hit) for hit in group_hits]
+                if all(done) and len({entry[1] for entry in done}) == 1:
+                    # Rendered by an earlier (possibly interrupted) run.
+                    resumed += 1
+                    continue
+
+            first, last = group[0], group[-1]
+            lo = max(0, first - WINDOW_BARS)
+            ohlc_data = df.iloc[lo:last + 1][['Open', 'High', 'Low', 'Close']].astype(float)
+
+            # Construct image filename
+            if len(group) == 1:
+                pattern_names = "_".join(patterns[last]).replace(" ", "_")
+                image_filename = f"{company_name}_{df.index[last]:%Y-%m-%d}_{pattern_names}.png"
+            else:
+                image_filename = f"{company_name}_{df.index[first]:%Y-%m-%d}_to_{df.index[last]:%Y-%m-%d}.png"
+
+            job = ChartJob(ohlc_data, patterns[last], image_filename,
+                           marks=[(pos - lo, patterns[pos]) for pos in group])
+            key = job.content_key() if render_cache is not None else None
+            location = render_cache.get(key) if render_cache is not None else None
+            if location is not None:
+                record(group_hits, location)
+                names.append(image_filename)
+                outcomes.append((True, location))
+            elif key is not None and key in queued:
+                job_hits[queued[key]].extend(group_hits)
+            else:
+                if key is not None:
+                    queued[key] = len(jobs)
+                jobs.append(job)
+                job_hits.append(group_hits)
+                job_keys.append(key)
+
+        if len(jobs) >= batch_size:
+            flush()
+    flush()
+    if manifest is not None:
+        manifest.finalize()
+
+    summary = BatchSummary(names, outcomes, elapsed, workers)
+    summary.cached = render_cache.hits if render_cache is not None else 0
+    summary.resumed = resumed
+    METRICS.incr('charts_cached', summary.cached)
+    sink.close()
+    return summary
@@ -0,0 +1,392 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Pattern name -> TA-Lib function name, in the order used by the detectors and the PatternCodec bits.
+PATTERN_FUNCTIONS = {
+    'Engulfing': 'CDLENGULFING',
+    'Hammer': 'CDLHAMMER',
+    'InvertedHammer': 'CDLINVERTEDHAMMER',
+    'ShootingStar': 'CDLSHOOTINGSTAR',
+    'Doji': 'CDLDOJI',
+    'DragonflyDoji': 'CDLDRAGONFLYDOJI',
+    'GravestoneDoji': 'CDLGRAVESTONEDOJI',
+    'PiercingLine': 'CDLPIERCING',
+    'DarkCloudCover': 'CDLDARKCLOUDCOVER',
+    'SpinningTop': 'CDLSPINNINGTOP',
+    'Marubozu': 'CDLMARUBOZU',
+    'AbandonedBaby': 'CDLABANDONEDBABY',
+    'CounterAttack': 'CDLCOUNTERATTACK',
+    'HangingMan': 'CDLHANGINGMAN',
+}
+
+# TA-Lib default candle settings: (range type, averaging period, factor).
+CANDLE_SETTINGS = {
+    'BodyLong': ('RealBody', 10, 1.0),
+    'BodyShort': ('RealBody', 10, 1.0),
+    'BodyDoji': ('HighLow', 10, 0.1),
+    'ShadowLong': ('RealBody', 0, 1.0),
+    'ShadowVeryShort': ('HighLow', 10, 0.1),
+    'Near': ('HighLow', 5, 0.2),
+    'Equal': ('HighLow', 5, 0.05),
+}
+
+
+class Candles:
+    def __init__(self, open_, high, low, close):
+        """
+        Candle geometry shared by the NumPy kernels.
+
+        Inputs may be 1-D (days) or 2-D (symbols x days); time is always the
+        last axis. Rows may be left-padded with NaN, which never matches.
+        """
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.body = np.abs(self.close - self.open)
+        self.upper = self.high - np.maximum(self.open, self.close)
+        self.lower = np.minimum(self.open, self.close) - self.low
+        self.range = self.high - self.low
+        self.color = np.where(self.close >= self.open, 1, -1)
+        self.first_valid = np.argmax(np.isfinite(self.close), axis=-1)
+        self._averages = {}
+        self._shifted = {}
+        self._ready = {}
+
+    def shift(self, values, n):
+        """Values of bar i - n at position i (NaN before the start)."""
+        if n == 0:
+            return values
+        out = np.full(values.shape, np.nan if values.dtype.kind == 'f' else 0, dtype=values.dtype)
+        out[..., n:] = values[..., :-n]
+        return out
+
+    def _range_of(self, range_type):
+        if range_type == 'RealBody':
+            return self.body
+        if range_type == 'HighLow':
+            return self.range
+        return self.upper + self.lower
+
+    def average(self, setting, n=0):
+        """
+        TA-Lib's TA_CANDLEAVERAGE for bar i - n: the setting's range averaged
+        over the `period` bars before that bar, times the setting's factor.
+        """
+        key = (setting, n)
+        if key not in self._averages:
+            range_type, period, factor = CANDLE_SETTINGS[setting]
+            values = self._range_of(range_type)
+            if period == 0:
+                average = values
+            else:
+                average = np.full(values.shape, np.nan)
+                if values.shape[-1] > period:
+                    window_sums = sliding_window_view(values, period, axis=-1).sum(axis=-1)
+                    average[..., period:] = window_sums[..., :-1] / period
+            average = factor * average
+            if range_type == 'Shadows':
+                average = average / 2.0
+            self._averages[key] = self.shift(average, n)
+        return self._averages[key]
+
+    def at(self, values, n):
+        """Cached shift of one of the candle arrays (open, close, body, ...)."""
+        key = (id(values), n)
+        if key not in self._shifted:
+            self._shifted[key] = self.shift(values, n)
+        return self._shifted[key]
+
+    def output(self, signal, lookback):
+        """Zero the first `lookback` bars after each row's first valid bar, as TA-Lib does."""
+        if lookback not in self._ready:
+            days = np.arange(self.close.shape[-1])
+            self._ready[lookback] = days >= np.expand_dims(self.first_valid, -1) + lookback
+        return np.where(self._ready[lookback], signal, 0).astype(np.int32)
+
+
+def _engulfing(k):
+    o1, c1, color1 = k.at(k.open, 1), k.at(k.close, 1), k.at(k.color, 1)
+    bullish = (k.color == 1) & (color1 == -1) & (
+        ((k.close >= o1) & (k.open < c1)) | ((k.close > o1) & (k.open <= c1)))
+    bearish = (k.color == -1) & (color1 == 1) & (
+        ((k.open >= c1) & (k.close < o1)) | ((k.open > c1) & (k.close <= o1)))
+    full = (k.open != c1) & (k.close != o1)
+    signal = np.where(bullish | bearish, np.where(full, 100, 80) * k.color, 0)
+    return k.output(signal, 2)
+
+
+def _hammer(k):
+    hit = ((k.body < k.average('BodyShort'))
+           & (k.lower > k.average('ShadowLong'))
+           & (k.upper < k.average('ShadowVeryShort'))
+           & (np.minimum(k.open, k.close) <= k.at(k.low, 1) + k.average('Near', 1)))
+    return k.output(np.where(hit, 100, 0), 11)
+
+
+def _hangingman(k):
+    hit = ((k.body < k.average('BodyShort'))
+           & (k.lower > k.average('ShadowLong'))
+           & (k.upper < k.average('ShadowVeryShort'))
+           & (np.minimum(k.open, k.close) >= k.at(k.high, 1) - k.average('Near', 1)))
+    return k.output(np.where(hit, -100, 0), 11)
+
+
+def _invertedhammer(k):
+    gap_down = np.maximum(k.open, k.close) < np.minimum(k.at(k.open, 1), k.at(k.close, 1))
+    hit = ((k.body < k.average('BodyShort'))
+           & (k.upper > k.average('ShadowLong'))
+           & (k.lower < k.average('ShadowVeryShort'))
+           & gap_down)
+    return k.output(np.where(hit, 100, 0), 11)
+
+
+def _shootingstar(k):
+    gap_up = np.minimum(k.open, k.close) > np.maximum(k.at(k.open, 1), k.at(k.close, 1))
+    hit = ((k.body < k.average('BodyShort'))
+           & (k.upper > k.average('ShadowLong'))
+           & (k.lower < k.average('ShadowVeryShort'))
+           & gap_up)
+    return k.output(np.where(hit, -100, 0), 11)
+
+
+def _doji(k):
+    hit = k.body <= k.average('BodyDoji')
+    return k.output(np.where(hit, 100, 0), 10)
+
+
+def _dragonflydoji(k):
+    hit = ((k.body <= k.average('BodyDoji'))
+           & (k.upper < k.average('ShadowVeryShort'))
+           & (k.lower > k.average('ShadowVeryShort')))
+    return k.output(np.where(hit, 100, 0), 10)
+
+
+def _gravestonedoji(k):
+    hit = ((k.body <= k.average('BodyDoji'))
+           & (k.lower < k.average('ShadowVeryShort'))
+           & (k.upper > k.average('ShadowVeryShort')))
+    return k.output(np.where(hit, 100, 0), 10)
+
+
+def _piercing(k):
+    o1, l1, c1, body1 = k.at(k.open, 1), k.at(k.low, 1), k.at(k.close, 1), k.at(k.body, 1)
+    hit = ((k.at(k.color, 1) == -1)
+           & (body1 > k.average('BodyLong', 1))
+           & (k.color == 1)
+           & (k.body > k.average('BodyLong'))
+           & (k.open < l1)
+           & (k.close < o1)
+           & (k.close > c1 + body1 * 0.5))
+    return k.output(np.where(hit, 100, 0), 11)
+
+
+def _darkcloudcover(k, penetration=0.5):
+    o1, h1, c1, body1 = k.at(k.open, 1), k.at(k.high, 1), k.at(k.close, 1), k.at(k.body, 1)
+    hit = ((k.at(k.color, 1) == 1)
+           & (body1 > k.average('BodyLong', 1))
+           & (k.color == -1)
+           & (k.open > h1)
+           & (k.close > o1)
+           & (k.close < c1 - body1 * penetration))
+    return k.output(np.where(hit, -100, 0), 11)
+
+
+def _spinningtop(k):
+    hit = (k.body < k.average('BodyShort')) & (k.upper > k.body) & (k.lower > k.body)
+    return k.output(np.where(hit, 100 * k.color, 0), 10)
+
+
+def _marubozu(k):
+    hit = ((k.body > k.average('BodyLong'))
+           & (k.upper < k.average('ShadowVeryShort'))
+           & (k.lower < k.average('ShadowVeryShort')))
+    return k.output(np.where(hit, 100 * k.color, 0), 10)
+
+
+def _abandonedbaby(k, penetration=0.3):
+    c2, body2, color2 = k.at(k.close, 2), k.at(k.body, 2), k.at(k.color, 2)
+    h2, l2 = k.at(k.high, 2), k.at(k.low, 2)
+    h1, l1 = k.at(k.high, 1), k.at(k.low, 1)
+    shape = ((body2 > k.average('BodyLong', 2))
+             & (k.at(k.body, 1) <= k.average('BodyDoji', 1))
+             & (k.body > k.average('BodyShort')))
+    bearish = ((color2 == 1) & (k.color == -1)
+               & (k.close < c2 - body2 * penetration)
+               & (l1 > h2) & (k.high < l1))
+    bullish = ((color2 == -1) & (k.color == 1)
+               & (k.close > c2 + body2 * penetration)
+               & (h1 < l2) & (k.low > h1))
+    return k.output(np.where(shape & (bearish | bullish), 100 * k.color, 0), 12)
+
+
+def _counterattack(k):
+    c1, equal1 = k.at(k.close, 1), k.average('Equal', 1)
+    hit = ((k.at(k.color, 1) == -k.color)
+           & (k.at(k.body, 1) > k.average('BodyLong', 1))
+           & (k.body > k.average('BodyLong'))
+           & (k.close <= c1 + equal1)
+           & (k.close >= c1 - equal1))
+    return k.output(np.where(hit, 100 * k.color, 0), 11)
+
+
+# Kernels take a Candles object so that compute() can share the candle
+# geometry and rolling averages across all patterns.
+NUMPY_KERNELS = {
+    'Engulfing': _engulfing,
+    'Hammer': _hammer,
+    'InvertedHammer': _invertedhammer,
+    'ShootingStar': _shootingstar,
+    'Doji': _doji,
+    'DragonflyDoji': _dragonflydoji,
+    'GravestoneDoji': _gravestonedoji,
+    'PiercingLine': _piercing,
+    'DarkCloudCover': _darkcloudcover,
+    'SpinningTop': _spinningtop,
+    'Marubozu': _marubozu,
+    'AbandonedBaby': _abandonedbaby,
+    'CounterAttack': _counterattack,
+    'HangingMan': _hangingman,
+}
+
+
+class OhlcPatternFunction:
+    def __init__(self, kernel):
+        """
+        Wraps a kernel with the TA-Lib calling convention f(open, high, low, close).
+        A class rather than a closure so engines stay picklable for process pools.
+        """
+        self.kernel = kernel
+        self.__name__ = 'cdl' + kernel.__name__
+
+    def __call__(self, open_, high, low, close):
+        return self.kernel(Candles(open_, high, low, close))
+
+
+NUMPY_LOOKBACKS = {
+    'Engulfing': 2, 'Hammer': 11, 'InvertedHammer': 11, 'ShootingStar': 11,
+    'Doji': 10, 'DragonflyDoji': 10, 'GravestoneDoji': 10, 'PiercingLine': 11,
+    'DarkCloudCover': 11, 'SpinningTop': 10, 'Marubozu': 10, 'AbandonedBaby': 12,
+    'CounterAttack': 11, 'HangingMan': 11,
+}
+
+
+class PatternEngine:
+    """
+    Evaluates the single-candle patterns on OHLC arrays.
+
+    `patterns` maps each pattern name to a function f(open, high, low, close)
+    with the TA-Lib CDL* calling convention, so it can stand in for the
+    detectors' single_candle_patterns dict. compute() evaluates all patterns
+    at once on 1-D (days) or 2-D (symbols x days) arrays.
+    """
+    name = None
+    patterns = {}
+    lookbacks = {}
+
+    @property
+    def lookback(self):
+        """Bars needed before a bar to score it with every pattern."""
+        return max(self.lookbacks.values())
+
+    def compute(self, open_, high, low, close):
+        """
+        :return: dict of pattern name -> int32 array shaped like the inputs.
+        """
+        raise NotImplementedError
+
+    def compute_matrix(self, open_, high, low, close):
+        """
+        :return: int32 array of shape inputs.shape + (patterns,), in `patterns` order.
+        """
+        results = self.compute(open_, high, low, close)
+        return np.stack([results[name] for name in self.patterns], axis=-1)
+
+
+class NumpyEngine(PatternEngine):
+    name = 'numpy'
+
+    def __init__(self):
+        """
+        Pure NumPy re-implementation of the TA-Lib candle functions with the
+        default candle settings; no TA-Lib install required.
+        """
+        self.kernels = dict(NUMPY_KERNELS)
+        self.patterns = {name: OhlcPatternFunction(kernel) for name, kernel in self.kernels.items()}
+        self.lookbacks = dict(NUMPY_LOOKBACKS)
+
+    def compute(self, open_, high, low, close):
+        candles = Candles(open_, high, low, close)
+        return {name: kernel(candles) for name, kernel in self.kernels.items()}
+
+
+class TalibEngine(PatternEngine):
+    name = 'talib'
+
+    def __init__(self):
+        """
+        The TA-Lib CDL* functions. 2-D inputs are evaluated row by row, with
+        each row's leading NaN padding trimmed before the call.
+        """
+        import talib
+        import talib.abstract
+
+        self.patterns = {name: getattr(talib, func_name) for name, func_name in PATTERN_FUNCTIONS.items()}
+        self.lookbacks = {name: talib.abstract.Function(func_name).lookback
+                          for name, func_name in PATTERN_FUNCTIONS.items()}
+
+    def compute(self, open_, high, low, close):
+        arrays = [np.asarray(values, dtype=np.float64) for values in (open_, high, low, close)]
+        if arrays[0].ndim == 1:
+            return {name: func(*arrays) for name, func in self.patterns.items()}
+
+        results = {name: np.zeros(arrays[0].shape, dtype=np.int32) for name in self.patterns}
+        for row in range(arrays[0].shape[0]):
+            valid = np.isfinite(arrays[3][row])
+            if not valid.any():
+                continue
+            first = np.argmax(valid)
+            row_arrays = [values[row, first:] for values in arrays]
+            for name, func in self.patterns.items():
+                results[name][row, first:] = func(*row_arrays)
+        return results
+
+
+ENGINES = {
+    'numpy': NumpyEngine,
+    'talib': TalibEngine,
+}
+
+
+def get_engine(engine='auto'):
+    """
+    Resolve an engine name (or pass an engine instance through).
+
+    :param engine: 'talib', 'numpy', a PatternEngine, or 'auto' for TA-Lib when
+                   it is installed and the NumPy engine otherwise.
+    """
+    if isinstance(engine, PatternEngine):
+        return engine
+    if engine == 'auto':
+        try:
+            return TalibEngine()
+        except ImportError:
+            return NumpyEngine()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown pattern engine {engine!r}; expected one of {sorted(ENGINES)} or 'auto'")
+    return ENGINES[engine]()
+
+
+def check_parity(open_, high, low, close, reference='talib', candidate='numpy'):
+    """
+    Compare two engines on the same bars.
+
+    Differences should only come from floating-point ties in the rolling
+    candle averages (TA-Lib keeps running sums, the NumPy engine sums each
+    window), which are vanishingly rare on real prices.
+
+    :return: dict of pattern name -> number of bars where the engines disagree.
+    """
+    expected = get_engine(reference).compute(open_, high, low, close)
+    actual = get_engine(candidate).compute(open_, high, low, close)
+    return {name: int(np.count_nonzero(expected[name] != actual[name])) for name in expected}
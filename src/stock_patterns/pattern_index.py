@@ -0,0 +1,278 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+# Postings are int64 keys (symbol_id << 32) | (day + DAY_BIAS), so sorting the
+# keys sorts by (symbol, date) and a symbol's date range is one contiguous slice.
+DAY_BIAS = 1 << 31
+DAY_MASK = (1 << 32) - 1
+
+QUERY_COLUMNS = ['Symbol', 'Date', 'Pattern', 'Direction']
+
+
+def _days(dates):
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _day(date, default):
+    return default if date is None else int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
+
+
+class PatternIndex:
+    def __init__(self, root, pattern_names=None):
+        """
+        Persistent inverted index of pattern hits: pattern -> sorted (symbol, date) postings.
+
+        Layout under root:
+            postings/meta.json          pattern names, symbols (a symbol's id is its position) and
+                                        the bar fingerprint each symbol was indexed with
+            postings/<Pattern>.npy      sorted int64 (symbol, date) keys of the pattern's hits
+            postings/<Pattern>.bear.npy True where the hit was bearish
+
+        Detection adds hits with add(); they are buffered in memory and merged
+        into the postings by flush(), which rewrites the postings directory
+        and swaps it in, so a crash mid-write leaves the previous index intact.
+        Queries memory-map the postings and only touch the requested slices,
+        never the per-symbol CSVs.
+
+        :param root: Index directory.
+        :param pattern_names: Pattern names in PatternCodec bit order; read from
+                              the index when None.
+        """
+        self.root = root
+        self.postings_dir = os.path.join(root, 'postings')
+        meta = self._load_meta()
+        self.pattern_names = tuple(meta['patterns']) if meta else None
+        self._symbols = list(meta['symbols']) if meta else []
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._fingerprints = dict(meta.get('fingerprints', {})) if meta else {}
+        self._postings = {}
+        self._pending = {}
+        if pattern_names is not None:
+            self.set_patterns(pattern_names)
+
+    def __getstate__(self):
+        # Pool workers get the configuration, not the memory maps or buffered hits.
+        state = self.__dict__.copy()
+        state['_postings'] = {}
+        state['_pending'] = {}
+        return state
+
+    def _load_meta(self):
+        path = os.path.join(self.postings_dir, 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def set_patterns(self, pattern_names):
+        """
+        Declare the pattern bit order of the masks passed to add().
+        """
+        pattern_names = tuple(pattern_names)
+        if self.pattern_names is not None and self.pattern_names != pattern_names:
+            raise ValueError(f"Index at {self.root} was built for patterns {list(self.pattern_names)}, "
+                             f"not {list(pattern_names)}")
+        self.pattern_names = pattern_names
+
+    def symbols(self):
+        return list(self._symbols)
+
+    def fingerprint(self, symbol):
+        """
+        Fingerprint of the bars symbol's hits were detected on (see
+        SymbolStore.fingerprint); '' when none was recorded. A symbol whose
+        store fingerprint differs must be re-added over its whole history.
+        """
+        return self._fingerprints.get(symbol, '')
+
+    # ---------- writing ----------
+
+    def add(self, symbol, dates, pattern_masks, bearish_masks, start=None, end=None, fingerprint=None):
+        """
+        Buffer the hits of one symbol.
+
+        :param symbol: Symbol the hits belong to.
+        :param dates: Bar dates.
+        :param pattern_masks: PatternMask per bar (see PatternCodec.encode); zero masks are ignored.
+        :param bearish_masks: BearishMask per bar.
+        :param start: With end, the date range these bars cover: existing hits of
+                      the symbol in [start, end] are replaced, so re-detecting a
+                      range never leaves stale or duplicate postings.
+        :param end: Last date covered (inclusive).
+        :param fingerprint: Fingerprint of the bars the hits were detected on, recorded
+                            for the symbol; pass it only when every stored hit of the
+                            symbol outside [start, end] was detected on the same bars.
+        """
+        if self.pattern_names is None:
+            raise ValueError("Call set_patterns() before adding hits to a new index")
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+        symbol_id = self._symbol_ids[symbol]
+        if fingerprint:
+            self._fingerprints[symbol] = fingerprint
+        elif fingerprint is not None:
+            self._fingerprints.pop(symbol, None)
+
+        masks = np.asarray(pattern_masks, dtype=np.int64)
+        hit = masks != 0
+        days = _days(np.asarray(dates)[hit])
+        batch = (days, masks[hit], np.asarray(bearish_masks, dtype=np.int64)[hit])
+
+        entry = self._pending.setdefault(symbol_id, {'batches': [], 'replace': []})
+        if start is not None and end is not None:
+            lo, hi = _day(start, None), _day(end, None)
+            entry['batches'] = [tuple(values[(b[0] < lo) | (b[0] > hi)] for values in b) for b in entry['batches']]
+            entry['replace'].append((lo, hi))
+        entry['batches'].append(batch)
+
+    def flush(self):
+        """
+        Merge the buffered hits into the on-disk postings.
+        """
+        if not self._pending:
+            return
+
+        ranges = [(symbol_id, lo, hi) for symbol_id, entry in self._pending.items() for lo, hi in entry['replace']]
+        replace = np.array(ranges, dtype=np.int64).reshape(-1, 3)
+        range_lo = (replace[:, 0] << 32) | (replace[:, 1] + DAY_BIAS)
+        range_hi = (replace[:, 0] << 32) | (replace[:, 2] + DAY_BIAS)
+
+        batches = [(np.full(len(days), symbol_id, dtype=np.int64), days, masks, bearish)
+                   for symbol_id, entry in self._pending.items() for days, masks, bearish in entry['batches']]
+        new_ids, new_days, new_masks, new_bearish = (
+            np.concatenate([batch[i] for batch in batches] + [np.empty(0, np.int64)]) for i in range(4))
+        new_keys = (new_ids << 32) | (new_days + DAY_BIAS)
+
+        postings = {}
+        for bit, pattern in enumerate(self.pattern_names):
+            keys, bear = self._load_postings(pattern)
+            keys, bear = np.asarray(keys), np.asarray(bear)
+
+            # Drop the replaced (symbol, date) ranges: +1 at each range start, -1 past its end.
+            if len(replace) and len(keys):
+                depth = np.zeros(len(keys) + 1, dtype=np.int64)
+                np.add.at(depth, np.searchsorted(keys, range_lo, 'left'), 1)
+                np.add.at(depth, np.searchsorted(keys, range_hi, 'right'), -1)
+                keep = np.cumsum(depth[:-1]) == 0
+                keys, bear = keys[keep], bear[keep]
+
+            fired = (new_masks >> bit) & 1 == 1
+            keys = np.concatenate([keys, new_keys[fired]])
+            bear = np.concatenate([bear, (new_bearish[fired] >> bit) & 1 == 1])
+
+            # Stable sort, then keep the newest posting of a duplicated key.
+            order = np.argsort(keys, kind='stable')
+            keys, bear = keys[order], bear[order]
+            last = np.ones(len(keys), dtype=bool)
+            last[:-1] = keys[1:] != keys[:-1]
+            postings[pattern] = (keys[last], bear[last])
+
+        self._write_postings(postings)
+        logging.info(f"✅ Indexed hits of {len(self._pending)} symbols into {self.postings_dir}")
+        self._pending.clear()
+
+    def _write_postings(self, postings):
+        # Same directory swap as NumpySymbolStore._write_base.
+        new_dir = self.postings_dir + '.new'
+        old_dir = self.postings_dir + '.old'
+        os.makedirs(new_dir, exist_ok=True)
+        for pattern, (keys, bear) in postings.items():
+            np.save(os.path.join(new_dir, f"{pattern}.npy"), keys)
+            np.save(os.path.join(new_dir, f"{pattern}.bear.npy"), bear)
+        with open(os.path.join(new_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'patterns': list(self.pattern_names), 'symbols': self._symbols,
+                       'fingerprints': self._fingerprints}, f)
+
+        self._postings = {}
+        if os.path.exists(self.postings_dir):
+            os.replace(self.postings_dir, old_dir)
+        os.replace(new_dir, self.postings_dir)
+        if os.path.exists(old_dir):
+            for name in os.listdir(old_dir):
+                os.remove(os.path.join(old_dir, name))
+            os.rmdir(old_dir)
+
+    # ---------- reading ----------
+
+    def _load_postings(self, pattern):
+        if pattern not in self._postings:
+            path = os.path.join(self.postings_dir, f"{pattern}.npy")
+            if os.path.exists(path):
+                self._postings[pattern] = (np.load(path, mmap_mode='r'),
+                                           np.load(os.path.join(self.postings_dir, f"{pattern}.bear.npy"),
+                                                   mmap_mode='r'))
+            else:
+                self._postings[pattern] = (np.empty(0, np.int64), np.empty(0, bool))
+        return self._postings[pattern]
+
+    def query(self, pattern=None, symbols=None, start=None, end=None, direction=None):
+        """
+        Hits matching every given filter, e.g.
+        index.query('Engulfing', symbols=banks, start='2024-01-01', end='2024-12-31').
+
+        Hits buffered since the last flush() are not visible.
+
+        :param pattern: Pattern name or list of names; None for all patterns.
+        :param symbols: Iterable of symbols; None for all symbols.
+        :param start: First date (inclusive).
+        :param end: Last date (inclusive).
+        :param direction: 'bullish' or 'bearish'; None for both.
+        :return: DataFrame with Symbol, Date, Pattern and Direction, sorted by Date and Symbol.
+        """
+        if direction not in (None, 'bullish', 'bearish'):
+            raise ValueError("direction must be 'bullish', 'bearish' or None")
+        if self.pattern_names is None:
+            return pd.DataFrame(columns=QUERY_COLUMNS)
+        patterns = self.pattern_names if pattern is None else [pattern] if isinstance(pattern, str) else list(pattern)
+        unknown = set(patterns) - set(self.pattern_names)
+        if unknown:
+            raise ValueError(f"Unknown patterns: {sorted(unknown)}")
+
+        first = _day(start, -DAY_BIAS) + DAY_BIAS
+        last = _day(end, DAY_BIAS - 1) + DAY_BIAS
+        if symbols is not None:
+            symbol_ids = np.array(sorted({self._symbol_ids[s] for s in symbols if s in self._symbol_ids}),
+                                  dtype=np.int64)
+
+        found_keys, found_patterns, found_bear = [], [], []
+        for pattern_id, name in enumerate(self.pattern_names):
+            if name not in patterns:
+                continue
+            keys, bear = self._load_postings(name)
+            if symbols is not None:
+                # One contiguous slice per requested symbol.
+                lo = np.searchsorted(keys, (symbol_ids << 32) | first, 'left')
+                hi = np.searchsorted(keys, (symbol_ids << 32) | last, 'right')
+                lengths = hi - lo
+                rows = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            elif start is not None or end is not None:
+                days = np.asarray(keys) & DAY_MASK
+                rows = np.flatnonzero((days >= first) & (days <= last))
+            else:
+                rows = slice(None)
+            keys, bear = np.asarray(keys[rows]), np.asarray(bear[rows])
+            if direction is not None:
+                wanted = bear if direction == 'bearish' else ~bear
+                keys, bear = keys[wanted], bear[wanted]
+            found_keys.append(keys)
+            found_bear.append(bear)
+            found_patterns.append(np.full(len(keys), pattern_id, dtype=np.int16))
+
+        keys = np.concatenate(found_keys) if found_keys else np.empty(0, np.int64)
+        pattern_ids = np.concatenate(found_patterns) if found_patterns else np.empty(0, np.int16)
+        bear = np.concatenate(found_bear) if found_bear else np.empty(0, bool)
+        days = (keys & DAY_MASK) - DAY_BIAS
+        ids = keys >> 32
+
+        order = np.lexsort((pattern_ids, ids, days))
+        result = pd.DataFrame({
+            'Symbol': np.asarray(self._symbols, dtype=object)[ids[order]] if len(keys) else np.empty(0, object),
+            'Date': days[order].astype('datetime64[D]').astype('datetime64[ns]'),
+            'Pattern': np.asarray(self.pattern_names, dtype=object)[pattern_ids[order]],
+            'Direction': np.where(bear[order], 'bearish', 'bullish'),
+        }, columns=QUERY_COLUMNS)
+        return result
@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+import os
+import logging
+import tempfile
+from io import StringIO
+from .pattern_codec import PatternCodec
+from .batch_runner import run_batch
+from .data_quality import screen_bars
+from .metrics import METRICS
+from .pattern_engine import get_engine
+
+BAR_COLUMNS = ['Symbol', 'Series', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# Pattern columns written for each output format.
+PATTERN_FORMATS = {
+    'json': ['Patterns'],
+    'mask': ['PatternMask', 'BearishMask'],
+    'both': ['Patterns', 'PatternMask', 'BearishMask'],
+}
+
+
+def tail_lines(file_path, n, block_size=1 << 16):
+    """
+    Read the header and the last n lines of a text file without reading the whole file.
+
+    :return: (header_line, list_of_last_lines, reached_start_of_file)
+    """
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > data_start and data.count(b'\n') <= n:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode('utf-8').splitlines()
+    lines = [line for line in lines if line.strip()]
+    reached_start = pos <= data_start and len(lines) <= n
+    return header.decode('utf-8'), lines[-n:], reached_start
+
+
+def drop_last_line(file_path):
+    """Truncate the last non-empty line of a text file, keeping the header line."""
+    with open(file_path, 'rb+') as f:
+        header = f.readline()
+        data_start = f.tell()
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        pos = end
+        while pos > data_start and data.rstrip(b'\r\n').count(b'\n') == 0:
+            step = min(1 << 16, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+        body = data.rstrip(b'\r\n')
+        cut = body.rfind(b'\n')
+        f.truncate(pos + cut + 1 if cut >= 0 else data_start)
+
+
+class CandlePatternRecognizer:
+    def __init__(self, input_directory, output_directory, store=None, incremental=False,
+                 pattern_format='json', engine='auto', calendar=None, index=None, validate=False):
+        """
+        :param input_directory: Directory of per-symbol CSV files.
+        :param output_directory: Directory the pattern CSVs are written to.
+        :param store: Optional SymbolStore (see symbol_store.py) to read bars from
+                      instead of parsing the CSVs in input_directory; a
+                      ResampledStore (see resampler.py) gives weekly or monthly patterns.
+        :param incremental: Only detect patterns for bars newer than the symbol's
+                            watermark (the last date already in its output CSV)
+                            and append them, instead of rewriting the whole file.
+                            With a store whose last bar may still change
+                            (open_last_bar), the last written bar is rewritten too.
+                            A store symbol whose fingerprint (see
+                            SymbolStore.fingerprint) differs from the one its
+                            output was written with is rewritten in full; the
+                            fingerprints are kept next to the output directory,
+                            in <output_directory>.fingerprints/.
+        :param pattern_format: 'json' writes the Patterns name list, 'mask' writes the
+                               PatternMask/BearishMask integers (see PatternCodec),
+                               'both' writes all three columns.
+        :param engine: Pattern engine: 'talib', 'numpy' or 'auto' (see pattern_engine.get_engine).
+        :param calendar: Optional TradingCalendar (see trading_calendar.py); in
+                         incremental mode it sizes the input tail to read from the
+                         number of sessions since the watermark.
+        :param index: Optional PatternIndex (see pattern_index.py) that receives
+                      the hits of every detected bar, for queries by pattern,
+                      symbol and date without rereading the output CSVs.
+        :param validate: Screen each symbol's bars with data_quality.screen_bars first:
+                         bars with impossible prices or repeated dates are left out
+                         (and counted), so they never reach the pattern engine.
+        """
+        if pattern_format not in PATTERN_FORMATS:
+            raise ValueError(f"pattern_format must be one of {sorted(PATTERN_FORMATS)}")
+        self.input_directory = input_directory
+        self.output_directory = output_directory
+        self.fingerprint_directory = os.path.normpath(output_directory) + '.fingerprints'
+        self.store = store
+        self.incremental = incremental
+        self.pattern_format = pattern_format
+        self.calendar = calendar
+        self.validate = validate
+        os.makedirs(self.output_directory, exist_ok=True)
+
+        self.engine = get_engine(engine)
+        self.single_candle_patterns = self.engine.patterns
+        self.lookback = self.pattern_lookback()
+        self.codec = PatternCodec(self.single_candle_patterns)
+        self.index = index
+        if index is not None:
+            index.set_patterns(self.codec.pattern_names)
+
+    def pattern_lookback(self):
+        """
+        Number of bars the CDL* functions need before a bar to score it.
+
+        A candle function's output at bar i depends only on bars
+        [i - lookback, i], so re-running on that trailing window reproduces
+        the full-history result exactly.
+        """
+        return self.engine.lookback
+
+    def list_files_in_directory(self):
+        return sorted(os.path.join(dirpath, filename)
+                      for dirpath, _, filenames in os.walk(self.input_directory)
+                      for filename in filenames)
+
+    def read_watermark(self, base_file_name):
+        """
+        Last date already written to a symbol's output CSV, or None if there is no output yet.
+        """
+        output_path = os.path.join(self.output_directory, base_file_name)
+        if not os.path.exists(output_path):
+            return None
+        header, lines, _ = tail_lines(output_path, 1)
+        if not lines:
+            return None
+        last_row = pd.read_csv(StringIO(header + lines[-1]))
+        return pd.Timestamp(last_row['Date'].iloc[0])
+
+    def read_fingerprint(self, base_file_name):
+        """
+        Store fingerprint a symbol's output CSV was written with; '' if none was recorded.
+        """
+        path = os.path.join(self.fingerprint_directory, base_file_name)
+        if not os.path.exists(path):
+            return ''
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+
+    def _write_fingerprint(self, base_file_name, fingerprint):
+        path = os.path.join(self.fingerprint_directory, base_file_name)
+        if not fingerprint:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.fingerprint_directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.fingerprint_directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(fingerprint)
+        os.replace(tmp_path, path)
+
+    def _read_input_tail(self, csv_file_path, watermark):
+        """
+        Read the rows after the watermark plus the lookback bars preceding them.
+
+        With a calendar the number of rows is known up front (sessions since
+        the watermark), so the file is normally read once; otherwise the tail
+        is doubled until it reaches back far enough.
+        """
+        n = self.lookback + 32
+        if self.calendar is not None:
+            header, lines, _ = tail_lines(csv_file_path, 1)
+            if lines:
+                last_row = pd.read_csv(StringIO(header + lines[-1]))
+                last_row.rename(columns=lambda x: x.capitalize(), inplace=True)
+                last_date = pd.to_datetime(last_row['Date'].iloc[0], format='%d-%m-%Y')
+                new_sessions = self.calendar.session_count(watermark + pd.Timedelta(days=1),
+                                                           last_date + pd.Timedelta(days=1))
+                n = max(int(new_sessions), 0) + self.lookback + 1
+        while True:
+            header, lines, reached_start = tail_lines(csv_file_path, n)
+            df = pd.read_csv(StringIO(header + '\n'.join(lines)))
+            df.rename(columns=lambda x: x.capitalize(), inplace=True)
+            df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
+            if reached_start or (df['Date'] <= watermark).sum() >= self.lookback:
+                return df
+            n *= 2
+
+    @METRICS.timed('detect')
+    def recognize_candle_patterns(self, csv_file_path):
+        base_file_name = os.path.basename(csv_file_path)
+
+        watermark = self.read_watermark(base_file_name) if self.incremental else None
+        if watermark is not None:
+            return self._detect_and_save(self._read_input_tail(csv_file_path, watermark), base_file_name, watermark)
+
+        df = pd.read_csv(csv_file_path)
+
+        # Preprocess data
+        df.rename(columns=lambda x: x.capitalize(), inplace=True)
+        df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
+        return self._detect_and_save(df, base_file_name)
+
+    @METRICS.timed('detect')
+    def recognize_symbol(self, symbol):
+        """
+        Detect patterns for one symbol read from the configured store.
+        """
+        base_file_name = f"{symbol}.csv".lower()
+        fingerprint = self.store.fingerprint(symbol)
+        watermark = self.read_watermark(base_file_name) if self.incremental else None
+        if watermark is not None and (self.read_fingerprint(base_file_name) != fingerprint or (
+                self.index is not None and self.index.fingerprint(symbol) != fingerprint)):
+            # The written bars were read differently (e.g. before new adjustment factors): start over.
+            watermark = None
+        if watermark is not None and self.store.open_last_bar:
+            # The last written bar may be a period that was still open: detect it again.
+            drop_last_line(os.path.join(self.output_directory, base_file_name))
+            watermark = self.read_watermark(base_file_name)
+        if watermark is not None:
+            df = self.store.load_symbol(symbol, start=watermark + pd.Timedelta(days=1), lookback=self.lookback)
+        else:
+            df = self.store.load_symbol(symbol)
+        result = self._detect_and_save(df, base_file_name, watermark)
+        self._write_fingerprint(base_file_name, fingerprint)
+        if self.index is not None and result[1] is not None:
+            result = result[0], result[1] + (fingerprint,)
+        return result
+
+    def _detect_and_save(self, df, base_file_name, watermark=None):
+        """
+        Detect patterns on df and write them out; returns the output path.
+
+        With a watermark only the rows after it are appended to the existing
+        output; df must then hold at least `lookback` bars before those rows.
+
+        With an index configured the result is (output_path, hits), where hits
+        holds the PatternIndex.add arguments for the written rows; the hits
+        travel back to the parent process, which owns the index.
+        """
+        output_path = os.path.join(self.output_directory, base_file_name)
+        if watermark is not None and not (df['Date'] > watermark).any():
+            logging.debug(f"{output_path} is up to date")
+            return output_path if self.index is None else (output_path, None)
+
+        if self.validate:
+            df = screen_bars(df, self.calendar, since=watermark)
+
+        df.set_index('Date', inplace=True)
+
+        # Detect patterns
+        open_, high, low, close = (df[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close'))
+        pattern_matrix = self.engine.compute_matrix(open_, high, low, close)
+        df['PatternMask'], df['BearishMask'] = self.codec.encode(pattern_matrix)
+        METRICS.incr('detect_rows', len(df))
+
+        # Prepare and save CSV
+        df.reset_index(inplace=True)
+        if watermark is not None:
+            df = df[df['Date'] > watermark].copy()
+        METRICS.incr('pattern_hits', int(np.count_nonzero(df['PatternMask'].to_numpy())))
+        df['Date'] = df['Date'].dt.date
+        if self.pattern_format != 'mask':
+            df['Patterns'] = self.codec.to_json(df['PatternMask'].to_numpy())
+        output_columns = BAR_COLUMNS + PATTERN_FORMATS[self.pattern_format]
+        if watermark is not None:
+            df[output_columns].to_csv(output_path, mode='a', header=False, index=False)
+            logging.debug(f"Appended {len(df)} rows to {output_path}")
+        else:
+            df[output_columns].to_csv(output_path, index=False)
+            logging.debug(f"Data saved to {output_path}")
+        if self.index is None:
+            return output_path
+        if df.empty:
+            return output_path, None
+
+        symbol = df['Symbol'].iloc[0] if 'Symbol' in df.columns else os.path.splitext(base_file_name)[0].upper()
+        dates = pd.to_datetime(df['Date'])
+        hit = df['PatternMask'].to_numpy() != 0
+        hits = (symbol, dates.to_numpy()[hit], df['PatternMask'].to_numpy()[hit],
+                df['BearishMask'].to_numpy()[hit], dates.min(), dates.max())
+        return output_path, hits
+
+    def process_all_files(self, workers=1, chunksize=None):
+        """
+        Detect patterns for every input file (or every store symbol).
+
+        :param workers: Worker processes; None uses every CPU (see batch_runner.run_batch).
+        :param chunksize: Files per task handed to a worker.
+        :return: BatchSummary with per-file failures.
+        """
+        with METRICS.stage('detect'):
+            if self.store is not None:
+                summary = run_batch(self.recognize_symbol, self.store.symbols(), workers, chunksize)
+            else:
+                summary = run_batch(self.recognize_candle_patterns, self.list_files_in_directory(), workers, chunksize)
+            if self.index is not None:
+                outcomes = []
+                for ok, result in summary.outcomes:
+                    if ok:
+                        result, hits = result
+                        if hits is not None:
+                            self.index.add(*hits)
+                    outcomes.append((ok, result))
+                summary.outcomes = outcomes
+                self.index.flush()
+        return summary
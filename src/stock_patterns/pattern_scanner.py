@@ -0,0 +1,58 @@
+import time
+import numpy as np
+import pandas as pd
+from .pattern_engine import get_engine
+
+SCAN_COLUMNS = ['Symbol', 'Pattern', 'Direction', 'Signal']
+
+
+class PatternScanner:
+    def __init__(self, store, engine='numpy'):
+        """
+        Cross-sectional scanner: which symbols printed which pattern on a given day.
+
+        :param store: SymbolStore to read bars from; a compacted NumpySymbolStore
+                      serves the trailing windows straight from its memory maps.
+        :param engine: Pattern engine (see pattern_engine.get_engine). The NumPy
+                       engine scores the whole (symbols x window) panel in one pass.
+        """
+        self.store = store
+        self.engine = get_engine(engine)
+        self.single_candle_patterns = self.engine.patterns
+        # Bars needed to score the last bar of a window (see CandlePatternRecognizer.pattern_lookback).
+        self.lookback = self.engine.lookback
+
+    def scan(self, as_of=None, symbols=None):
+        """
+        Evaluate every pattern on the as_of bar of every symbol.
+
+        Only the trailing lookback + 1 bars of each symbol are loaded. Symbols
+        without a bar on as_of (suspended, not yet listed) are skipped.
+
+        :param as_of: Session date to scan; defaults to the latest date in the store.
+        :param symbols: Optional subset of symbols.
+        :return: DataFrame with Symbol, Pattern, Direction ('bullish'/'bearish') and the raw Signal.
+        """
+        start = time.perf_counter()
+        panel = self.store.load_panel(end=as_of, length=self.lookback + 1, symbols=symbols)
+        last_dates = panel.dates[:, -1]
+        if as_of is None:
+            as_of = last_dates.max() if len(panel) else None
+        traded = last_dates == np.datetime64(pd.Timestamp(as_of), 'ns') if as_of is not None else []
+
+        rows = np.flatnonzero(traded)
+        signals = self.engine.compute_matrix(*(panel[column][rows] for column in ('Open', 'High', 'Low', 'Close')))
+        signals = signals[:, -1, :]
+        hit_rows, hit_patterns = np.nonzero(signals)
+        hit_signals = signals[hit_rows, hit_patterns]
+
+        result = pd.DataFrame({
+            'Symbol': panel.symbols[rows][hit_rows],
+            'Pattern': np.asarray(list(self.single_candle_patterns), dtype=object)[hit_patterns],
+            'Direction': np.where(hit_signals > 0, 'bullish', 'bearish'),
+            'Signal': hit_signals.astype(int),
+        }, columns=SCAN_COLUMNS)
+        result.attrs['as_of'] = pd.Timestamp(as_of) if as_of is not None else None
+        result.attrs['symbols_scanned'] = int(np.count_nonzero(traded))
+        result.attrs['elapsed'] = time.perf_counter() - start
+        return result
@@ -0,0 +1,87 @@
+import os
+import json
+import logging
+import tarfile
+import tempfile
+from functools import lru_cache
+
+
+@lru_cache(maxsize=16)
+def _complete_members(path, mtime_ns, size):
+    # Members of a tar shard whose data lies entirely within the file; keyed on
+    # (mtime, size) so a shard that grows or is rewritten is read again.
+    members = set()
+    try:
+        with tarfile.open(path, 'r') as tar:
+            for member in tar:
+                if member.offset_data + member.size <= size:
+                    members.add(member.name)
+    except (tarfile.TarError, OSError):
+        pass  # Truncated or unreadable past this point: keep the members read so far.
+    return frozenset(members)
+
+
+def location_exists(location):
+    """
+    Whether an ImageSink location still holds a readable image: a file path, or
+    '<shard>.tar::<name>' whose member is complete in the shard (a run killed
+    before it flushed its shard leaves it truncated).
+    """
+    path, _, member = location.partition('::')
+    if not member:
+        return os.path.exists(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return member in _complete_members(path, stat.st_mtime_ns, stat.st_size)
+
+
+def read_location(location):
+    """PNG bytes at an ImageSink location (see location_exists)."""
+    path, _, member = location.partition('::')
+    if member:
+        with tarfile.open(path, 'r') as tar:
+            return tar.extractfile(member).read()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class RenderCache:
+    def __init__(self, path):
+        """
+        JSON manifest mapping content keys (ChartJob.content_key()) to image
+        locations, so a rerun over unchanged history only draws new charts.
+
+        Entries whose image has been deleted are ignored, so removing images
+        is always safe: they are redrawn on the next run. Locations only
+        survive across runs for sinks that persist (directories, tar shards).
+
+        :param path: Manifest file; created on the first save().
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self.hits = 0
+
+    def get(self, key):
+        """Location of the image rendered for key, or None if it has to be drawn."""
+        location = self.entries.get(key)
+        if location is None or not location_exists(location):
+            return None
+        self.hits += 1
+        return location
+
+    def put(self, key, location):
+        self.entries[key] = location
+
+    def save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        logging.info(f"💾 Render cache: {len(self.entries)} charts in {self.path}")
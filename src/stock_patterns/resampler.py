@@ -0,0 +1,226 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+from .symbol_store import COLUMN_DTYPES, NumpySymbolStore, SymbolStore
+
+# Timeframe code -> name. A resampled bar is dated by the first calendar day
+# of its period: the Monday of its week, the 1st of its month.
+TIMEFRAMES = {
+    'D': 'daily',
+    'W': 'weekly',
+    'M': 'monthly',
+}
+
+BAR_COLUMNS = ['Symbol'] + list(COLUMN_DTYPES)
+
+
+def period_starts(dates, timeframe):
+    """
+    First calendar day of the period each date falls in.
+
+    :param dates: datetime64 values.
+    :param timeframe: 'D', 'W' or 'M' (see TIMEFRAMES).
+    :return: datetime64[ns] array.
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"timeframe must be one of {sorted(TIMEFRAMES)}")
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if timeframe == 'W':
+        # Day 0 (1970-01-01) was a Thursday, so Monday-based weekdays are (day + 3) % 7.
+        days = days - (days.astype(np.int64) + 3) % 7
+    elif timeframe == 'M':
+        days = days.astype('datetime64[M]').astype('datetime64[D]')
+    return days.astype('datetime64[ns]')
+
+
+def resample_bars(df, timeframe):
+    """
+    Fold daily bars into one bar per symbol and period.
+
+    Open is the period's first open, High/Low its extremes, Close its last
+    close, Volume the sum and Series the last series seen; Date is the
+    period start (see period_starts). A period still in progress gives a
+    bar over the sessions seen so far.
+
+    :param df: Daily bars with Symbol, Series, Date, Open, High, Low, Close, Volume.
+    :param timeframe: 'D', 'W' or 'M'; 'D' returns the bars unchanged.
+    :return: DataFrame with the same columns, sorted by (Symbol, Date).
+    """
+    periods = period_starts(df['Date'].to_numpy(), timeframe)
+    if timeframe == 'D' or df.empty:
+        return df[BAR_COLUMNS].reset_index(drop=True)
+
+    order = np.lexsort((df['Date'].to_numpy(), df['Symbol'].to_numpy()))
+    symbols = df['Symbol'].to_numpy()[order]
+    periods = periods[order]
+    new_bar = np.ones(len(order), dtype=bool)
+    new_bar[1:] = (symbols[1:] != symbols[:-1]) | (periods[1:] != periods[:-1])
+    first = np.flatnonzero(new_bar)
+    last = np.append(first[1:], len(order)) - 1
+
+    def column(name, dtype):
+        return df[name].to_numpy(dtype=dtype)[order]
+
+    high, low = column('High', float), column('Low', float)
+    return pd.DataFrame({
+        'Symbol': symbols[first],
+        'Series': df['Series'].to_numpy()[order][last],
+        'Date': periods[first],
+        'Open': column('Open', float)[first],
+        'High': np.maximum.reduceat(high, first),
+        'Low': np.minimum.reduceat(low, first),
+        'Close': column('Close', float)[last],
+        'Volume': np.add.reduceat(column('Volume', np.int64), first),
+    })
+
+
+class ResampledStore(SymbolStore):
+    # A symbol's last bar is a period that may still be in progress.
+    open_last_bar = True
+
+    def __init__(self, daily, timeframe, root, auto_refresh=True, symbols_per_chunk=256):
+        """
+        Weekly or monthly bars of a daily SymbolStore, cached under root.
+
+        Layout under root:
+            base/, partitions/   NumpySymbolStore of the resampled bars
+            resample.json        timeframe, the last daily date folded in and the
+                                 daily fingerprint of each symbol (see SymbolStore.fingerprint)
+
+        refresh() reloads the daily bars from the start of the period that
+        was still open at the last refresh and rewrites the bars of every
+        period from there on; closed periods are never recomputed, except
+        for the symbols whose daily fingerprint changed (new adjustment
+        factors), which are resampled over their whole history. Daily bars
+        added for dates before the last refresh (backfills, corrections)
+        need rebuild().
+
+        :param daily: SymbolStore of daily bars.
+        :param timeframe: 'W' or 'M'.
+        :param root: Cache directory.
+        :param auto_refresh: Refresh on the first read instead of waiting for refresh().
+                             Refresh before handing the store to worker processes.
+        :param symbols_per_chunk: Symbols loaded from the daily store at a time.
+        """
+        if timeframe not in TIMEFRAMES or timeframe == 'D':
+            raise ValueError("timeframe must be 'W' or 'M'")
+        self.daily = daily
+        self.timeframe = timeframe
+        self.root = root
+        self.cache = NumpySymbolStore(root)
+        self.state_path = os.path.join(root, 'resample.json')
+        self.auto_refresh = auto_refresh
+        self.symbols_per_chunk = symbols_per_chunk
+        self._refreshed = False
+
+    # ---------- maintenance ----------
+
+    def _read_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state['timeframe'] != self.timeframe:
+            raise ValueError(f"{self.root} caches '{state['timeframe']}' bars, not '{self.timeframe}'")
+        return state
+
+    def _write_state(self, daily_end, fingerprints):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'timeframe': self.timeframe, 'daily_end': f"{daily_end:%Y-%m-%d}",
+                       'fingerprints': fingerprints}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def rebuild(self):
+        """Drop the cached bars and resample the whole daily history."""
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.refresh()
+
+    def refresh(self):
+        """
+        Fold daily bars added since the last refresh into the cache.
+
+        :return: Number of resampled bars written (0 when nothing was new).
+        """
+        state = self._read_state()
+        if state is None:
+            daily_end = start = None
+            built = {}
+            for path in (self.cache.base_dir, self.cache.partition_dir):
+                shutil.rmtree(path, ignore_errors=True)
+            self.cache.release()
+        else:
+            daily_end = pd.Timestamp(state['daily_end'])
+            start = period_starts([daily_end.to_datetime64()], self.timeframe)[0]
+            built = state.get('fingerprints', {})
+
+        with METRICS.stage('resample'):
+            symbols = self.daily.symbols()
+            fingerprints = {symbol: self.daily.fingerprint(symbol) for symbol in symbols}
+            # Symbols whose daily bars now read differently are resampled from their first bar.
+            stale = {symbol for symbol, fingerprint in fingerprints.items()
+                     if start is not None and fingerprint != built.get(symbol, '')}
+            fingerprints = {symbol: fingerprint for symbol, fingerprint in fingerprints.items() if fingerprint}
+            bars, latest = [], None
+            for i in range(0, len(symbols), self.symbols_per_chunk):
+                frames = [self.daily.load_symbol(symbol, start=None if symbol in stale else start)
+                          for symbol in symbols[i:i + self.symbols_per_chunk]]
+                frames = [frame for frame in frames if len(frame)]
+                if not frames:
+                    continue
+                daily = pd.concat(frames, ignore_index=True)
+                chunk_latest = daily['Date'].max()
+                latest = chunk_latest if latest is None else max(latest, chunk_latest)
+                bars.append(resample_bars(daily, self.timeframe))
+            self._refreshed = True
+            if latest is None or (daily_end is not None and latest <= daily_end and not stale):
+                return 0
+
+            bars = pd.concat(bars, ignore_index=True)
+            latest = latest if daily_end is None else max(latest, daily_end)
+            os.makedirs(self.root, exist_ok=True)
+            # One batch, so every open period's partition holds all of its symbols;
+            # compaction merges the stale symbols' closed periods into the base.
+            self.cache.append_batch(bars)
+            self.cache.flush()
+            self._write_state(latest, fingerprints)
+        METRICS.incr('resample_bars', len(bars))
+        logging.info(f"📅 Resampled {len(bars)} {TIMEFRAMES[self.timeframe]} bars "
+                     f"through {latest:%Y-%m-%d} into {self.root}"
+                     + (f" ({len(stale)} symbols over their whole history)" if stale else ""))
+        return len(bars)
+
+    def _fresh(self):
+        if self.auto_refresh and not self._refreshed:
+            self.refresh()
+        return self.cache
+
+    # ---------- reading ----------
+
+    def release(self):
+        self.cache.release()
+
+    def symbols(self):
+        return self._fresh().symbols()
+
+    def fingerprint(self, symbol):
+        self._fresh()
+        return self.daily.fingerprint(symbol)
+
+    def bar_counts(self, symbols=None):
+        return self._fresh().bar_counts(symbols)
+
+    def load_symbol(self, symbol, start=None, end=None, lookback=0):
+        return self._fresh().load_symbol(symbol, start, end, lookback)
+
+    def load_universe(self, start=None, end=None):
+        return self._fresh().load_universe(start, end)
+
+    def load_panel(self, end=None, length=None, symbols=None, columns=('Open', 'High', 'Low', 'Close')):
+        return self._fresh().load_panel(end, length, symbols, columns)
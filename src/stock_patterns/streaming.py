@@ -0,0 +1,361 @@
+import os
+import sys
+import time
+import logging
+import contextlib
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+from .pattern_codec import PatternCodec
+from .pattern_engine import get_engine
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+# Peak bytes per (symbol, bar) cell while a chunk is scored: the float64
+# panel as loaded, and the engine's temporaries and int32 signal matrix
+# (about 290 bytes with the NumPy engine, 110 with TA-Lib).
+SCORE_BYTES_PER_BAR = 336
+
+# Peak bytes per row while NumpySymbolStore merges a compaction chunk
+# (string symbol and series columns, the typed columns, sort keys and the
+# reordered copy).
+COMPACT_BYTES_PER_ROW = 640
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+# Set once a reset_peak_rss() failure has been logged.
+_reset_failure_logged = False
+
+
+# ---------- memory accounting ----------
+
+def current_rss():
+    """Resident set size of this process in bytes (0 where it cannot be read)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def peak_rss():
+    """
+    Peak resident set size in bytes since the process started, or since the
+    last successful reset_peak_rss().
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    """
+    Reset the peak RSS to the current RSS (Linux only).
+
+    Writing to /proc/self/clear_refs also clears the soft-dirty bits of the
+    whole process, which other tools watching it may rely on; the pipeline
+    only calls this with track_peak=True.
+
+    :return: True when the next peak_rss() only covers what happens from now on.
+    """
+    global _reset_failure_logged
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError as e:
+        if not _reset_failure_logged:
+            _reset_failure_logged = True
+            logging.debug(f"Peak RSS cannot be reset, stage peaks cover the whole process: {e}")
+        return False
+
+
+class StageStats:
+    def __init__(self, name):
+        """
+        Wall time and memory of one pipeline stage.
+
+        peak_rss is the peak of the stage alone when the peak could be reset
+        at the start of the stage (peak_scope 'stage'), and the peak of the
+        whole process so far otherwise (peak_scope 'process').
+        """
+        self.name = name
+        self.items = 0
+        self.seconds = 0.0
+        self.start_rss = 0
+        self.peak_rss = 0
+        self.peak_scope = 'process'
+
+    def as_dict(self):
+        return {'stage': self.name, 'items': self.items, 'seconds': self.seconds,
+                'start_rss': self.start_rss, 'peak_rss': self.peak_rss, 'peak_scope': self.peak_scope}
+
+    def __repr__(self):
+        return (f"{self.name:<10} {self.items:>8} items {self.seconds:9.2f}s  "
+                f"peak RSS {self.peak_rss / 2 ** 20:8.1f} MB ({self.peak_scope})")
+
+
+# ---------- compact dtypes ----------
+
+def restore_prices(values):
+    """float64 prices from compact_prices() output; float32 values are rounded back to the paisa."""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return np.round(values.astype(np.float64), 2)
+    return values
+
+
+def compact_prices(values):
+    """
+    float32 copy of 2-decimal prices when restore_prices() gives every value
+    back exactly (always so below about 1.3 lakh); otherwise values unchanged.
+    """
+    values = np.asarray(values)
+    if values.dtype != np.float64:
+        return values
+    narrow = values.astype(np.float32)
+    if np.array_equal(restore_prices(narrow), values, equal_nan=True):
+        return narrow
+    return values
+
+
+def compact_volume(values):
+    """int32 copy of integer volumes when every value fits, otherwise values unchanged."""
+    values = np.asarray(values)
+    if values.dtype.kind != 'i' or values.dtype.itemsize <= 4:
+        return values
+    if len(values) == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+        return values.astype(np.int32)
+    return values
+
+
+def compact_frame(df):
+    """Bars DataFrame with compact price and volume columns (see compact_prices, compact_volume)."""
+    columns = {column: compact_prices(df[column].to_numpy()) for column in PRICE_COLUMNS if column in df}
+    if 'Volume' in df:
+        columns['Volume'] = compact_volume(df['Volume'].to_numpy())
+    return df.assign(**columns)
+
+
+def plan_chunks(symbols, bar_counts, max_bytes, bytes_per_bar=SCORE_BYTES_PER_BAR):
+    """
+    Split symbols, in order, into chunks whose padded (symbols x longest history)
+    panel stays within max_bytes. A symbol too long for the cap gets a chunk of its own.
+
+    :return: List of symbol lists.
+    """
+    chunks, chunk, longest = [], [], 0
+    for symbol, bars in zip(symbols, bar_counts):
+        bars = max(int(bars), 1)
+        widest = max(longest, bars)
+        if chunk and (len(chunk) + 1) * widest * bytes_per_bar > max_bytes:
+            chunks.append(chunk)
+            chunk, widest = [], bars
+        chunk.append(symbol)
+        longest = widest
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def compact_chunk_rows(max_bytes):
+    """NumpySymbolStore compact_chunk_rows that keeps a compaction within max_bytes."""
+    return max(1, int(max_bytes) // COMPACT_BYTES_PER_ROW)
+
+
+class StreamingPipeline:
+    def __init__(self, store, memory_limit_mb=512, engine='numpy', compact_dtypes=True, track_peak=False):
+        """
+        Stage-by-stage processing of a store in bounded chunks.
+
+        Every iter_* method is a generator: a chunk is loaded, processed and
+        handed to the caller before the next one is read, so nothing
+        accumulates unless the caller keeps it. Stage statistics are appended
+        to self.stages as each generator finishes.
+
+        For ingest, give the NumpySymbolStore compact_chunk_rows=compact_chunk_rows(cap)
+        so compactions are bounded as well.
+
+        :param store: SymbolStore to read bars from.
+        :param memory_limit_mb: Working-memory budget per chunk, in MiB.
+        :param engine: Pattern engine (see pattern_engine.get_engine).
+        :param compact_dtypes: Narrow the prices of frames and panels handed to callers to float32,
+                               and volumes to int32, where exact; panels that are only scored stay float64.
+        :param track_peak: Reset the peak RSS at the start of every stage (see reset_peak_rss)
+                           so each stage reports its own peak rather than the process's.
+        """
+        self.store = store
+        self.max_bytes = int(memory_limit_mb * 2 ** 20)
+        self.engine = get_engine(engine)
+        self.codec = PatternCodec(self.engine.patterns)
+        self.compact_dtypes = compact_dtypes
+        self.track_peak = track_peak
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a stage and record its peak RSS in self.stages (and its wall time in METRICS)."""
+        stats = StageStats(name)
+        if self.track_peak and reset_peak_rss():
+            stats.peak_scope = 'stage'
+        stats.start_rss = current_rss()
+        start = time.perf_counter()
+        try:
+            with METRICS.stage(name):
+                yield stats
+        finally:
+            stats.seconds = time.perf_counter() - start
+            stats.peak_rss = peak_rss()
+            self.stages.append(stats)
+            logging.info(f"📈 {stats!r}")
+
+    def report(self):
+        return "\n".join(repr(stats) for stats in self.stages)
+
+    def plan(self, symbols=None):
+        """Chunks of symbols whose panels fit the memory cap (see plan_chunks)."""
+        symbols = self.store.symbols() if symbols is None else list(symbols)
+        return plan_chunks(symbols, self.store.bar_counts(symbols), self.max_bytes)
+
+    # ---------- stages ----------
+
+    def ingest(self, downloader):
+        """
+        Download, parse and append the downloader's sessions one day at a time.
+
+        :param downloader: StockDataDownloader; its date range, calendar and ledger pick the sessions.
+        :return: Generator of (date, rows appended) per session with data.
+        """
+        with self.stage('ingest') as stats:
+            for date, stream in downloader.iter_downloads(downloader.pending_dates()):
+                df = downloader.parse_bhavcopy(stream) if stream is not None else None
+                if df is None:
+                    if downloader.validator is not None:
+                        downloader.validator.record_missing(date)
+                    continue
+                downloader.commit_batch(self.store, date, df)
+                stats.items += 1
+                yield date, len(df)
+            self.store.flush()
+
+    def iter_frames(self, symbols=None, start=None, end=None):
+        """
+        One symbol's bars at a time, with compact dtypes.
+
+        :return: Generator of DataFrames (see SymbolStore.load_symbol).
+        """
+        symbols = self.store.symbols() if symbols is None else list(symbols)
+        with self.stage('frames') as stats:
+            for symbol in symbols:
+                df = self.store.load_symbol(symbol, start, end)
+                stats.items += 1
+                yield compact_frame(df) if self.compact_dtypes else df
+
+    def iter_panels(self, symbols=None, end=None, columns=PRICE_COLUMNS, compact=True):
+        """
+        Full-history BarPanels of one chunk of symbols at a time (see plan()).
+
+        :param compact: Narrow the prices when compact_dtypes is set. Pass False for
+                        panels that are scored and dropped: narrowing them only adds
+                        a copy, and the engine needs float64 again.
+        :return: Generator of BarPanel.
+        """
+        for chunk in self.plan(symbols):
+            panel = self.store.load_panel(end=end, symbols=chunk, columns=columns)
+            self.store.release()
+            if compact and self.compact_dtypes:
+                panel.columns = {column: compact_prices(values) for column, values in panel.columns.items()}
+            yield panel
+
+    def iter_patterns(self, symbols=None, start=None, end=None):
+        """
+        Detect patterns chunk by chunk.
+
+        Every bar is scored with its full history, so the result equals a
+        whole-history CandlePatternRecognizer run; only hits dated within
+        [start, end] are returned.
+
+        :return: Generator of (coverage, hits) per chunk. coverage lists each symbol
+                 of the chunk with the first and last bar scored inside the range
+                 (Symbol, Start, End); hits holds Symbol, Date, PatternMask and
+                 BearishMask of the bars with at least one pattern.
+        """
+        lo = np.datetime64(pd.Timestamp(start), 'ns') if start is not None else None
+        with self.stage('detect') as stats:
+            for panel in self.iter_panels(symbols, end=end, compact=False):
+                signals = self.engine.compute_matrix(*(panel[column] for column in PRICE_COLUMNS))
+                masks, bearish = self.codec.encode(signals)
+                del signals
+
+                in_range = ~np.isnat(panel.dates)
+                if lo is not None:
+                    in_range &= panel.dates >= lo
+                rows, bars = np.nonzero(in_range & (masks != 0))
+                hits = pd.DataFrame({
+                    'Symbol': panel.symbols[rows],
+                    'Date': panel.dates[rows, bars],
+                    'PatternMask': masks[rows, bars],
+                    'BearishMask': bearish[rows, bars],
+                })
+                covered = in_range.any(axis=1)
+                first = np.argmax(in_range, axis=1)
+                last = in_range.shape[1] - 1 - np.argmax(in_range[:, ::-1], axis=1)
+                index = np.arange(len(panel))
+                coverage = pd.DataFrame({
+                    'Symbol': panel.symbols[covered],
+                    'Start': panel.dates[index, first][covered],
+                    'End': panel.dates[index, last][covered],
+                })
+                METRICS.incr('detect_rows', int(np.count_nonzero(~np.isnat(panel.dates))))
+                METRICS.incr('pattern_hits', len(hits))
+                stats.items += len(panel)
+                yield coverage, hits
+
+    def index_patterns(self, index, symbols=None, start=None, end=None):
+        """
+        Stream iter_patterns() into a PatternIndex, replacing each symbol's
+        postings over the range it covers, then flush the index.
+
+        Symbols whose store fingerprint (see SymbolStore.fingerprint) differs
+        from the one the index recorded are indexed over their whole history,
+        whatever start and end say.
+
+        :return: Number of hits added.
+        """
+        index.set_patterns(self.codec.pattern_names)
+        symbols = self.store.symbols() if symbols is None else list(symbols)
+        fingerprints = {symbol: self.store.fingerprint(symbol) for symbol in symbols}
+        stale = [symbol for symbol in symbols if fingerprints[symbol] != index.fingerprint(symbol)]
+        passes = [(symbols, start, end)]
+        if stale and (start is not None or end is not None):
+            stale_set = set(stale)
+            passes = [([symbol for symbol in symbols if symbol not in stale_set], start, end), (stale, None, None)]
+        added = 0
+        for pass_symbols, pass_start, pass_end in passes:
+            if not pass_symbols:
+                continue
+            for coverage, hits in self.iter_patterns(pass_symbols, pass_start, pass_end):
+                by_symbol = dict(tuple(hits.groupby('Symbol', sort=False)))
+                for symbol, first, last in coverage.itertuples(index=False):
+                    rows = by_symbol.get(symbol)
+                    if rows is None:
+                        index.add(symbol, np.array([], dtype='datetime64[ns]'), [], [], first, last,
+                                  fingerprint=fingerprints[symbol])
+                    else:
+                        index.add(symbol, rows['Date'].to_numpy(), rows['PatternMask'].to_numpy(),
+                                  rows['BearishMask'].to_numpy(), first, last, fingerprint=fingerprints[symbol])
+                        added += len(rows)
+        with self.stage('index'):
+            index.flush()
+        return added
@@ -0,0 +1,665 @@
+import os
+import glob
+import logging
+import tempfile
+from io import BytesIO
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Date format used by the per-symbol CSV files written by split_data.
+DATE_FORMAT = '%d-%m-%Y'
+
+# Typed columns kept by the columnar store, in CSV column order after Symbol.
+COLUMN_DTYPES = {
+    'Series': '<U8',
+    'Date': 'datetime64[ns]',
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'int64',
+}
+
+
+class BarPanel:
+    def __init__(self, symbols, dates, columns):
+        """
+        Right-aligned (symbols x bars) arrays: row i holds the most recent bars
+        of symbols[i], oldest first, left-padded with NaN (NaT for dates)
+        where a symbol has fewer bars than the panel is wide.
+
+        :param symbols: Array of symbols, one per row.
+        :param dates: datetime64 array of shape (symbols, bars).
+        :param columns: Mapping of column name to float array of shape (symbols, bars).
+        """
+        self.symbols = symbols
+        self.dates = dates
+        self.columns = columns
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+def _write_csv_atomic(df, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False, date_format=DATE_FORMAT)
+    os.replace(tmp_path, path)
+
+
+def _row_date(line, date_column):
+    return datetime.strptime(line.split(b',')[date_column].decode('utf-8').strip(), DATE_FORMAT)
+
+
+def _to_datetime(dates):
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        # Already parsed: skip to_datetime, which inspects every element first.
+        return dates if isinstance(dates, pd.Series) else pd.to_datetime(dates)
+    return pd.to_datetime(dates, format=DATE_FORMAT)
+
+
+class SymbolStore:
+    """
+    Storage backend for per-symbol daily OHLCV bars.
+
+    Writers append one processed bhavcopy batch (all symbols for a day) at a
+    time; readers load a single symbol or the whole universe as a DataFrame
+    with the columns Symbol, Series, Date, Open, High, Low, Close, Volume.
+    """
+
+    # True when a symbol's last bar may still change (a resampled period in
+    # progress), so incremental readers must rewrite it rather than skip it.
+    open_last_bar = False
+
+    def append_batch(self, df):
+        raise NotImplementedError
+
+    def flush(self):
+        """Make everything appended so far durable and visible to readers."""
+
+    def release(self):
+        """Drop cached data and memory maps; the next read reopens them."""
+
+    def symbols(self):
+        raise NotImplementedError
+
+    def fingerprint(self, symbol):
+        """
+        Version of the bars served for symbol. It changes whenever bars that
+        were already read may read differently (new adjustment factors, see
+        corporate_actions.AdjustedStore), so outputs derived from them record
+        it and are rebuilt when it no longer matches. '' for bars that are
+        only ever appended to.
+        """
+        return ''
+
+    def bar_counts(self, symbols=None):
+        """
+        Number of bars stored per symbol, aligned with symbols (default: all); 0 for unknown symbols.
+        """
+        symbols = self.symbols() if symbols is None else list(symbols)
+        counts = np.zeros(len(symbols), dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            try:
+                counts[i] = len(self.load_symbol(symbol))
+            except (KeyError, FileNotFoundError):
+                pass
+        return counts
+
+    def load_symbol(self, symbol, start=None, end=None, lookback=0):
+        """
+        Load one symbol's bars sorted by Date.
+
+        :param symbol: Trading symbol, e.g. 'RELIANCE'.
+        :param start: Optional first date to include.
+        :param end: Optional last date to include.
+        :param lookback: Also include this many bars before start.
+        """
+        raise NotImplementedError
+
+    def load_universe(self, start=None, end=None):
+        frames = [self.load_symbol(symbol, start, end) for symbol in self.symbols()]
+        if not frames:
+            return pd.DataFrame(columns=['Symbol'] + list(COLUMN_DTYPES))
+        return pd.concat(frames, ignore_index=True)
+
+    def load_panel(self, end=None, length=None, symbols=None, columns=('Open', 'High', 'Low', 'Close')):
+        """
+        Load the trailing bars of many symbols as a BarPanel.
+
+        :param end: Last date to include; None means each symbol's latest bar.
+        :param length: Bars per symbol; None keeps the full history.
+        :param symbols: Symbols to load; None loads the whole universe.
+                        A symbol the store does not hold raises KeyError.
+        :param columns: Price/volume columns to include, returned as float64.
+        """
+        symbols = self.symbols() if symbols is None else list(symbols)
+        frames = [self.load_symbol(symbol, end=end) for symbol in symbols]
+        if length is None:
+            length = max((len(frame) for frame in frames), default=0)
+        dates = np.full((len(symbols), length), np.datetime64('NaT'), dtype='datetime64[ns]')
+        arrays = {column: np.full((len(symbols), length), np.nan) for column in columns}
+        for i, frame in enumerate(frames):
+            frame = frame.iloc[len(frame) - min(len(frame), length):]
+            if len(frame):
+                dates[i, length - len(frame):] = frame['Date'].to_numpy()
+                for column in columns:
+                    arrays[column][i, length - len(frame):] = frame[column].to_numpy(dtype=float)
+        return BarPanel(np.asarray(symbols), dates, arrays)
+
+
+class CsvSymbolStore(SymbolStore):
+    def __init__(self, directory, apply_every=64):
+        """
+        One `<symbol>.csv` text file per symbol (the original layout).
+
+        Appended batches are first committed as one file per trading day
+        under `<directory>.staged/` (written to a temp file and renamed), then
+        applied to the symbol files by flush(), or automatically once
+        apply_every days are staged. Applying is idempotent: a day whose rows
+        a symbol file already holds replaces them instead of being appended
+        again, and a row cut short by a crash mid-append is dropped, so
+        replaying a day or re-applying a staged one never duplicates a
+        (Symbol, Date) row. Readers see a day once it has been applied.
+
+        :param directory: Directory holding the per-symbol CSV files.
+        :param apply_every: Apply automatically once this many days are staged; None only
+                            applies on flush(), e.g. while date shards ingest in parallel.
+        """
+        self.directory = directory
+        self.staging_dir = os.path.normpath(directory) + '.staged'
+        self.apply_every = apply_every
+
+    def _path(self, symbol):
+        return os.path.join(self.directory, f"{symbol}.csv".lower())
+
+    def _staged_files(self):
+        return sorted(glob.glob(os.path.join(self.staging_dir, '*.csv')))
+
+    def append_batch(self, df):
+        """
+        Commit a processed batch: one staged file per distinct date, each replacing any earlier copy of that day.
+
+        :param df: DataFrame with Symbol, Series, Date, Open, High, Low, Close, Volume.
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        dates = _to_datetime(df['Date'])
+        for date, group in df.groupby(dates.values):
+            _write_csv_atomic(group, os.path.join(self.staging_dir, f"{pd.Timestamp(date):%Y%m%d}.csv"))
+
+        if self.apply_every is not None and len(self._staged_files()) >= self.apply_every:
+            self.flush()
+
+    def flush(self):
+        """Apply the staged days to the symbol files, oldest first, then drop them."""
+        staged = self._staged_files()
+        if not staged:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Rows are moved as the text that was staged: grouped by symbol, never parsed.
+        header, rows = None, {}
+        for path in staged:
+            with open(path, 'rb') as f:
+                header = f.readline()
+                for line in f:
+                    rows.setdefault(line[:line.index(b',')], []).append(line)
+        date_column = header.decode('utf-8').rstrip('\r\n').split(',').index('Date')
+        for symbol, lines in rows.items():
+            self._apply(self._path(symbol.decode('utf-8')), header, lines, date_column)
+        for path in staged:
+            os.remove(path)
+        logging.info(f"✅ Applied {len(staged)} staged days to {self.directory}")
+
+    @staticmethod
+    def _apply(file_path, header, lines, date_column):
+        if os.path.exists(file_path):
+            with open(file_path, 'r+b') as f:
+                last_date = CsvSymbolStore._last_date(f, date_column)
+                # Staged days are applied in date order, so the first line is the oldest.
+                if last_date is None or _row_date(lines[0], date_column) > last_date:
+                    f.seek(0, os.SEEK_END)
+                    f.writelines(lines)
+                    return
+            # A replayed or backfilled day: merge, keeping the newest row for each date.
+            with open(file_path, 'rb') as f:
+                text = b''.join([f.read()] + lines)
+            merged = pd.read_csv(BytesIO(text), dtype=str, keep_default_na=False)
+            dates = pd.to_datetime(merged['Date'], format=DATE_FORMAT)
+            keep = ~dates.duplicated(keep='last').to_numpy()
+            order = np.argsort(dates.to_numpy()[keep], kind='stable')
+            _write_csv_atomic(merged[keep].iloc[order], file_path)
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.writelines(lines)
+        os.replace(tmp_path, file_path)
+
+    @staticmethod
+    def _last_date(f, date_column):
+        """
+        Date of the last row of an open symbol file, or None if it has no rows.
+
+        A partial last row, left by an append that crashed, is truncated away.
+        """
+        f.seek(0)
+        header_size = len(f.readline())
+        end = f.seek(0, os.SEEK_END)
+        block = 4096
+        while True:
+            start = max(header_size, end - block)
+            f.seek(start)
+            tail = f.read(end - start)
+            if start == header_size or tail.count(b'\n') >= 2:
+                break
+            block *= 2
+        complete, _, partial = tail.rpartition(b'\n')
+        if partial:
+            f.truncate(end - len(partial))
+        if not complete:
+            return None
+        return _row_date(complete.rpartition(b'\n')[2], date_column)
+
+    def symbols(self):
+        return sorted(os.path.splitext(name)[0].upper()
+                      for name in os.listdir(self.directory) if name.endswith('.csv'))
+
+    def load_symbol(self, symbol, start=None, end=None, lookback=0):
+        df = pd.read_csv(self._path(symbol))
+        df['Date'] = _to_datetime(df['Date'])
+        if start is not None:
+            lo = max(0, int((df['Date'] < pd.Timestamp(start)).sum()) - lookback)
+            df = df.iloc[lo:]
+        if end is not None:
+            df = df[df['Date'] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+
+class NumpySymbolStore(SymbolStore):
+    def __init__(self, root, compact_every=64, compact_chunk_rows=None):
+        """
+        Partitioned columnar store built on memory-mapped NumPy arrays.
+
+        Layout under root:
+            partitions/<YYYYMMDD>.npz   one file per appended trading day, rows sorted by symbol
+            base/<Column>.npy           compacted rows sorted by (symbol, date), one typed array per column
+            base/symbols.npy            sorted symbols of the base
+            base/offsets.npy            row range of symbol i is offsets[i]:offsets[i + 1]
+
+        Appending a day writes one partition file instead of one file per
+        symbol. compact() folds the partitions into the base, which readers
+        memory-map, so loading a symbol is an offset lookup and a slice.
+        Re-appending a day replaces its partition, and compaction keeps the
+        newest row for a (symbol, date), so replays never duplicate rows.
+
+        :param root: Store directory.
+        :param compact_every: Compact automatically once this many partitions are pending; None
+                              only compacts on flush(), e.g. while date shards ingest in parallel.
+        :param compact_chunk_rows: Merge at most about this many rows at a time during
+                                   compaction; None merges the whole store in memory.
+        """
+        self.root = root
+        self.partition_dir = os.path.join(root, 'partitions')
+        self.base_dir = os.path.join(root, 'base')
+        self.compact_every = compact_every
+        self.compact_chunk_rows = compact_chunk_rows
+        self._base = None
+        self._partitions = {}
+
+    def __getstate__(self):
+        # Worker processes re-open the memory maps themselves instead of
+        # receiving a pickled copy of the data.
+        state = self.__dict__.copy()
+        state['_base'] = None
+        state['_partitions'] = {}
+        return state
+
+    # ---------- writing ----------
+
+    def append_batch(self, df):
+        """
+        Append a processed daily batch; one partition is written per distinct date.
+
+        :param df: DataFrame with Symbol, Series, Date, Open, High, Low, Close, Volume.
+        """
+        os.makedirs(self.partition_dir, exist_ok=True)
+        dates = _to_datetime(df['Date'])
+        for date, group in df.groupby(dates.values):
+            group = group.sort_values('Symbol', kind='stable')
+            arrays = {'Symbol': group['Symbol'].to_numpy(dtype=str)}
+            for column, dtype in COLUMN_DTYPES.items():
+                if column == 'Date':
+                    arrays[column] = np.full(len(group), np.datetime64(date, 'ns'))
+                else:
+                    arrays[column] = group[column].to_numpy(dtype=dtype)
+            self._write_npz(os.path.join(self.partition_dir, f"{pd.Timestamp(date):%Y%m%d}.npz"), arrays)
+        self._partitions.clear()
+
+        if self.compact_every is not None and len(self._partition_files()) >= self.compact_every:
+            self.compact()
+
+    def flush(self):
+        self.compact()
+
+    @staticmethod
+    def _write_npz(path, arrays):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def compact(self):
+        """
+        Merge all pending partitions into the memory-mapped base.
+
+        With compact_chunk_rows set, symbols are merged in chunks of about
+        that many rows and streamed into the new base, so peak memory stays
+        bounded however large the store grows.
+        """
+        partition_files = self._partition_files()
+        if not partition_files:
+            return
+
+        base = self._load_base()
+        partitions = [self._load_partition(path) for path in partition_files]
+        if self.compact_chunk_rows is None:
+            # Base rows first, then partitions in date order: the last row wins on duplicates.
+            parts = [self._base_rows(base, 0, len(base['symbols']))] if base is not None else []
+            self._write_base(*self._merge(parts + partitions))
+        else:
+            self._write_base_in_chunks(base, partitions)
+
+        for path in partition_files:
+            os.remove(path)
+        self._partitions.clear()
+        logging.info(f"✅ Compacted {len(partition_files)} partitions into {self.base_dir}")
+
+    @staticmethod
+    def _base_rows(base, lo, hi):
+        """Rows of base symbols lo:hi in partition layout (a Symbol column plus the typed columns)."""
+        offsets = base['offsets']
+        start, stop = offsets[lo], offsets[hi]
+        return dict({'Symbol': np.repeat(base['symbols'][lo:hi], np.diff(offsets[lo:hi + 1]))},
+                    **{column: np.asarray(base[column][start:stop]) for column in COLUMN_DTYPES})
+
+    @staticmethod
+    def _merge(parts):
+        """
+        Sort rows by (symbol, date), keeping the last of any repeated (symbol, date).
+
+        :return: (symbols, offsets, columns) in base layout.
+        """
+        symbols = np.concatenate([part['Symbol'] for part in parts])
+        columns = {column: np.concatenate([part[column] for part in parts]).astype(dtype)
+                   for column, dtype in COLUMN_DTYPES.items()}
+        arrival = np.arange(len(symbols))
+
+        unique_symbols, codes = np.unique(symbols, return_inverse=True)
+        order = np.lexsort((arrival, columns['Date'], codes))
+        codes = codes[order]
+        dates = columns['Date'][order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])
+        order = order[keep]
+        codes = codes[keep]
+
+        offsets = np.searchsorted(codes, np.arange(len(unique_symbols) + 1))
+        return unique_symbols, offsets, {column: values[order] for column, values in columns.items()}
+
+    def _write_base_in_chunks(self, base, partitions):
+        symbol_sets = [np.unique(part['Symbol']) for part in partitions]
+        if base is not None:
+            symbol_sets.append(base['symbols'])
+        all_symbols = np.unique(np.concatenate(symbol_sets))
+
+        # Upper bound of each symbol's merged rows; chunks start where the running total crosses a multiple of the cap.
+        rows = np.zeros(len(all_symbols), dtype=np.int64)
+        if base is not None:
+            rows[np.searchsorted(all_symbols, base['symbols'])] += np.diff(base['offsets'])
+        for part in partitions:
+            part_symbols, counts = np.unique(part['Symbol'], return_counts=True)
+            rows[np.searchsorted(all_symbols, part_symbols)] += counts
+        chunk_ids = (np.cumsum(rows) - rows) // max(1, int(self.compact_chunk_rows))
+        bounds = np.append(np.flatnonzero(np.diff(chunk_ids, prepend=-1)), len(all_symbols))
+
+        new_dir = self._new_base_dir()
+        chunk_symbols, chunk_counts, chunk_rows = [], [], []
+        for k, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            first, last = all_symbols[lo], all_symbols[hi - 1]
+            parts = []
+            if base is not None:
+                i = np.searchsorted(base['symbols'], first)
+                j = np.searchsorted(base['symbols'], last, side='right')
+                if j > i:
+                    # A fresh map per chunk, so the pages read are released with it.
+                    parts.append(self._base_rows(self._map_base(), i, j))
+            for part in partitions:
+                i = np.searchsorted(part['Symbol'], first)
+                j = np.searchsorted(part['Symbol'], last, side='right')
+                if j > i:
+                    parts.append({column: values[i:j] for column, values in part.items()})
+            symbols, offsets, columns = self._merge(parts)
+            for column, values in columns.items():
+                np.save(os.path.join(new_dir, f"{column}.{k}.npy"), values)
+            chunk_symbols.append(symbols)
+            chunk_counts.append(np.diff(offsets))
+            chunk_rows.append(int(offsets[-1]))
+
+        # Stitch the chunk files into one .npy per column, one chunk in memory at a time.
+        total = sum(chunk_rows)
+        for column, dtype in COLUMN_DTYPES.items():
+            header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (total,)}
+            with open(os.path.join(new_dir, f"{column}.npy"), 'wb') as f:
+                np.lib.format.write_array_header_1_0(f, header)
+                for k in range(len(chunk_rows)):
+                    chunk_path = os.path.join(new_dir, f"{column}.{k}.npy")
+                    f.write(np.load(chunk_path).tobytes())
+                    os.remove(chunk_path)
+        counts = np.concatenate(chunk_counts)
+        np.save(os.path.join(new_dir, 'symbols.npy'), np.concatenate(chunk_symbols))
+        np.save(os.path.join(new_dir, 'offsets.npy'), np.concatenate([[0], np.cumsum(counts)]).astype(np.int64))
+        self._swap_base(new_dir)
+
+    def _new_base_dir(self):
+        new_dir = self.base_dir + '.new'
+        if os.path.exists(new_dir):
+            for name in os.listdir(new_dir):
+                os.remove(os.path.join(new_dir, name))
+        os.makedirs(new_dir, exist_ok=True)
+        return new_dir
+
+    def _write_base(self, symbols, offsets, columns):
+        new_dir = self._new_base_dir()
+        np.save(os.path.join(new_dir, 'symbols.npy'), symbols)
+        np.save(os.path.join(new_dir, 'offsets.npy'), offsets)
+        for column, values in columns.items():
+            np.save(os.path.join(new_dir, f"{column}.npy"), values)
+        self._swap_base(new_dir)
+
+    def _swap_base(self, new_dir):
+        # The new base is written next to the old one and the directories are
+        # swapped, so a crash mid-write leaves the previous base intact.
+        old_dir = self.base_dir + '.old'
+        self._base = None
+        if os.path.exists(self.base_dir):
+            os.replace(self.base_dir, old_dir)
+        os.replace(new_dir, self.base_dir)
+        if os.path.exists(old_dir):
+            for name in os.listdir(old_dir):
+                os.remove(os.path.join(old_dir, name))
+            os.rmdir(old_dir)
+
+    # ---------- reading ----------
+
+    def _partition_files(self):
+        return sorted(glob.glob(os.path.join(self.partition_dir, '*.npz')))
+
+    def _load_partition(self, path):
+        if path not in self._partitions:
+            with np.load(path) as data:
+                self._partitions[path] = {name: data[name] for name in data.files}
+        return self._partitions[path]
+
+    def _map_base(self):
+        if not os.path.exists(os.path.join(self.base_dir, 'offsets.npy')):
+            return None
+        base = {
+            'symbols': np.load(os.path.join(self.base_dir, 'symbols.npy')),
+            'offsets': np.load(os.path.join(self.base_dir, 'offsets.npy')),
+        }
+        for column in COLUMN_DTYPES:
+            base[column] = np.load(os.path.join(self.base_dir, f"{column}.npy"), mmap_mode='r')
+        return base
+
+    def _load_base(self):
+        if self._base is None:
+            self._base = self._map_base()
+        return self._base
+
+    def release(self):
+        """
+        Unmap the base and forget cached partitions, so pages already read
+        stop counting towards this process's RSS.
+        """
+        self._base = None
+        self._partitions.clear()
+
+    def symbols(self):
+        found = set()
+        base = self._load_base()
+        if base is not None:
+            found.update(base['symbols'].tolist())
+        for path in self._partition_files():
+            found.update(np.unique(self._load_partition(path)['Symbol']).tolist())
+        return sorted(found)
+
+    def bar_counts(self, symbols=None):
+        """
+        Number of bars stored per symbol; read from the base offsets when nothing is pending.
+        """
+        base = self._load_base()
+        if base is None or self._partition_files():
+            return super().bar_counts(symbols)
+        counts = np.diff(base['offsets'])
+        if symbols is None:
+            return counts
+        wanted = np.asarray(list(symbols))
+        rows = np.searchsorted(base['symbols'], wanted)
+        found = rows < len(counts)
+        found[found] = base['symbols'][rows[found]] == wanted[found]
+        result = np.zeros(len(wanted), dtype=np.int64)
+        result[found] = counts[rows[found]]
+        return result
+
+    def _symbol_columns(self, symbol):
+        """Collect a symbol's rows as typed arrays, base first, then pending partitions."""
+        chunks = []
+        base = self._load_base()
+        if base is not None:
+            i = np.searchsorted(base['symbols'], symbol)
+            if i < len(base['symbols']) and base['symbols'][i] == symbol:
+                lo, hi = base['offsets'][i], base['offsets'][i + 1]
+                chunks.append({column: base[column][lo:hi] for column in COLUMN_DTYPES})
+        for path in self._partition_files():
+            part = self._load_partition(path)
+            lo = np.searchsorted(part['Symbol'], symbol, side='left')
+            hi = np.searchsorted(part['Symbol'], symbol, side='right')
+            if hi > lo:
+                chunks.append({column: part[column][lo:hi] for column in COLUMN_DTYPES})
+
+        if not chunks:
+            raise KeyError(f"Symbol not in store: {symbol}")
+        if len(chunks) == 1:
+            return chunks[0]
+
+        columns = {column: np.concatenate([chunk[column] for chunk in chunks]) for column in COLUMN_DTYPES}
+        # Later chunks win for a repeated date.
+        dates = columns['Date']
+        order = np.lexsort((np.arange(len(dates)), dates))
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = dates[order][1:] != dates[order][:-1]
+        order = order[keep]
+        return {column: values[order] for column, values in columns.items()}
+
+    def load_symbol(self, symbol, start=None, end=None, lookback=0):
+        """
+        Load one symbol's bars without parsing any text.
+
+        :param symbol: Trading symbol, e.g. 'RELIANCE'.
+        :param start: Optional first date to include.
+        :param end: Optional last date to include.
+        :param lookback: Also include this many bars before start.
+        :return: DataFrame sorted by Date.
+        """
+        columns = self._symbol_columns(symbol)
+        dates = columns['Date']
+        lo = 0
+        if start is not None:
+            lo = max(0, np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left') - lookback)
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        df = pd.DataFrame({column: np.array(values[lo:hi]) for column, values in columns.items()})
+        df.insert(0, 'Symbol', symbol)
+        return df
+
+    def load_universe(self, start=None, end=None):
+        """
+        Load every symbol's bars as one DataFrame sorted by (Symbol, Date).
+
+        When there are no pending partitions this is a straight copy of the
+        memory-mapped base columns.
+        """
+        base = self._load_base()
+        if base is None or self._partition_files():
+            return super().load_universe(start, end)
+
+        df = pd.DataFrame({column: np.array(base[column]) for column in COLUMN_DTYPES})
+        df.insert(0, 'Symbol', np.repeat(base['symbols'], np.diff(base['offsets'])))
+        if start is not None:
+            df = df[df['Date'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['Date'] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+    def load_panel(self, end=None, length=None, symbols=None, columns=('Open', 'High', 'Low', 'Close')):
+        """
+        Load the trailing bars of many symbols as a BarPanel.
+
+        On a compacted store this is a single gather from the memory-mapped
+        base columns: only the requested window of each symbol is touched.
+        """
+        base = self._load_base()
+        if base is None or self._partition_files():
+            return super().load_panel(end, length, symbols, columns)
+
+        all_symbols, offsets = base['symbols'], base['offsets']
+        if symbols is None:
+            rows = np.arange(len(all_symbols))
+        else:
+            wanted = np.asarray(list(symbols), dtype=str)
+            rows = np.searchsorted(all_symbols, wanted)
+            found = rows < len(all_symbols)
+            found[found] = all_symbols[rows[found]] == wanted[found]
+            if not found.all():
+                # Same as load_symbol on the other stores and on pending partitions.
+                raise KeyError(f"Symbol not in store: {wanted[~found][0]}")
+        starts, stops = offsets[rows], offsets[rows + 1]
+
+        if end is not None:
+            end = np.datetime64(pd.Timestamp(end), 'ns')
+            stops = np.array([start + np.searchsorted(base['Date'][start:stop], end, side='right')
+                              for start, stop in zip(starts, stops)], dtype=np.int64)
+        counts = stops - starts
+        if length is None:
+            length = int(counts.max()) if len(counts) else 0
+
+        index = stops[:, None] - length + np.arange(length)
+        valid = index >= starts[:, None]
+        index = np.where(valid, index, 0)
+
+        dates = np.where(valid, base['Date'][index], np.datetime64('NaT'))
+        arrays = {column: np.where(valid, base[column][index], np.nan) for column in columns}
+        return BarPanel(all_symbols[rows], dates, arrays)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Date stamp used in the NSE archive file names, e.g. sec_bhavdata_full_05012024.csv
+ARCHIVE_DATE_FORMAT = '%d%m%Y'
+
+
+def _to_days(dates, date_format=None):
+    """Convert a date or array of dates (datetime-likes or strings) to datetime64[D]."""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[D]')
+    if np.ndim(dates):
+        return pd.to_datetime(dates, format=date_format).to_numpy().astype('datetime64[D]')
+    return np.datetime64(pd.to_datetime(dates, format=date_format), 'D')
+
+
+def _from_days(days):
+    return pd.DatetimeIndex(days) if np.ndim(days) else pd.Timestamp(days)
+
+
+class TradingCalendar:
+    def __init__(self, holidays=(), weekmask='1111100'):
+        """
+        Exchange sessions: every weekday in weekmask that is not a holiday.
+
+        All lookups are vectorized through numpy's business-day functions, so
+        the sessions of a range or the next session of many dates take one call.
+
+        :param holidays: Exchange holidays (dates or strings parseable by pandas).
+        :param weekmask: Trading weekdays, Monday first; '1111100' is Monday to Friday.
+        """
+        self.holidays = np.unique(_to_days(list(holidays)))
+        self.weekmask = weekmask
+        self._busdaycal = np.busdaycalendar(weekmask=weekmask, holidays=self.holidays)
+
+    def __getstate__(self):
+        # np.busdaycalendar does not pickle; worker processes rebuild it.
+        state = self.__dict__.copy()
+        del state['_busdaycal']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._busdaycal = np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+
+    @classmethod
+    def from_file(cls, path, date_format=None, **kwargs):
+        """
+        Load holidays from a text or CSV file with one date per line.
+
+        The first column of each line is the date; anything after a comma
+        (e.g. the holiday name) is ignored, as are blank lines and '#' comments.
+        A header line is skipped when it does not parse as a date.
+
+        :param path: Holiday file.
+        :param date_format: strptime format of the dates; inferred when None
+                            (ambiguous day-first dates need an explicit format).
+        """
+        column = pd.read_csv(path, header=None, usecols=[0], comment='#', dtype=str,
+                             skip_blank_lines=True).iloc[:, 0].str.strip()
+        if len(column) and pd.isna(pd.to_datetime(column.iloc[0], format=date_format, errors='coerce')):
+            column = column.iloc[1:]  # header
+        dates = pd.to_datetime(column, format=date_format, errors='coerce')
+        if dates.isna().any():
+            raise ValueError(f"Unparseable holiday dates in {path}: {list(column[dates.isna()])[:5]}")
+        return cls(dates, **kwargs)
+
+    def is_session(self, dates):
+        """True where a date (or each date of an array) is a trading session."""
+        return np.is_busday(_to_days(dates), busdaycal=self._busdaycal)
+
+    def sessions(self, start, end, inclusive='both'):
+        """
+        All sessions between start and end.
+
+        :param inclusive: 'both', 'left' (end excluded), 'right' or 'neither'.
+        :return: DatetimeIndex; empty when end is before start.
+        """
+        first, last = _to_days(start), _to_days(end)
+        if inclusive in ('right', 'neither'):
+            first += 1
+        if inclusive in ('both', 'right'):
+            last += 1
+        days = np.arange(first, max(first, last), dtype='datetime64[D]')
+        return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=self._busdaycal)])
+
+    def session_count(self, start, end):
+        """Number of sessions in [start, end); vectorized over arrays."""
+        return np.busday_count(_to_days(start), _to_days(end), busdaycal=self._busdaycal)
+
+    def next_session(self, dates):
+        """First session strictly after each date."""
+        # Roll back to a session on or before the date, then step one session forward.
+        return _from_days(np.busday_offset(_to_days(dates), 1, roll='backward', busdaycal=self._busdaycal))
+
+    def previous_session(self, dates):
+        """Last session strictly before each date."""
+        return _from_days(np.busday_offset(_to_days(dates), -1, roll='forward', busdaycal=self._busdaycal))
+
+    def session_offset(self, dates, n):
+        """The session n sessions after (n < 0: before) each date, rolling non-sessions forward first."""
+        return _from_days(np.busday_offset(_to_days(dates), n, roll='forward', busdaycal=self._busdaycal))
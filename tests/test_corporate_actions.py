@@ -0,0 +1,159 @@
+"""
+AdjustedStore factors, and the outputs rebuilt when a symbol's factors change.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_patterns.corporate_actions import AdjustedStore
+from stock_patterns.metrics import METRICS
+from stock_patterns.pattern_index import PatternIndex
+from stock_patterns.resampler import ResampledStore, resample_bars
+from stock_patterns.streaming import StreamingPipeline
+from stock_patterns.symbol_store import COLUMN_DTYPES, NumpySymbolStore
+
+SYMBOLS = ('AAA', 'BBB', 'CCC')
+DATES = pd.bdate_range('2024-01-01', periods=60)
+EX = 20  # ex-date bar of the actions below
+
+
+def make_bars(n_days=len(DATES), seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, symbol in enumerate(SYMBOLS):
+        close = np.round(100 * (i + 1) * np.exp(np.cumsum(0.02 * rng.standard_normal(len(DATES)))), 2)
+        open_ = np.round(np.roll(close, 1) * (1 + 0.01 * rng.standard_normal(len(DATES))), 2)
+        for k in range(n_days):
+            rows.append((symbol, 'EQ', DATES[k], open_[k], max(open_[k], close[k]) + 1,
+                         min(open_[k], close[k]) - 1, close[k], 1000 + 10 * k))
+    return pd.DataFrame(rows, columns=['Symbol'] + list(COLUMN_DTYPES))
+
+
+@pytest.fixture
+def raw(tmp_path):
+    store = NumpySymbolStore(str(tmp_path / 'store'))
+    store.append_batch(make_bars())
+    store.flush()
+    return store
+
+
+def write_actions(path, *rows):
+    path.write_text("Symbol,ExDate,Action,Ratio,Amount\n" + "".join(f"{row}\n" for row in rows))
+
+
+def adjusted(raw, tmp_path, *rows):
+    write_actions(tmp_path / 'actions.csv', *rows)
+    return AdjustedStore(raw, str(tmp_path / 'actions.csv'), str(tmp_path / 'adjustments.json'))
+
+
+def assert_factors(store, raw, symbol, price, volume=None):
+    """Bars before the ex-date scaled by price (volumes by volume), bars from it on untouched."""
+    bars, original = store.load_symbol(symbol), raw.load_symbol(symbol)
+    before = (original['Date'] < DATES[EX]).to_numpy()
+    assert before.sum() == EX
+    for column in ('Open', 'High', 'Low', 'Close'):
+        np.testing.assert_allclose(bars[column][before], original[column][before] * price)
+        np.testing.assert_array_equal(bars[column][~before], original[column][~before])
+    if volume is not None:
+        np.testing.assert_array_equal(bars['Volume'][before], original['Volume'][before] * volume)
+        np.testing.assert_array_equal(bars['Volume'][~before], original['Volume'][~before])
+
+
+def test_split(raw, tmp_path):
+    store = adjusted(raw, tmp_path, f"AAA,{DATES[EX]:%Y-%m-%d},split,5,")
+    assert_factors(store, raw, 'AAA', 0.2, 5)
+    assert_factors(store, raw, 'BBB', 1.0, 1)
+
+    # Panels and the universe read the same factors.
+    panel = store.load_panel(symbols=['AAA'])
+    np.testing.assert_allclose(panel['Close'][0], store.load_symbol('AAA')['Close'])
+    universe = store.load_universe()
+    np.testing.assert_allclose(universe.loc[universe['Symbol'] == 'AAA', 'Close'], store.load_symbol('AAA')['Close'])
+
+
+def test_bonus(raw, tmp_path):
+    store = adjusted(raw, tmp_path, f"BBB,{DATES[EX]:%Y-%m-%d},bonus,1,")
+    assert_factors(store, raw, 'BBB', 0.5, 2)
+
+
+def test_dividend(raw, tmp_path):
+    store = adjusted(raw, tmp_path, f"CCC,{DATES[EX]:%Y-%m-%d},dividend,,5")
+    previous_close = raw.load_symbol('CCC')['Close'].iloc[EX - 1]
+    assert_factors(store, raw, 'CCC', 1 - 5 / previous_close, 1)
+    assert store.factors.entries['CCC']['key'] is not None
+
+
+def test_dividend_without_previous_close_is_pending(tmp_path):
+    bars = make_bars()
+    raw = NumpySymbolStore(str(tmp_path / 'store'))
+    raw.append_batch(bars[bars['Date'] < DATES[EX - 5]])
+    raw.flush()
+    store = adjusted(raw, tmp_path, f"CCC,{DATES[EX]:%Y-%m-%d},dividend,,5")
+    store.refresh()
+    assert store.factors.entries['CCC']['key'] is None
+    assert store.fingerprint('CCC').startswith('pending:')
+
+    # The close before the ex-date arrives: the next refresh recomputes CCC.
+    raw.append_batch(bars[bars['Date'] >= DATES[EX - 5]])
+    raw.flush()
+    store = AdjustedStore(raw, str(tmp_path / 'actions.csv'), str(tmp_path / 'adjustments.json'))
+    assert store.refresh() == ['CCC']
+    assert store.factors.entries['CCC']['key'] is not None
+    assert not store.fingerprint('CCC').startswith('pending:')
+    assert_factors(store, raw, 'CCC', 1 - 5 / raw.load_symbol('CCC')['Close'].iloc[EX - 1])
+
+
+def test_editing_one_symbol_recomputes_only_it(raw, tmp_path):
+    store = adjusted(raw, tmp_path, f"AAA,{DATES[EX]:%Y-%m-%d},split,5,", f"BBB,{DATES[EX]:%Y-%m-%d},bonus,1,")
+    assert store.refresh() == ['AAA', 'BBB']
+    kept = dict(store.factors.entries['AAA'])
+
+    write_actions(tmp_path / 'actions.csv', f"AAA,{DATES[EX]:%Y-%m-%d},split,5,", f"BBB,{DATES[EX]:%Y-%m-%d},bonus,2,")
+    store = AdjustedStore(raw, str(tmp_path / 'actions.csv'), str(tmp_path / 'adjustments.json'))
+    recomputed = METRICS.counters.get('adjust_symbols_recomputed', 0)
+    assert store.refresh() == ['BBB']
+    assert METRICS.counters['adjust_symbols_recomputed'] - recomputed == 1
+    assert store.factors.entries['AAA'] == kept
+    assert_factors(store, raw, 'BBB', 1 / 3, 3)
+
+
+def test_resampled_store_rebuilds_symbol_on_new_factors(raw, tmp_path):
+    store = adjusted(raw, tmp_path)
+    weekly = ResampledStore(store, 'W', str(tmp_path / 'weekly'))
+    weekly.refresh()
+    before = {symbol: weekly.load_symbol(symbol) for symbol in SYMBOLS}
+
+    # A split in a closed week, with no new daily bars.
+    write_actions(tmp_path / 'actions.csv', f"AAA,{DATES[EX]:%Y-%m-%d},split,5,")
+    store.refresh()
+    weekly = ResampledStore(store, 'W', str(tmp_path / 'weekly'))
+    assert weekly.refresh() > 0
+
+    expected = resample_bars(store.load_symbol('AAA'), 'W').reset_index(drop=True)
+    pd.testing.assert_frame_equal(weekly.load_symbol('AAA').reset_index(drop=True), expected, check_dtype=False)
+    assert not np.allclose(weekly.load_symbol('AAA')['Close'], before['AAA']['Close'])
+    for symbol in ('BBB', 'CCC'):
+        pd.testing.assert_frame_equal(weekly.load_symbol(symbol), before[symbol])
+
+
+def test_pattern_index_rebuilds_symbol_on_new_factors(raw, tmp_path):
+    store = adjusted(raw, tmp_path)
+    pipeline = StreamingPipeline(store)
+    index = PatternIndex(str(tmp_path / 'index'))
+    pipeline.index_patterns(index)
+    before = index.query()
+
+    write_actions(tmp_path / 'actions.csv', f"AAA,{DATES[EX]:%Y-%m-%d},split,5,")
+    store.refresh()
+    # Only the last bar is in range, yet AAA is re-indexed over its whole history.
+    StreamingPipeline(store).index_patterns(index, start=DATES[-1], end=DATES[-1])
+    assert index.fingerprint('AAA') == store.fingerprint('AAA') != ''
+    assert index.fingerprint('BBB') == ''
+
+    full = PatternIndex(str(tmp_path / 'full'))
+    StreamingPipeline(store).index_patterns(full)
+    pd.testing.assert_frame_equal(index.query(), full.query())
+    aaa = before['Symbol'] == 'AAA'
+    pd.testing.assert_frame_equal(index.query(symbols=['BBB', 'CCC']),
+                                  before[~aaa].reset_index(drop=True))
+    assert not index.query(symbols=['AAA']).reset_index(drop=True).equals(before[aaa].reset_index(drop=True))
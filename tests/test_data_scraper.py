@@ -0,0 +1,113 @@
+"""
+StockDataDownloader against a local stand-in for the NSE archive.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from stock_patterns.data_scraper import StockDataDownloader
+from stock_patterns.trading_calendar import TradingCalendar
+
+BHAV_HEADER = ("SYMBOL, SERIES, DATE1, PREV_CLOSE, OPEN_PRICE, HIGH_PRICE, LOW_PRICE, LAST_PRICE, CLOSE_PRICE, "
+               "AVG_PRICE, TTL_TRD_QNTY, TURNOVER_LACS, NO_OF_TRADES, DELIV_QTY, DELIV_PER")
+
+# Monday 6 to Friday 10 January 2020; Wednesday is a holiday in the calendar.
+HOLIDAY = '08012020'
+SESSIONS = ['06012020', '07012020', '09012020', '10012020']
+NOT_FOUND = '09012020'       # answers 404, as the archive does for a missing day
+FLAKY = '07012020'           # answers 503 once, then the file
+SLOW = {'06012020': 0.5}     # seconds; the first day arrives last
+
+
+def bhavcopy(date, day):
+    stamp = pd.to_datetime(date, format='%d%m%Y').strftime('%d-%b-%Y')
+    lines = [BHAV_HEADER]
+    for i, symbol in enumerate(['ABC', 'XYZ']):
+        close = 100 + 10 * i + day
+        lines.append(f"{symbol}, EQ, {stamp}, {close:.2f}, {close:.2f}, {close + 1:.2f}, {close - 1:.2f}, "
+                     f"{close:.2f}, {close:.2f}, {close:.2f}, {1000 + day}, 1.00, 10, 500, 50.00")
+    lines.append(f"ABC, BE, {stamp}, 1.00, 1.00, 1.00, 1.00, 1.00, 1.00, 1.00, 1, 0.01, 1, -, -")
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+class Archive:
+    def __init__(self):
+        self.requests = []
+        self.served = []
+        self.lock = threading.Lock()
+
+    def handler(self):
+        archive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                date = self.path.rsplit('_', 1)[-1].split('.')[0]
+                with archive.lock:
+                    archive.requests.append(date)
+                    attempt = archive.requests.count(date)
+                time.sleep(SLOW.get(date, 0))
+                if date == NOT_FOUND or date not in SESSIONS:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if date == FLAKY and attempt == 1:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = bhavcopy(date, SESSIONS.index(date))
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with archive.lock:
+                    archive.served.append(date)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def archive():
+    archive = Archive()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), archive.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    archive.url = f"http://127.0.0.1:{server.server_address[1]}/products/content"
+    yield archive
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_retries_skips_holidays_and_writes_in_date_order(tmp_path, archive):
+    downloader = StockDataDownloader(
+        '04012020', '11012020', download_dir=None, max_workers=4, max_retries=2, backoff_factor=0.01,
+        timeout=5, base_url=archive.url, use_cache=False, calendar=TradingCalendar([pd.to_datetime(HOLIDAY, format='%d%m%Y')]))
+    downloader.process_dates(str(tmp_path / 'bars'))
+
+    # Weekend days and the holiday are never requested; the 503 is retried once.
+    assert sorted(set(archive.requests)) == sorted(SESSIONS)
+    assert HOLIDAY not in archive.requests
+    assert archive.requests.count(FLAKY) == 2
+    assert archive.requests.count(NOT_FOUND) == 1
+    # The first day was served last, yet the files are chronological.
+    assert archive.served[-1] == '06012020'
+
+    expected = [date for date in SESSIONS if date != NOT_FOUND]
+    for i, symbol in enumerate(['ABC', 'XYZ']):
+        df = pd.read_csv(tmp_path / 'bars' / f"{symbol.lower()}.csv")
+        assert list(df['Date']) == [pd.to_datetime(date, format='%d%m%Y').strftime('%d-%m-%Y') for date in expected]
+        assert list(df['Series']) == ['EQ'] * len(expected)
+        assert list(df['Close']) == [100 + 10 * i + SESSIONS.index(date) for date in expected]
+
+
+def test_download_gives_up_after_max_retries(tmp_path, archive):
+    downloader = StockDataDownloader(
+        FLAKY, '08012020', download_dir=None, max_retries=0, backoff_factor=0.01, timeout=5,
+        base_url=archive.url, use_cache=False)
+    assert downloader.download_csv_for_date(FLAKY) is None
+    assert archive.requests == [FLAKY]
@@ -0,0 +1,147 @@
+"""
+Replaying a recorded feed must alert exactly what whole-history detection finds.
+
+The feed mixes trades and 1-minute bars, has symbols that skip intervals
+and symbols that first appear mid-session, more of them than the
+detector's initial capacity. Every alert must match engine.compute_matrix
+run on the symbol's full candle history, built here from the same
+records with pandas.
+"""
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+
+from stock_patterns.intraday import ALERT_COLUMNS, IntradayDetector, replay_file, socket_feed
+from stock_patterns.pattern_engine import get_engine
+
+INTERVAL = '5min'
+SESSION_START = pd.Timestamp('2024-03-04 03:45')  # 09:15 IST
+N_INTERVALS = 80
+
+
+def make_records(n_symbols=7, seed=0):
+    """Time-ordered feed records as (timestamp_ns, symbol, open, high, low, close, volume)."""
+    rng = np.random.default_rng(seed)
+    interval = pd.Timedelta(INTERVAL).value
+    minute = pd.Timedelta('1min').value
+    records = []
+    price = {f"SYM{i}": rng.uniform(100, 1000) for i in range(n_symbols)}
+    for k in range(N_INTERVALS):
+        for minute_index in range(5):
+            for i, symbol in enumerate(price):
+                # Later symbols list mid-session; every symbol skips some intervals.
+                if k < 6 * i or rng.random() < 0.15 or (k + i) % 11 == 0:
+                    continue
+                timestamp = SESSION_START.value + k * interval + minute_index * minute + int(rng.integers(0, minute))
+                if rng.random() < 0.5:
+                    price[symbol] *= np.exp(0.004 * rng.standard_normal())
+                    records.append((timestamp, symbol, round(price[symbol], 2), None, None, None, int(rng.integers(1, 500))))
+                else:
+                    open_ = price[symbol]
+                    price[symbol] *= np.exp(0.004 * rng.standard_normal())
+                    high = max(open_, price[symbol]) * (1 + abs(0.002 * rng.standard_normal()))
+                    low = min(open_, price[symbol]) * (1 - abs(0.002 * rng.standard_normal()))
+                    records.append((timestamp, symbol, round(open_, 2), round(high, 2), round(low, 2),
+                                    round(price[symbol], 2), int(rng.integers(1, 500))))
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def write_feed(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('timestamp,symbol,open,high,low,close,volume\n')
+        for timestamp, symbol, open_, high, low, close, volume in records:
+            if high is None:
+                f.write(f"{timestamp},{symbol},{open_},{volume}\n")
+            else:
+                stamp = pd.Timestamp(timestamp).isoformat() if timestamp % 2 else timestamp
+                f.write(f"{stamp},{symbol},{open_},{high},{low},{close},{volume}\n")
+
+
+def expected_alerts(records, engine):
+    """compute_matrix over each symbol's full candle history, one alert per non-zero signal."""
+    df = pd.DataFrame(records, columns=['Timestamp', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    trade = df['High'].isna()
+    for column in ('High', 'Low', 'Close'):
+        df.loc[trade, column] = df.loc[trade, 'Open']
+    df['BarStart'] = pd.to_datetime(df['Timestamp'] - df['Timestamp'] % pd.Timedelta(INTERVAL).value)
+    candles = df.groupby(['Symbol', 'BarStart'], sort=True).agg(
+        Open=('Open', 'first'), High=('High', 'max'), Low=('Low', 'min'), Close=('Close', 'last')).reset_index()
+
+    names = np.asarray(list(engine.patterns), dtype=object)
+    frames = []
+    for symbol, bars in candles.groupby('Symbol', sort=True):
+        signals = engine.compute_matrix(*(bars[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')))
+        bar, pattern = np.nonzero(signals)
+        hit = signals[bar, pattern]
+        frames.append(pd.DataFrame({
+            'Symbol': symbol,
+            'BarStart': bars['BarStart'].to_numpy()[bar],
+            'Pattern': names[pattern],
+            'Direction': np.where(hit > 0, 'bullish', 'bearish'),
+            'Signal': hit.astype(int),
+        }, columns=ALERT_COLUMNS))
+    return candles, normalize(pd.concat(frames, ignore_index=True))
+
+
+def normalize(alerts):
+    alerts = alerts.astype({'Symbol': str, 'Pattern': str, 'Direction': str, 'Signal': int})
+    alerts['BarStart'] = pd.to_datetime(alerts['BarStart'])
+    return alerts.sort_values(['BarStart', 'Symbol', 'Pattern']).reset_index(drop=True)
+
+
+def run_feed(feed):
+    detector = IntradayDetector(INTERVAL, engine='numpy', capacity=2)
+    closed = []
+    intervals = detector.run(feed, closed.append, clock=lambda: 0)
+    assert intervals == len(closed)
+    return detector, closed
+
+
+def test_replay_matches_full_history(tmp_path):
+    records = make_records()
+    path = tmp_path / 'feed.csv'
+    write_feed(path, records)
+    candles, expected = expected_alerts(records, get_engine('numpy'))
+
+    detector, closed = run_feed(replay_file(path))
+    alerts = normalize(pd.concat(closed, ignore_index=True))
+
+    assert len(detector.symbols) > 2  # the rows grew past the initial capacity
+    assert candles.groupby('Symbol')['BarStart'].count().min() < N_INTERVALS  # symbols with gaps
+    assert sum(frame.attrs['symbols'] for frame in closed) == len(candles)
+    assert len(expected) > 20
+    pd.testing.assert_frame_equal(alerts, expected)
+
+
+def test_socket_feed_matches_replay(tmp_path):
+    records = make_records(seed=1)
+    path = tmp_path / 'feed.csv'
+    write_feed(path, records)
+    payload = path.read_bytes()
+
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            # Odd chunk sizes split lines across reads.
+            for offset in range(0, len(payload), 997):
+                conn.sendall(payload[offset:offset + 997])
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        _, closed = run_feed(socket_feed('127.0.0.1', port, heartbeat=0.05))
+    finally:
+        thread.join()
+        server.close()
+    _, replayed = run_feed(replay_file(path))
+
+    pd.testing.assert_frame_equal(normalize(pd.concat(closed, ignore_index=True)),
+                                  normalize(pd.concat(replayed, ignore_index=True)))
+    pd.testing.assert_frame_equal(normalize(pd.concat(closed, ignore_index=True)),
+                                  expected_alerts(records, get_engine('numpy'))[1])
@@ -0,0 +1,41 @@
+"""
+MetricsRegistry timers keep constant-size histograms and export them to Prometheus.
+"""
+import numpy as np
+import pytest
+
+from stock_patterns.metrics import BUCKET_BOUNDS, MetricsRegistry
+
+
+def test_timer_histogram_is_bounded_and_close_to_exact():
+    registry = MetricsRegistry()
+    latencies = np.random.default_rng(0).lognormal(-5, 1, 50_000)
+    for seconds in latencies:
+        registry.observe('parse', seconds)
+
+    assert len(registry.histograms['parse']['buckets']) == len(BUCKET_BOUNDS) + 1
+    summary = registry.timer_summary('parse')
+    assert summary['count'] == len(latencies)
+    assert summary['sum'] == pytest.approx(latencies.sum())
+    assert summary['max'] == latencies.max()
+    ordered = np.sort(latencies)
+    for q in (0.5, 0.95):
+        exact = ordered[int(np.ceil(q * len(ordered))) - 1]
+        assert exact <= summary[f"p{round(q * 100)}"] <= exact * 10 ** (1 / 20)
+
+
+def test_merge_and_prometheus_buckets():
+    registry, worker = MetricsRegistry(), MetricsRegistry()
+    for seconds in (0.002, 0.02):
+        registry.observe('render', seconds)
+    worker.observe('render', 0.2)
+    registry.merge(worker.state())
+
+    assert registry.timer_summary('render')['count'] == 3
+    assert registry.timer_summary('render')['max'] == 0.2
+    text = registry.to_prometheus()
+    assert '# TYPE stock_patterns_item_seconds histogram' in text
+    assert 'stock_patterns_item_seconds_bucket{stage="render",le="0.01"} 1' in text
+    assert 'stock_patterns_item_seconds_bucket{stage="render",le="0.1"} 2' in text
+    assert 'stock_patterns_item_seconds_bucket{stage="render",le="+Inf"} 3' in text
+    assert 'stock_patterns_item_seconds_count{stage="render"} 3' in text
@@ -0,0 +1,72 @@
+"""
+PatternBacktester statistics on a series with known pattern hits.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_patterns.pattern_backtest import PatternBacktester
+from stock_patterns.symbol_store import COLUMN_DTYPES, NumpySymbolStore
+
+N_BARS = 45
+DOJIS = {25: 100.5, 33: 99.8}  # bar -> open = close
+
+
+def make_bars():
+    """A quiet 100/101 zigzag with a long-shadow doji at each DOJIS bar."""
+    close = 100 + np.arange(N_BARS) % 2 * 1.0
+    open_ = 100 + (np.arange(N_BARS) + 1) % 2 * 1.0
+    high = np.maximum(open_, close) + 0.3
+    low = np.minimum(open_, close) - 0.3
+    for bar, price in DOJIS.items():
+        open_[bar] = close[bar] = price
+        high[bar], low[bar] = price + 2, price - 2
+    return pd.DataFrame({
+        'Symbol': 'DOJI', 'Series': 'EQ', 'Date': pd.bdate_range('2024-01-01', periods=N_BARS),
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': 1000,
+    }, columns=['Symbol'] + list(COLUMN_DTYPES))
+
+
+@pytest.fixture
+def bars(tmp_path):
+    df = make_bars()
+    store = NumpySymbolStore(str(tmp_path / 'store'))
+    store.append_batch(df)
+    store.flush()
+    return store, df
+
+
+def test_forward_return_hit_rate_and_drawdown(bars):
+    store, df = bars
+    result = PatternBacktester(store, horizons=(1, 5), engine='numpy').run()
+    doji = result[result['Pattern'] == 'Doji'].set_index('Horizon')
+    assert list(doji['Direction']) == ['bullish', 'bullish']
+
+    close, low = df['Close'].to_numpy(), df['Low'].to_numpy()
+    for horizon in (1, 5):
+        # Long at the doji's close, out at the close `horizon` bars later.
+        returns = [close[bar + horizon] / close[bar] - 1 for bar in DOJIS]
+        drawdowns = [min(low[bar + 1:bar + horizon + 1].min() / close[bar] - 1, 0) for bar in DOJIS]
+        row = doji.loc[horizon]
+        assert row['Events'] == 2
+        assert row['AvgReturn'] == pytest.approx(np.mean(returns))
+        assert row['HitRate'] == 0.5
+        assert row['MaxDrawdown'] == pytest.approx(min(drawdowns))
+        assert row['AvgDrawdown'] == pytest.approx(np.mean(drawdowns))
+    # 100.5 -> 100 loses, 99.8 -> 100 wins; the first doji's next low is the worst move.
+    assert doji.loc[1, 'AvgReturn'] == pytest.approx((100 / 100.5 + 100 / 99.8) / 2 - 1)
+    assert doji.loc[1, 'MaxDrawdown'] == pytest.approx(99.7 / 100.5 - 1)
+
+
+def test_bearish_hits_are_short_and_range_limits_signals(bars):
+    store, df = bars
+    close, high = df['Close'].to_numpy(), df['High'].to_numpy()
+    result = PatternBacktester(store, horizons=(1,), engine='numpy').run(start=df['Date'][26], end=df['Date'][30])
+
+    # Only the bearish engulfing on bar 26 is inside the range; the dojis are not.
+    assert list(result['Pattern']) == ['Engulfing']
+    row = result.iloc[0]
+    assert row['Direction'] == 'bearish' and row['Events'] == 1
+    assert row['AvgReturn'] == pytest.approx(1 - close[27] / close[26])
+    assert row['HitRate'] == 0.0
+    assert row['MaxDrawdown'] == pytest.approx(1 - high[27] / close[26])
@@ -0,0 +1,63 @@
+"""
+The NumPy engine reproduces TA-Lib's candle functions bar for bar.
+"""
+import numpy as np
+import pytest
+
+from stock_patterns.pattern_engine import PATTERN_FUNCTIONS, check_parity, get_engine
+
+pytest.importorskip('talib')
+
+
+def make_panel(n_symbols=40, n_bars=500, seed=0):
+    """Random OHLC panel with dojis, gaps and NaN left-padding (symbols listed late)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(0.02 * rng.standard_normal((n_symbols, n_bars)), axis=1))
+    open_ = np.roll(close, 1, axis=1) * (1 + 0.015 * rng.standard_normal((n_symbols, n_bars)))
+    doji = rng.random((n_symbols, n_bars)) < 0.08
+    open_[doji] = close[doji]
+    high = np.maximum(open_, close) * (1 + np.abs(0.01 * rng.standard_normal((n_symbols, n_bars))))
+    low = np.minimum(open_, close) * (1 - np.abs(0.01 * rng.standard_normal((n_symbols, n_bars))))
+    # Shaved candles for Marubozu.
+    shaved = rng.random((n_symbols, n_bars)) < 0.05
+    high[shaved], low[shaved] = np.maximum(open_, close)[shaved], np.minimum(open_, close)[shaved]
+    # A few abandoned babies: long candle, doji gapping away, candle gapping back.
+    for row, bar in zip(rng.integers(0, n_symbols, 20), rng.integers(n_bars // 2, n_bars - 3, 20)):
+        base, sign = close[row, bar - 1], rng.choice([-1, 1])
+        first = base * (1 - sign * 0.06)
+        doji_price = first * (1 - sign * 0.03)
+        third = base * (1 - sign * 0.01)
+        open_[row, bar:bar + 3] = base, doji_price, doji_price * (1 + sign * 0.03)
+        close[row, bar:bar + 3] = first, doji_price, third
+        high[row, bar:bar + 3] = (np.maximum(base, first), doji_price * 1.004,
+                                  np.maximum(open_[row, bar + 2], third))
+        low[row, bar:bar + 3] = (np.minimum(base, first), doji_price * 0.996,
+                                 np.minimum(open_[row, bar + 2], third))
+    panel = [np.round(values, 2) for values in (open_, high, low, close)]
+    listed = rng.integers(0, n_bars // 2, n_symbols)
+    for values in panel:
+        values[np.arange(n_bars) < listed[:, None]] = np.nan
+    return panel
+
+
+def test_parity_on_nan_padded_panel():
+    panel = make_panel()
+    mismatches = check_parity(*panel)
+    assert sorted(mismatches) == sorted(PATTERN_FUNCTIONS)
+    assert mismatches == {name: 0 for name in PATTERN_FUNCTIONS}
+
+
+def test_every_pattern_matches_bar_for_bar():
+    panel = make_panel(seed=1)
+    expected = get_engine('talib').compute(*panel)
+    actual = get_engine('numpy').compute(*panel)
+    assert len(expected) == 14
+    for name in PATTERN_FUNCTIONS:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+        # Every pattern fires, so equality is not only on zeros.
+        assert np.count_nonzero(expected[name]), name
+
+
+def test_parity_on_one_series():
+    open_, high, low, close = (values[3] for values in make_panel(seed=2))
+    assert not any(check_parity(open_, high, low, close).values())
@@ -0,0 +1,61 @@
+"""
+NumpySymbolStore panels read the same whether or not the store is compacted.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_patterns.symbol_store import COLUMN_DTYPES, NumpySymbolStore
+
+
+def make_bars(symbols=('AAA', 'BBB', 'CCC'), n_days=6):
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    rows = []
+    for i, symbol in enumerate(symbols):
+        # CCC lists late, so its panel row is left-padded.
+        for k, date in enumerate(dates[2 * (symbol == 'CCC'):]):
+            close = 100.0 * (i + 1) + k
+            rows.append((symbol, 'EQ', date, close, close + 1, close - 1, close, 1000 + k))
+    return pd.DataFrame(rows, columns=['Symbol'] + list(COLUMN_DTYPES))
+
+
+@pytest.fixture(params=['pending', 'compacted'])
+def store(request, tmp_path):
+    store = NumpySymbolStore(str(tmp_path / 'store'), compact_every=None)
+    store.append_batch(make_bars())
+    if request.param == 'compacted':
+        store.flush()
+    return store
+
+
+def test_panel_matches_symbol_loads(store):
+    panel = store.load_panel(end='2024-01-05', length=4, symbols=['CCC', 'AAA'])
+    assert list(panel.symbols) == ['CCC', 'AAA']
+    for row, symbol in enumerate(panel.symbols):
+        bars = store.load_symbol(symbol, end='2024-01-05').iloc[-4:]
+        valid = ~np.isnat(panel.dates[row])
+        np.testing.assert_array_equal(panel.dates[row][valid], bars['Date'].to_numpy())
+        np.testing.assert_array_equal(panel['Close'][row][valid], bars['Close'].to_numpy())
+        assert np.isnan(panel['Close'][row][~valid]).all()
+    assert np.isnat(panel.dates[0]).tolist() == [True, False, False, False]
+
+
+def test_panel_unknown_symbol_raises(store):
+    with pytest.raises(KeyError):
+        store.load_panel(symbols=['AAA', 'ZZZ'])
+
+
+def test_panel_of_empty_compacted_store(tmp_path):
+    store = NumpySymbolStore(str(tmp_path / 'store'))
+    empty = {'Symbol': np.array([], dtype=str)}
+    empty.update({column: np.array([], dtype=dtype) for column, dtype in COLUMN_DTYPES.items()})
+    # What compacting zero rows writes: no symbols, offsets [0].
+    store._write_base(*store._merge([empty]))
+    assert store.symbols() == []
+
+    panel = store.load_panel()
+    assert len(panel) == 0 and panel.dates.shape == (0, 0)
+    assert store.load_panel(length=3)['Close'].shape == (0, 3)
+    assert len(store.load_panel(symbols=[])) == 0
+    with pytest.raises(KeyError):
+        store.load_panel(symbols=['AAA'])